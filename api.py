@@ -0,0 +1,349 @@
+"""
+HTTP JSON API for availability, quotes and bookings, next to the Streamlit page.
+
+A plain ASGI application with no framework dependency; serve it with any ASGI server, e.g.
+
+    pip install uvicorn
+    BOOKING_DB=bookings.db uvicorn api:app --workers 4
+
+The server keeps connections alive between requests, and each request is a
+direct call into booking_core, with no UI script re-run. Handlers run on the event
+loop's worker threads, so a SQLite write waiting for its lock or a journal fsync
+never stalls the other connections of a worker. The store comes from
+booking_core.open_default_store(). Point BOOKING_DB at the same file as the
+Streamlit page so both share one ledger (the in-memory store is per process).
+
+Endpoints (dates are YYYY-MM-DD):
+    GET  /availability?service=...&start=...&end=...  -> {"available", "full_days"}
+    POST /availability/batch  {"queries": [{"service", "start", "end"}, ...]}
+         -> {"results": [{"available", "full_day_count"} or {"error"}, ...]}
+    GET  /quote?service=...&start=...&end=...         -> {"num_days", "cost", "currency"}
+    POST /book  {"bookings": [{"service", "start", "end"}, ...]}
+         -> 201 {"bookings": [{"booking_id", ...}, ...], "total_cost"} or 409 {"errors": [...]}
+    GET  /booking?id=...                              -> {"booking_id", "service", "start", "end", "num_days", "cost", "status"}
+    POST /cancel  {"booking_id"}                      -> 200 {booking} or 404/409 {"error"}
+    POST /reschedule  {"booking_id", "start", "end"}  -> 200 {booking} or 404/409 {"error"}
+    POST /waitlist  {"service", "start", "end"}       -> 201 {entry} or 409 {"error"} if the range has no full day
+    GET  /waitlist/entry?id=...                       -> {"entry_id", "service", "start", "end", ..., "status", "booking_id"}
+    POST /waitlist/withdraw  {"entry_id"}             -> 200 {entry} or 404/409 {"error"}
+
+A range must start tomorrow or later, end within booking_core.BOOKING_HORIZON_DAYS of today
+and span at most booking_core.MAX_RANGE_DAYS days; anything else is a 400.
+
+Seats freed by cancellations, reschedules and released or expired holds go to waiting
+entries first. With SQLite the waitlist is kept in the database and promoted in the same
+transaction that frees the seats, so every worker shares it; the journal-file store keeps
+none (the /waitlist endpoints answer 409 then). Closure days (the BOOKING_HOLIDAYS file, see
+closures.py) are never quoted, charged or reported full.
+"""
+import asyncio
+import datetime
+import json
+import threading
+from urllib.parse import parse_qs
+
+import booking_core
+
+# Largest request body accepted by POST endpoints
+MAX_BODY_BYTES = 256 * 1024
+# Most queries accepted by one /availability/batch call
+MAX_BATCH_QUERIES = 1000
+
+_store = None
+_waitlist = None
+# Handlers run on several threads: the store and the waitlist are opened once, under this lock
+_open_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    with _open_lock:
+        if _store is None:
+            _store = booking_core.open_default_store()
+    return _store
+
+
+def get_waitlist():
+    """The store's waitlist; ApiError if the store can't keep one (see booking_core.open_waitlist)."""
+    global _waitlist
+    store = get_store()
+    with _open_lock:
+        if _waitlist is None:
+            _waitlist = booking_core.open_waitlist(store)
+    if _waitlist is None:
+        raise ApiError(409, booking_core.WAITLIST_UNAVAILABLE)
+    return _waitlist
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+# --- Request parsing ---
+def _parse_date(value, field):
+    try:
+        return datetime.date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ApiError(400, f"'{field}' must be a date in YYYY-MM-DD format.")
+
+
+def _parse_range(fields):
+    """Reads service/start/end from a dict of strings and validates them like the Streamlit form."""
+    service_name = fields.get("service")
+    if not isinstance(service_name, str) or service_name not in booking_core.PRICES:
+        raise ApiError(400, f"'service' must be one of: {', '.join(booking_core.SERVICE_NAMES)}.")
+    date_range = (_parse_date(fields.get("start"), "start"), _parse_date(fields.get("end"), "end"))
+    error = booking_core.validate_range(service_name, date_range)
+    if error:
+        raise ApiError(400, error)
+    if date_range[0] < booking_core.earliest_start_date():
+        raise ApiError(400, f"'start' must be on or after {booking_core.earliest_start_date().isoformat()}.")
+    return service_name, date_range[0], date_range[1]
+
+
+def _parse_json(body):
+    try:
+        return json.loads(body or b"{}")
+    except ValueError:
+        raise ApiError(400, "Request body must be JSON.")
+
+
+def _query_fields(scope):
+    return {key: values[-1] for key, values in parse_qs(scope["query_string"].decode("latin-1")).items()}
+
+
+# --- Handlers ---
+def availability(scope, body):
+    service_name, start_date, end_date = _parse_range(_query_fields(scope))
+    full_days = get_store().check_range(service_name, start_date, end_date)
+    return 200, {
+        "service": service_name,
+        "start": start_date.isoformat(),
+        "end": end_date.isoformat(),
+        "available": not full_days,
+        "full_days": [day.isoformat() for day in full_days],
+    }
+
+
+def availability_batch(scope, body):
+    payload = _parse_json(body)
+    requested = payload.get("queries") if isinstance(payload, dict) else None
+    if not isinstance(requested, list) or not requested:
+        raise ApiError(400, "'queries' must be a non-empty list of {service, start, end}.")
+    if len(requested) > MAX_BATCH_QUERIES:
+        raise ApiError(400, f"At most {MAX_BATCH_QUERIES} queries per request.")
+
+    # Invalid queries get their own error entry instead of failing the whole batch
+    results = [None] * len(requested)
+    valid_positions, valid_queries = [], []
+    for position, entry in enumerate(requested):
+        try:
+            if not isinstance(entry, dict):
+                raise ApiError(400, "Each query must be an object with service, start and end.")
+            valid_queries.append(_parse_range(entry))
+            valid_positions.append(position)
+        except ApiError as e:
+            results[position] = {"error": e.message}
+    for position, result in zip(valid_positions, booking_core.check_availability_batch(get_store(), valid_queries)):
+        results[position] = result
+    return 200, {"results": results}
+
+
+def quote(scope, body):
+    service_name, start_date, end_date = _parse_range(_query_fields(scope))
+    num_days, cost = booking_core.quote_service(service_name, start_date, end_date)
+    return 200, {
+        "service": service_name,
+        "start": start_date.isoformat(),
+        "end": end_date.isoformat(),
+        "num_days": num_days,
+        "cost": cost,
+        "currency": booking_core.CURRENCY_SYMBOL,
+    }
+
+
+def book(scope, body):
+    payload = _parse_json(body)
+    requested = payload.get("bookings") if isinstance(payload, dict) else None
+    if not isinstance(requested, list) or not requested:
+        raise ApiError(400, "'bookings' must be a non-empty list of {service, start, end}.")
+
+    selections = {}
+    for entry in requested:
+        if not isinstance(entry, dict):
+            raise ApiError(400, "Each booking must be an object with service, start and end.")
+        service_name, start_date, end_date = _parse_range(entry)
+        if service_name in selections:
+            raise ApiError(400, f"{service_name} is listed more than once.")
+        selections[service_name] = (start_date, end_date)
+
+    store = get_store()
+    details, hold_ids, errors = booking_core.check_and_reserve(store, selections)
+    if errors:
+        return 409, {"errors": errors}
+    if not booking_core.confirm_booking(store, hold_ids):
+        return 409, {"errors": ["Reservation expired before it could be committed. Please retry."]}
+    return 201, {
+        "bookings": [
+            {
+                "booking_id": hold_ids[service_name],
+                "service": service_name,
+                "start": service_details["start"].isoformat(),
+                "end": service_details["end"].isoformat(),
+                "num_days": service_details["num_days"],
+                "cost": service_details["cost"],
+            }
+            for service_name, service_details in details.items()
+        ],
+        "total_cost": booking_core.total_cost(details),
+        "currency": booking_core.CURRENCY_SYMBOL,
+    }
+
+
+def _booking_json(record):
+    return dict(record, start=record["start"].isoformat(), end=record["end"].isoformat())
+
+
+def _existing_booking(booking_id, field="booking_id"):
+    if not isinstance(booking_id, str) or not booking_id:
+        raise ApiError(400, f"'{field}' is required.")
+    record = get_store().get_booking(booking_id)
+    if record is None:
+        raise ApiError(404, "No booking with this id.")
+    return record
+
+
+def booking(scope, body):
+    return 200, _booking_json(_existing_booking(_query_fields(scope).get("id"), "id"))
+
+
+def cancel(scope, body):
+    payload = _parse_json(body)
+    booking_id = payload.get("booking_id") if isinstance(payload, dict) else None
+    _existing_booking(booking_id)
+    error = booking_core.cancel_booking(get_store(), booking_id)
+    if error:
+        raise ApiError(409, error)
+    return 200, _booking_json(get_store().get_booking(booking_id))
+
+
+def reschedule(scope, body):
+    payload = _parse_json(body)
+    if not isinstance(payload, dict):
+        raise ApiError(400, "Request body must be an object with booking_id, start and end.")
+    record = _existing_booking(payload.get("booking_id"))
+    _, start_date, end_date = _parse_range(dict(payload, service=record["service"]))
+    error = booking_core.reschedule_booking(get_store(), record["booking_id"], (start_date, end_date))
+    if error:
+        raise ApiError(409, error)
+    return 200, _booking_json(get_store().get_booking(record["booking_id"]))
+
+
+def _existing_entry(entry_id, field="entry_id"):
+    if not isinstance(entry_id, str) or not entry_id:
+        raise ApiError(400, f"'{field}' is required.")
+    entry = get_waitlist().get(entry_id)
+    if entry is None:
+        raise ApiError(404, "No waitlist entry with this id.")
+    return entry
+
+
+def join_waitlist(scope, body):
+    payload = _parse_json(body)
+    if not isinstance(payload, dict):
+        raise ApiError(400, "Request body must be an object with service, start and end.")
+    service_name, start_date, end_date = _parse_range(payload)
+    entry_id, error = booking_core.join_waitlist(get_store(), get_waitlist(), service_name, (start_date, end_date))
+    if error:
+        raise ApiError(409, error)
+    return 201, _booking_json(get_waitlist().get(entry_id))
+
+
+def waitlist_entry(scope, body):
+    return 200, _booking_json(_existing_entry(_query_fields(scope).get("id"), "id"))
+
+
+def withdraw(scope, body):
+    payload = _parse_json(body)
+    entry_id = payload.get("entry_id") if isinstance(payload, dict) else None
+    _existing_entry(entry_id)
+    if not get_waitlist().withdraw(entry_id):
+        raise ApiError(409, "This waitlist entry is no longer waiting.")
+    return 200, _booking_json(get_waitlist().get(entry_id))
+
+
+ROUTES = {
+    "/availability": ("GET", availability),
+    "/availability/batch": ("POST", availability_batch),
+    "/quote": ("GET", quote),
+    "/book": ("POST", book),
+    "/booking": ("GET", booking),
+    "/cancel": ("POST", cancel),
+    "/reschedule": ("POST", reschedule),
+    "/waitlist": ("POST", join_waitlist),
+    "/waitlist/entry": ("GET", waitlist_entry),
+    "/waitlist/withdraw": ("POST", withdraw),
+}
+
+
+# --- ASGI plumbing ---
+async def _read_body(receive):
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            raise ApiError(413, "Request body too large.")
+        chunks.append(chunk)
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+async def _send_json(send, status, payload):
+    body = json.dumps(payload).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                get_store()  # open the store once, before the first request
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+    if scope["type"] != "http":
+        return
+
+    try:
+        route = ROUTES.get(scope["path"])
+        if route is None:
+            raise ApiError(404, "Not found.")
+        method, handler = route
+        if scope["method"] != method:
+            raise ApiError(405, f"Use {method} for {scope['path']}.")
+        body = await _read_body(receive) if method == "POST" else b""
+        status, payload = await asyncio.to_thread(handler, scope, body)
+    except ApiError as e:
+        status, payload = e.status, {"error": e.message}
+    await _send_json(send, status, payload)
+
+
+if __name__ == "__main__":
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("Serving the API needs an ASGI server: pip install uvicorn")
+    uvicorn.run("api:app", host="127.0.0.1", port=8000)
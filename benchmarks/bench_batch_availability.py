@@ -0,0 +1,57 @@
+"""
+Batch availability (count_full_days) against one check_range call per query.
+
+Run from the repo root:  python benchmarks/bench_batch_availability.py
+"""
+import datetime
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from ledger import CapacityLedger
+
+SERVICE_NAMES = ["Elder Day Care", "Child Day Care"]
+MAX_CAPACITY = 25
+BATCH_SIZES = [10, 100, 1000]
+
+
+def filled_ledger(rng):
+    ledger = CapacityLedger(MAX_CAPACITY, SERVICE_NAMES)
+    today = datetime.date.today()
+    for _ in range(20000):
+        start = today + datetime.timedelta(days=rng.randint(1, 700))
+        try:
+            hold_id = ledger.reserve_range(rng.choice(SERVICE_NAMES), start, start + datetime.timedelta(days=rng.randint(0, 30)))
+        except ValueError:
+            continue
+        if hold_id is not None:
+            ledger.commit(hold_id)
+    return ledger
+
+
+def random_queries(rng, count):
+    today = datetime.date.today()
+    queries = []
+    for _ in range(count):
+        start = today + datetime.timedelta(days=rng.randint(1, 700))
+        queries.append((rng.choice(SERVICE_NAMES), start, start + datetime.timedelta(days=rng.randint(0, 60))))
+    return queries
+
+
+def main():
+    rng = random.Random(0)
+    ledger = filled_ledger(rng)
+    print(f"{'queries':>7} | {'one by one ms':>13} | {'batch ms':>8}")
+    for size in BATCH_SIZES:
+        queries = random_queries(rng, size)
+        assert ledger.count_full_days(queries) == [len(ledger.check_range(*query)) for query in queries]
+        loop = min(timeit.repeat(lambda: [ledger.check_range(*query) for query in queries], number=5, repeat=3)) / 5
+        batch = min(timeit.repeat(lambda: ledger.count_full_days(queries), number=5, repeat=3)) / 5
+        print(f"{size:>7} | {loop * 1e3:>13.2f} | {batch * 1e3:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Throughput of every BookingStore backend on mixed book / cancel / reschedule traffic.
+
+Run from the repo root:  python benchmarks/bench_changes.py [operations_per_thread]
+About a fifth of the operations are changes to earlier bookings, split evenly between
+cancellations and reschedules; the rest are reserve+commit bookings over random 1-20 day
+ranges in a two-year horizon. After each run the occupancy is checked against the
+confirmed booking records.
+"""
+import datetime
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from booking_store import BOOKING_CONFIRMED, STORE_BACKENDS, open_store
+
+SERVICE_NAMES = ["Elder Day Care", "Child Day Care"]
+MAX_CAPACITY = 25
+HORIZON_DAYS = 730
+THREAD_COUNTS = [1, 4, 16]
+# Share of operations per kind; the rest are reserve+commit bookings
+CANCEL_SHARE = 0.1
+RESCHEDULE_SHARE = 0.1
+
+
+def random_range(rng):
+    start = datetime.date.today() + datetime.timedelta(days=rng.randint(1, HORIZON_DAYS))
+    return start, start + datetime.timedelta(days=rng.randint(0, 19))
+
+
+def replay(store, operations, seed, results):
+    rng = random.Random(seed)
+    booking_ids = []
+    done = {"book": 0, "cancel": 0, "reschedule": 0}
+    for _ in range(operations):
+        roll = rng.random()
+        if booking_ids and roll < CANCEL_SHARE:
+            if store.cancel(booking_ids.pop(rng.randrange(len(booking_ids)))):
+                done["cancel"] += 1
+            continue
+        start, end = random_range(rng)
+        try:
+            if booking_ids and roll < CANCEL_SHARE + RESCHEDULE_SHARE:
+                if store.reschedule(rng.choice(booking_ids), start, end):
+                    done["reschedule"] += 1
+                continue
+            hold_id = store.reserve_range(rng.choice(SERVICE_NAMES), start, end)
+        except ValueError:  # weekend-only range
+            continue
+        if hold_id is not None and store.commit(hold_id):
+            booking_ids.append(hold_id)
+            done["book"] += 1
+    results.append(done)
+
+
+def check_consistency(store):
+    """Occupancy must equal the weekdays of the confirmed bookings, service by service."""
+    booked = {name: 0 for name in SERVICE_NAMES}
+    for chunk in store.iter_bookings():
+        for booking in chunk:
+            if booking["status"] == BOOKING_CONFIRMED:
+                booked[booking["service"]] += booking["num_days"]
+    counted = {name: 0 for name in SERVICE_NAMES}
+    for chunk in store.iter_occupancy():
+        for _, service_name, count in chunk:
+            counted[service_name] += count
+    assert booked == counted, (booked, counted)
+
+
+def run(store, threads, operations):
+    results = []
+    workers = [threading.Thread(target=replay, args=(store, operations, seed, results)) for seed in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    check_consistency(store)
+    totals = {kind: sum(done[kind] for done in results) for kind in ("book", "cancel", "reschedule")}
+    return threads * operations / elapsed, totals
+
+
+def main():
+    operations = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    print(f"{'store':>8} | {'threads':>7} | {'ops/s':>9} | {'booked':>6} | {'cancelled':>9} | {'moved':>6}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for threads in THREAD_COUNTS:
+            for backend in STORE_BACKENDS:
+                store = open_store(backend, MAX_CAPACITY, SERVICE_NAMES, path=os.path.join(tmp, f"{backend}-{threads}"))
+                rate, totals = run(store, threads, operations)
+                print(
+                    f"{backend:>8} | {threads:>7} | {rate:>9,.0f} | {totals['book']:>6} | "
+                    f"{totals['cancel']:>9} | {totals['reschedule']:>6}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Memory and range-check cost of the occupancy stores over a two-year horizon.
+
+Run from the repo root:  python benchmarks/bench_occupancy.py
+"baseline" is the original st.session_state.daily_bookings structure
+(defaultdict of defaultdict(int) keyed by "%Y-%m-%d" strings).
+"""
+import datetime
+import os
+import random
+import sys
+import timeit
+import tracemalloc
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from occupancy import OccupancyMatrix
+from segment_tree import SegmentTreeIndex
+from weekdays import iter_weekdays, weekday_index_range
+
+SERVICE_NAMES = ["Elder Day Care", "Child Day Care"]
+MAX_CAPACITY = 25
+START = datetime.date(2025, 1, 1)
+END = START + datetime.timedelta(days=729)
+CHECK_RANGES_DAYS = [5, 30, 90, 365]
+
+
+def build_baseline(days):
+    bookings = defaultdict(lambda: defaultdict(int))
+    for dt in days:
+        for name in SERVICE_NAMES:
+            bookings[dt.strftime("%Y-%m-%d")][name] = random.randint(1, MAX_CAPACITY - 1)
+    return bookings
+
+
+def build_index(index_class, days):
+    lo, hi = weekday_index_range(START, END)
+    index = index_class(lo, hi - lo + 1, len(SERVICE_NAMES))
+    for offset in range(len(days)):
+        for col in range(len(SERVICE_NAMES)):
+            index.add(col, lo + offset, lo + offset, random.randint(1, MAX_CAPACITY - 1))
+    return index
+
+
+def measure(build):
+    tracemalloc.start()
+    obj = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, size
+
+
+def baseline_check(bookings, start, end):
+    for dt in iter_weekdays(start, end):
+        if bookings[dt.strftime("%Y-%m-%d")][SERVICE_NAMES[0]] >= MAX_CAPACITY:
+            return False
+    return True
+
+
+def main():
+    days = list(iter_weekdays(START, END))
+    print(f"Horizon: {START} to {END} ({len(days)} weekdays x {len(SERVICE_NAMES)} services)\n")
+
+    random.seed(0)
+    baseline, baseline_bytes = measure(lambda: build_baseline(days))
+    random.seed(0)
+    matrix, matrix_bytes = measure(lambda: build_index(OccupancyMatrix, days))
+    random.seed(0)
+    tree, tree_bytes = measure(lambda: build_index(SegmentTreeIndex, days))
+
+    print(f"{'store':>19} | {'bytes':>10}")
+    for name, size in [("dict of defaultdict", baseline_bytes), ("OccupancyMatrix", matrix_bytes),
+                       ("SegmentTreeIndex", tree_bytes)]:
+        print(f"{name:>19} | {size:>10,}")
+
+    print(f"\n{'range (days)':>12} | {'baseline us':>11} | {'matrix us':>9} | {'tree us':>7}")
+    for length in CHECK_RANGES_DAYS:
+        start = START + datetime.timedelta(days=100)
+        end = start + datetime.timedelta(days=length - 1)
+        lo, hi = weekday_index_range(start, end)
+        results = []
+        for func in (lambda: baseline_check(baseline, start, end),
+                     lambda: matrix.max(0, lo, hi) < MAX_CAPACITY,
+                     lambda: tree.max(0, lo, hi) < MAX_CAPACITY):
+            results.append(min(timeit.repeat(func, number=200, repeat=5)) / 200 * 1e6)
+        print(f"{length:>12} | {results[0]:>11.1f} | {results[1]:>9.1f} | {results[2]:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
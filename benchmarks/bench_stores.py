@@ -0,0 +1,87 @@
+"""
+Throughput of every BookingStore backend on the same generated workload.
+
+Run from the repo root:  python benchmarks/bench_stores.py [operations_per_thread]
+The workload mixes availability checks with reserve+commit bookings and the
+occasional abandoned reservation, over random 1-20 day ranges in a two-year horizon.
+"""
+import datetime
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from booking_store import STORE_BACKENDS, open_store
+
+SERVICE_NAMES = ["Elder Day Care", "Child Day Care"]
+MAX_CAPACITY = 25
+HORIZON_DAYS = 730
+THREAD_COUNTS = [1, 4, 16]
+# Share of operations per kind; the rest are reserve+commit bookings
+CHECK_SHARE = 0.6
+ABANDON_SHARE = 0.1
+
+
+def generate_workload(operations, seed):
+    """Returns a list of (kind, service_name, start_date, end_date) with kind in check/book/abandon."""
+    rng = random.Random(seed)
+    today = datetime.date.today()
+    workload = []
+    for _ in range(operations):
+        start = today + datetime.timedelta(days=rng.randint(1, HORIZON_DAYS))
+        end = start + datetime.timedelta(days=rng.randint(0, 19))
+        roll = rng.random()
+        kind = "check" if roll < CHECK_SHARE else "abandon" if roll < CHECK_SHARE + ABANDON_SHARE else "book"
+        workload.append((kind, rng.choice(SERVICE_NAMES), start, end))
+    return workload
+
+
+def replay(store, workload, results):
+    booked = 0
+    for kind, service_name, start, end in workload:
+        if kind == "check":
+            store.check_range(service_name, start, end)
+            continue
+        try:
+            hold_id = store.reserve_range(service_name, start, end)
+        except ValueError:  # weekend-only range
+            continue
+        if hold_id is None:
+            continue
+        if kind == "abandon":
+            store.release(hold_id)
+        elif store.commit(hold_id):
+            booked += 1
+    results.append(booked)
+
+
+def run(store, threads, operations):
+    workloads = [generate_workload(operations, seed) for seed in range(threads)]
+    results = []
+    workers = [threading.Thread(target=replay, args=(store, workload, results)) for workload in workloads]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    return threads * operations / elapsed, sum(results)
+
+
+def main():
+    operations = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    print(f"{'store':>8} | {'threads':>7} | {'ops/s':>9} | {'booked':>6}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for threads in THREAD_COUNTS:
+            for backend in STORE_BACKENDS:
+                store = open_store(backend, MAX_CAPACITY, SERVICE_NAMES, path=os.path.join(tmp, f"{backend}-{threads}"))
+                rate, booked = run(store, threads, operations)
+                print(f"{backend:>8} | {threads:>7} | {rate:>9,.0f} | {booked:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Cost of a waitlist promotion pass with thousands of requests waiting.
+
+Run from the repo root:  python benchmarks/bench_waitlist.py
+Both services are booked to capacity over a twelve-week window, then N random 1-10 day
+requests join the waitlist. Every full-window booking is cancelled in turn, which
+promotes into the freed window: the cancellation with the heap-merge pass of
+waitlist.Waitlist (run by the in-memory store as it frees the seats) and with the
+SQLite store's pass (run inside the cancelling transaction) is timed against the
+cancellation plus a naive pass that tries every waiting request in order, and all three
+must promote the same requests.
+"""
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from booking_store import open_store
+from waitlist import WAITLIST_WAITING
+
+SERVICE_NAMES = ["Elder Day Care", "Child Day Care"]
+MAX_CAPACITY = 25
+WINDOW_DAYS = 84
+WAITING_COUNTS = [1000, 10000, 50000]
+STRATEGIES = ("heap", "sqlite", "naive")
+
+
+def window_start():
+    today = datetime.date.today()
+    return today + datetime.timedelta(days=7 - today.weekday())  # next Monday
+
+
+def fill(store, start, end):
+    """Books every seat of the window with whole-window bookings; returns their ids."""
+    booking_ids = []
+    for service_name in SERVICE_NAMES:
+        for _ in range(MAX_CAPACITY):
+            hold_id = store.reserve_range(service_name, start, end)
+            store.commit(hold_id)
+            booking_ids.append((service_name, hold_id))
+    return booking_ids
+
+
+def waiting_requests(count, start, seed=0):
+    rng = random.Random(seed)
+    requests = []
+    while len(requests) < count:
+        first = start + datetime.timedelta(days=rng.randrange(WINDOW_DAYS - 10))
+        last = first + datetime.timedelta(days=rng.randint(0, 9))
+        if first.weekday() < 5:
+            requests.append((rng.choice(SERVICE_NAMES), first, last))
+    return requests
+
+
+def naive_promote(store, waiting):
+    """Tries every waiting (position, service, start, end) in request order; returns the positions booked."""
+    promoted = []
+    for position, (service_name, first, last) in list(waiting.items()):
+        hold_id = store.reserve_range(service_name, first, last)
+        if hold_id is not None:
+            store.commit(hold_id)
+            promoted.append(position)
+            del waiting[position]
+    return promoted
+
+
+def run(count, directory):
+    start = window_start()
+    end = start + datetime.timedelta(days=WINDOW_DAYS - 1)
+    requests = waiting_requests(count, start)
+    timings = {}
+    promoted = {}
+    for strategy in STRATEGIES:
+        if strategy == "sqlite":
+            store = open_store("sqlite", MAX_CAPACITY, SERVICE_NAMES, path=os.path.join(directory, f"waitlist-{count}.db"))
+        else:
+            store = open_store("memory", MAX_CAPACITY, SERVICE_NAMES)
+        booking_ids = fill(store, start, end)
+        if strategy != "naive":
+            waitlist = store.open_waitlist()
+            entry_ids = [waitlist.add(service_name, first, last, 0, 0) for service_name, first, last in requests]
+            waiting = set(range(count))
+        else:
+            waiting = dict(enumerate(requests))
+        order = []
+        elapsed = 0.0
+        for _, booking_id in booking_ids:
+            started = time.perf_counter()
+            store.cancel(booking_id)
+            if strategy == "naive":
+                order += naive_promote(store, waiting)
+            elapsed += time.perf_counter() - started
+            if strategy != "naive":
+                # The pass books in request order; read back which entries it took
+                booked = sorted(position for position in waiting if waitlist.get(entry_ids[position])["status"] != WAITLIST_WAITING)
+                waiting.difference_update(booked)
+                order += booked
+        timings[strategy] = elapsed / len(booking_ids) * 1e3
+        promoted[strategy] = order
+        if strategy != "naive":
+            assert len(waitlist) == count - len(order)
+    assert promoted["heap"] == promoted["sqlite"] == promoted["naive"]
+    return timings, len(promoted["heap"])
+
+
+def main():
+    print(f"{'waiting':>7} | {'promoted':>8} | {'heap ms/cancel':>14} | {'sqlite ms/cancel':>16} | {'naive ms/cancel':>15}")
+    with tempfile.TemporaryDirectory() as directory:
+        for count in WAITING_COUNTS:
+            timings, promoted = run(count, directory)
+            print(
+                f"{count:>7} | {promoted:>8} | {timings['heap']:>14.2f} | {timings['sqlite']:>16.2f} | {timings['naive']:>15.2f}"
+            )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Compares weekday enumeration strategies for 1-day to multi-year ranges.
+
+Run from the repo root:  python benchmarks/bench_weekdays.py
+The pandas baseline is the original get_weekdays_in_range body and is skipped if pandas isn't installed.
+The second table counts weekdays with closures left out: binary search in the sorted
+closure array (count_weekdays) against a membership test per day.
+"""
+import datetime
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from weekdays import (
+    cached_weekday_ordinals,
+    count_weekdays,
+    iter_weekdays,
+    ordinals_to_dates,
+    set_closures,
+    weekday_ordinals,
+)
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+START = datetime.date(2025, 1, 1)
+RANGE_DAYS = [1, 7, 31, 365, 730, 1825]
+CLOSURE_COUNTS = [0, 100, 10000]
+
+
+def pandas_weekdays(start_date, end_date):
+    all_dates = pd.date_range(start=start_date, end=end_date, freq='D')
+    weekdays_only = all_dates[all_dates.weekday < 5]
+    return [dt.date() for dt in weekdays_only.to_pydatetime().tolist()]
+
+
+def best_of(func, number):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def per_day_count(start_date, end_date, closed):
+    return sum(
+        1 for ordinal in range(start_date.toordinal(), end_date.toordinal() + 1)
+        if (ordinal - 1) % 7 < 5 and ordinal not in closed
+    )
+
+
+def closures_table():
+    print("\n" + " | ".join(f"{c:>15}" for c in ["days", "closures", "binary search", "per-day test"]) + "   (microseconds per call)")
+    rng = random.Random(0)
+    for count in CLOSURE_COUNTS:
+        closed = {START.toordinal() + rng.randrange(-20000, 20000) for _ in range(count)}
+        set_closures(closed)
+        for days in (31, 365, 1825):
+            end = START + datetime.timedelta(days=days - 1)
+            assert count_weekdays(START, end) == per_day_count(START, end, closed)
+            number = max(10, 20000 // days)
+            print(" | ".join([
+                f"{days:>15}",
+                f"{count:>15}",
+                f"{best_of(lambda: count_weekdays(START, end), number):>15.1f}",
+                f"{best_of(lambda: per_day_count(START, end, closed), number):>15.1f}",
+            ]))
+    set_closures([])
+
+
+def main():
+    columns = ["days", "pandas list", "ordinals", "cached ordinals", "ordinals->dates", "lazy dates"]
+    print(" | ".join(f"{c:>15}" for c in columns) + "   (microseconds per call)")
+    for days in RANGE_DAYS:
+        end = START + datetime.timedelta(days=days - 1)
+        number = max(10, 20000 // days)
+        expected = list(iter_weekdays(START, end))
+        assert ordinals_to_dates(weekday_ordinals(START, end)) == expected
+
+        row = [f"{days:>15}"]
+        if pd is not None:
+            assert pandas_weekdays(START, end) == expected
+            row.append(f"{best_of(lambda: pandas_weekdays(START, end), number):>15.1f}")
+        else:
+            row.append(f"{'n/a':>15}")
+        row.append(f"{best_of(lambda: weekday_ordinals(START, end), number):>15.1f}")
+        # Repeated checks of one range, as when users re-click on the same dates
+        row.append(f"{best_of(lambda: cached_weekday_ordinals(START, end), number):>15.1f}")
+        row.append(f"{best_of(lambda: ordinals_to_dates(weekday_ordinals(START, end)), number):>15.1f}")
+        row.append(f"{best_of(lambda: list(iter_weekdays(START, end)), number):>15.1f}")
+        print(" | ".join(row))
+    closures_table()
+
+
+if __name__ == "__main__":
+    main()
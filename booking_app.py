@@ -1,44 +1,30 @@
 import streamlit as st
+import altair as alt
 import datetime
-import pandas as pd
-from collections import defaultdict
+import booking_core
+from booking_core import CURRENCY_SYMBOL
+from waitlist import WAITLIST_PROMOTED, WAITLIST_WAITING
 
-# --- Configuration ---
-PRICES = {
-    "Elder Day Care": 800,
-    "Child Day Care": 600
-}
-SERVICE_NAMES = list(PRICES.keys())
-CURRENCY_SYMBOL = "Rs."
-MAX_CAPACITY = 25  # Per service, per day
+# --- Shared Capacity Ledger ---
+# One ledger for the whole server process, so each day's capacity is enforced across all sessions.
+# The backend is picked from the environment, see booking_core.open_default_store.
+@st.cache_resource
+def get_ledger():
+    return booking_core.open_default_store()
 
-# --- Helper Function: Get Weekdays in a Date Range ---
-def get_weekdays_in_range(start_date, end_date):
-    """
-    Generates a list of weekdays (Mon-Fri) between start_date and end_date (inclusive).
-    Returns an empty list if range is invalid or contains no weekdays.
-    """
-    weekdays_list = []
-    # Ensure dates are valid date objects before proceeding
-    if isinstance(start_date, datetime.date) and isinstance(end_date, datetime.date) and start_date <= end_date:
-        try:
-            # Use pandas for easy date range generation and weekday filtering
-            all_dates = pd.date_range(start=start_date, end=end_date, freq='D')
-            # pandas weekday: Monday=0, Sunday=6
-            weekdays_only = all_dates[all_dates.weekday < 5] # Keep Monday (0) to Friday (4)
-            weekdays_list = weekdays_only.to_pydatetime().tolist() # Convert back to list of datetime objects
-            # Convert datetime.datetime back to datetime.date
-            weekdays_list = [dt.date() for dt in weekdays_list]
-        except Exception as e:
-            st.error(f"Error generating date range: {e}")
-            return []
-    return weekdays_list
+ledger = get_ledger()
+
+# Waitlist for full days, shared the same way; the ledger promotes from it whenever seats free up.
+# None with the journal-file ledger (see booking_core.open_waitlist): no waitlist is offered then.
+@st.cache_resource
+def get_waitlist():
+    return booking_core.open_waitlist(get_ledger())
+
+waitlist = get_waitlist()
 
 # --- Initialize Session State ---
 # Use session_state to preserve data across Streamlit script reruns.
 
-if 'daily_bookings' not in st.session_state:
-    st.session_state.daily_bookings = defaultdict(lambda: defaultdict(int))
 if 'booking_details' not in st.session_state:
     st.session_state.booking_details = {}
 if 'total_cost' not in st.session_state:
@@ -49,6 +35,10 @@ if 'is_available' not in st.session_state:
     st.session_state.is_available = False
 if 'payment_status' not in st.session_state:
     st.session_state.payment_status = None
+if 'hold_ids' not in st.session_state:
+    st.session_state.hold_ids = {} # service_name -> hold_id of seats reserved in the shared ledger
+if 'waitlist_offers' not in st.session_state:
+    st.session_state.waitlist_offers = {} # service_name -> date range of a failed check that hit full days
 
 
 # --- App Layout ---
@@ -68,10 +58,18 @@ with st.sidebar:
         elder_date_range = st.date_input(
             "Select Elder Day Care Date Range:",
             value=[], # Use empty list for default empty range
-            min_value=datetime.date.today() + datetime.timedelta(days=1),
+            min_value=booking_core.earliest_start_date(),
+            max_value=booking_core.latest_end_date(),
             format="YYYY-MM-DD",
             key="dr_elder"
         )
+        # Flag full days before the user submits (reads only the picked/upcoming window of the ledger)
+        full_hint = booking_core.full_days_hint(ledger, "Elder Day Care", elder_date_range)
+        if full_hint:
+            st.warning(full_hint, icon="⚠️")
+        closed_hint = booking_core.closures_hint(elder_date_range)
+        if closed_hint:
+            st.info(closed_hint, icon="📅")
 
     st.markdown("---")
     select_child = st.checkbox("Book Child Day Care?", key="cb_child", value=st.session_state.get('cb_child', True)) # Default checked & persist
@@ -81,10 +79,17 @@ with st.sidebar:
         child_date_range = st.date_input(
             "Select Child Day Care Date Range:",
             value=[], # Use empty list for default empty range
-            min_value=datetime.date.today() + datetime.timedelta(days=1),
+            min_value=booking_core.earliest_start_date(),
+            max_value=booking_core.latest_end_date(),
             format="YYYY-MM-DD",
             key="dr_child"
         )
+        full_hint = booking_core.full_days_hint(ledger, "Child Day Care", child_date_range)
+        if full_hint:
+            st.warning(full_hint, icon="⚠️")
+        closed_hint = booking_core.closures_hint(child_date_range)
+        if closed_hint:
+            st.info(closed_hint, icon="📅")
 
     st.markdown("---")
 
@@ -102,136 +107,101 @@ st.markdown("---")
 payment_placeholder = st.empty()
 
 # Expander for demo bookings
-with st.expander("Show Current Simulated Bookings (Demo)"):
-    display_bookings = {date: dict(counts) for date, counts in st.session_state.daily_bookings.items()}
-    if not display_bookings:
-        st.write("No bookings recorded yet.")
-    else:
-        sorted_dates = sorted(display_bookings.keys())
-        sorted_display_bookings = {date: display_bookings[date] for date in sorted_dates}
-        st.json(sorted_display_bookings)
+# on_change="rerun" tracks whether it is open, so the table is only built while someone looks at it
+bookings_expander = st.expander("Show Current Simulated Bookings (Demo)", key="exp_bookings", on_change="rerun")
+with bookings_expander:
+    if bookings_expander.open:
+        view_col, size_col, page_col = st.columns([2, 1, 1])
+        view_range = view_col.date_input(
+            "Dates:",
+            value=(datetime.date.today(), datetime.date.today() + datetime.timedelta(days=90)),
+            format="YYYY-MM-DD",
+            key="view_range"
+        )
+        page_size = size_col.selectbox("Days per page:", [10, 25, 50, 100], index=1, key="view_page_size")
+        page_count = booking_core.occupancy_page_count(*view_range, page_size) if len(view_range) == 2 else 0
+        if len(view_range) != 2:
+            st.write("Select a start and end date.")
+        elif not page_count:
+            st.write("No open weekdays in the selected range.")
+        else:
+            page = page_col.number_input("Page:", min_value=1, max_value=page_count, value=1, key="view_page")
+            # Only the weekdays of the current page are read from the ledger
+            st.dataframe(
+                booking_core.occupancy_page(ledger, view_range[0], view_range[1], page - 1, page_size),
+                hide_index=True,
+                column_config={"Date": st.column_config.DateColumn(format="YYYY-MM-DD (ddd)")},
+            )
+            st.caption(f"Page {page} of {page_count}. Seats booked or held / seats available, per day and service.")
+        quote_cache = booking_core.range_cache_stats()["count_weekdays"]
+        st.caption(f"Range cache (shared by all sessions): {quote_cache['hits']} hits, {quote_cache['misses']} misses, {quote_cache['size']}/{quote_cache['max_size']} ranges.")
+
+# Utilisation heatmap, one cell per weekday and service (also only built while open)
+heatmap_expander = st.expander("Show Occupancy Heatmap", key="exp_heatmap", on_change="rerun")
+with heatmap_expander:
+    if heatmap_expander.open:
+        period_col, month_col = st.columns(2)
+        period = period_col.radio("View:", ["Month", "Quarter"], horizontal=True, key="heatmap_period")
+        period_day = month_col.date_input("Showing the period that contains:", value=datetime.date.today(), format="YYYY-MM-DD", key="heatmap_day")
+        period_start, period_end = booking_core.period_range(period, period_day)
+        ordinals, shares = booking_core.utilisation(ledger, period_start, period_end)
+        records = [
+            {
+                "Date": datetime.date.fromordinal(day).isoformat(),
+                "Service": service_name,
+                "Utilisation": share,
+            }
+            for day, row in zip(ordinals.tolist(), shares.tolist())
+            for service_name, share in zip(ledger.service_names, row)
+        ]
+        heatmap = alt.Chart(alt.Data(values=records)).mark_rect().encode(
+            x=alt.X("utcyearweek(Date):O", title="Week", axis=alt.Axis(format="%d %b")),
+            y=alt.Y("utcday(Date):O", title=None),
+            color=alt.Color("Utilisation:Q", scale=alt.Scale(domain=[0, 1], scheme="orangered"), legend=alt.Legend(format="%")),
+            row=alt.Row("Service:N", title=None),
+            tooltip=[alt.Tooltip("Date:T", format="%Y-%m-%d (%a)"), "Service:N", alt.Tooltip("Utilisation:Q", format=".0%")],
+        )
+        st.altair_chart(heatmap)
+        st.caption(f"{period_start.strftime('%d %b %Y')} to {period_end.strftime('%d %b %Y')}, share of each day's seats booked or held per service.")
 
 # --- Logic for Confirmation Button Click ---
 if confirm_button:
-    # 1. Reset previous attempt state
+    # 1. Reset previous attempt state (its quotes and holds are kept aside for reuse in step 3)
+    previous_details = st.session_state.booking_details
+    previous_hold_ids = st.session_state.hold_ids
     st.session_state.booking_details = {}
     st.session_state.total_cost = 0
     st.session_state.is_available = False
     st.session_state.availability_checked = True
     st.session_state.payment_status = None
+    st.session_state.hold_ids = {}
+    st.session_state.waitlist_offers = {}
 
     # 2. Input Validation
-    processing_errors = []
-    valid_elder_range = False
-    valid_child_range = False
-
-    if not select_elder and not select_child:
-        processing_errors.append("Please select at least one service type.")
-
+    selections = {}
     if select_elder:
-        # st.date_input returns a list/tuple for range, check length
-        if isinstance(elder_date_range, (list, tuple)) and len(elder_date_range) == 2:
-            start_dt, end_dt = elder_date_range
-            if start_dt is None or end_dt is None:
-                 processing_errors.append("Please select BOTH a start and end date for Elder Day Care.")
-            elif start_dt > end_dt:
-                 processing_errors.append("Elder Care: Start date cannot be after end date.")
-            else:
-                 valid_elder_range = True
-        else: # Handle case where it's not a list/tuple or wrong length (e.g., initially [])
-             processing_errors.append("Please select a start and end date for Elder Day Care.")
-
-
+        selections["Elder Day Care"] = elder_date_range
     if select_child:
-        if isinstance(child_date_range, (list, tuple)) and len(child_date_range) == 2:
-            start_dt, end_dt = child_date_range
-            if start_dt is None or end_dt is None:
-                 processing_errors.append("Please select BOTH a start and end date for Child Day Care.")
-            elif start_dt > end_dt:
-                 processing_errors.append("Child Care: Start date cannot be after end date.")
-            else:
-                 valid_child_range = True
-        else:
-             processing_errors.append("Please select a start and end date for Child Day Care.")
-
+        selections["Child Day Care"] = child_date_range
+    processing_errors = booking_core.validate_selection(selections)
 
     if processing_errors:
         availability_placeholder.error("Please fix the following issues:\n\n* " + "\n* ".join(processing_errors))
         st.session_state.availability_checked = False # Validation failed
+        # Give back seats held by a previous check in this session
+        booking_core.release_holds(ledger, previous_hold_ids)
     else:
-        # 3. Process Selections and Check Capacity (Only if ranges were valid)
-        overall_availability = True
-        temp_elder_details = None
-        temp_child_details = None
-        current_booking_counts = st.session_state.daily_bookings
-
-        # --- Process Elder Care ---
-        if select_elder and valid_elder_range: # Ensure range was valid from step 2
-            elder_weekdays = get_weekdays_in_range(elder_date_range[0], elder_date_range[1])
-            overbooked_elder_dates = []
-
-            if not elder_weekdays:
-                processing_errors.append("Elder Care: Selected range contains no weekdays (Mon-Fri).")
-                overall_availability = False
-            else:
-                for dt in elder_weekdays:
-                    # get_weekdays_in_range now returns date objects
-                    date_str = dt.strftime("%Y-%m-%d")
-                    if current_booking_counts[date_str]["Elder Day Care"] >= MAX_CAPACITY:
-                        overbooked_elder_dates.append(dt.strftime("%Y-%m-%d (%a)"))
-                if overbooked_elder_dates:
-                    overall_availability = False
-                    processing_errors.append(f"Elder Care: Capacity limit ({MAX_CAPACITY}) reached on: {', '.join(overbooked_elder_dates)}")
-
-            if overall_availability and elder_weekdays:
-                num_days_elder = len(elder_weekdays)
-                temp_elder_details = {
-                    "dates": elder_weekdays, "num_days": num_days_elder,
-                    "cost": num_days_elder * PRICES["Elder Day Care"]
-                }
-
-        # --- Process Child Care ---
-        if select_child and valid_child_range and overall_availability: # Check overall avail. too
-            child_weekdays = get_weekdays_in_range(child_date_range[0], child_date_range[1])
-            overbooked_child_dates = []
-
-            if not child_weekdays:
-                if not any("Elder Care" in err and "no weekdays" in err for err in processing_errors):
-                     processing_errors.append("Child Care: Selected range contains no weekdays (Mon-Fri).")
-                overall_availability = False
-            else:
-                for dt in child_weekdays:
-                    date_str = dt.strftime("%Y-%m-%d")
-                    if current_booking_counts[date_str]["Child Day Care"] >= MAX_CAPACITY:
-                        overbooked_child_dates.append(dt.strftime("%Y-%m-%d (%a)"))
-                if overbooked_child_dates:
-                    overall_availability = False
-                    processing_errors.append(f"Child Care: Capacity limit ({MAX_CAPACITY}) reached on: {', '.join(overbooked_child_dates)}")
-
-            if overall_availability and child_weekdays:
-                num_days_child = len(child_weekdays)
-                temp_child_details = {
-                    "dates": child_weekdays, "num_days": num_days_child,
-                    "cost": num_days_child * PRICES["Child Day Care"]
-                }
+        # 3. Quote, Check Capacity and Reserve (see booking_core.check_and_reserve)
+        # Services whose dates didn't change since the last check keep their quote and hold
+        booking_details, hold_ids, processing_errors = booking_core.check_and_reserve(
+            ledger, selections, previous_details, previous_hold_ids
+        )
 
         # 4. Finalize Booking State
-        st.session_state.is_available = overall_availability
-
-        if st.session_state.is_available:
-            calculated_total_cost = 0
-            if temp_elder_details:
-                st.session_state.booking_details["Elder Day Care"] = temp_elder_details
-                calculated_total_cost += temp_elder_details["cost"]
-            if temp_child_details:
-                st.session_state.booking_details["Child Day Care"] = temp_child_details
-                calculated_total_cost += temp_child_details["cost"]
-            st.session_state.total_cost = calculated_total_cost
-
-            if st.session_state.total_cost <= 0:
-                st.session_state.is_available = False
-                if not processing_errors:
-                    processing_errors.append("Selected range(s) resulted in zero valid booking days (Mon-Fri).")
+        st.session_state.is_available = not processing_errors
+        st.session_state.booking_details = booking_details
+        st.session_state.hold_ids = hold_ids
+        st.session_state.total_cost = booking_core.total_cost(booking_details)
 
         # 5. Update UI Placeholders based on results
         if not st.session_state.is_available:
@@ -243,51 +213,51 @@ if confirm_button:
 
             summary_placeholder.empty()
             payment_placeholder.empty()
-            st.session_state.booking_details = {}
-            st.session_state.total_cost = 0
+            # Ranges that hit full days can still wait for a seat, if the ledger keeps a waitlist
+            st.session_state.waitlist_offers = {
+                service_name: date_range for service_name, date_range in selections.items()
+                if waitlist is not None and not ledger.is_range_available(service_name, *date_range)
+            }
         else:
             availability_placeholder.success("Dates available! Please review the summary.")
             # Render Summary (in sidebar)
             summary_md = "#### Booking Summary:\n\n"
             for service_name, details in st.session_state.booking_details.items():
-                 dates_str = ", ".join([d.strftime('%Y-%m-%d (%a)') for d in details['dates']])
                  summary_md += f"**{service_name}:**\n"
-                 summary_md += f"- Dates: `{dates_str}`\n"
+                 summary_md += f"- Dates: `{details['start'].strftime('%Y-%m-%d (%a)')}` to `{details['end'].strftime('%Y-%m-%d (%a)')}`\n"
                  summary_md += f"- Weekdays: {details['num_days']}\n"
                  summary_md += f"- Cost: {CURRENCY_SYMBOL} {details['cost']:.2f}\n\n"
             summary_md += f"---\n#### Total Amount Payable: {CURRENCY_SYMBOL} {st.session_state.total_cost:.2f}"
             summary_placeholder.markdown(summary_md)
 
-            # Render Payment Button (in main area)
-            with payment_placeholder.container():
-                st.subheader("Ready to Pay?")
-                st.write(f"**Total Amount:** {CURRENCY_SYMBOL} {st.session_state.total_cost:.2f}")
-
-                # Payment button action
-                if st.button("Proceed to Payment (Simulated)", key="btn_pay"):
-                    # --- PAYMENT API INTEGRATION SIMULATION ---
-                    st.session_state.payment_status = "Success" # Simulate success
-                    st.toast("Simulating successful payment...", icon="✅")
-
-                    # Update simulated daily bookings
-                    booked_services = st.session_state.booking_details
-                    current_bookings = st.session_state.daily_bookings
-                    for service_name, details in booked_services.items():
-                        for dt in details['dates']:
-                            date_str = dt.strftime("%Y-%m-%d")
-                            current_bookings[date_str][service_name] += 1
-                    st.session_state.daily_bookings = current_bookings
+# --- Payment (rendered on every rerun while this session holds seats) ---
+if st.session_state.is_available and st.session_state.hold_ids:
+    with payment_placeholder.container():
+        st.subheader("Ready to Pay?")
+        st.write(f"**Total Amount:** {CURRENCY_SYMBOL} {st.session_state.total_cost:.2f}")
+
+        # Payment button action
+        if st.button("Proceed to Payment (Simulated)", key="btn_pay"):
+            # --- PAYMENT API INTEGRATION SIMULATION ---
+            # Turn the held seats into bookings; fails only if the holds expired meanwhile
+            if booking_core.confirm_booking(ledger, st.session_state.hold_ids):
+                st.session_state.payment_status = "Success" # Simulate success
+                st.session_state.booking_ids = list(st.session_state.hold_ids.values()) # holds become bookings under the same id
+                st.toast("Simulating successful payment...", icon="✅")
+            else:
+                st.session_state.payment_status = "Your reservation expired. Please check availability again."
 
-                    # Clear state & trigger rerun for UI update
-                    st.session_state.booking_details = {}
-                    st.session_state.total_cost = 0
-                    st.session_state.availability_checked = False
-                    st.session_state.is_available = False
-                    # Reset checkbox states (optional, might depend on desired flow)
-                    st.session_state.cb_elder = False
-                    st.session_state.cb_child = True # Back to default
-                    # Use rerun to clear inputs and update UI correctly after state reset
-                    st.experimental_rerun()
+            # Clear state & trigger rerun for UI update
+            st.session_state.hold_ids = {}
+            st.session_state.booking_details = {}
+            st.session_state.total_cost = 0
+            st.session_state.availability_checked = False
+            st.session_state.is_available = False
+            # Reset checkbox states (widget keys can't be assigned once rendered, so drop them)
+            st.session_state.pop('cb_elder', None)
+            st.session_state.pop('cb_child', None)
+            # Use rerun to clear inputs and update UI correctly after state reset
+            st.rerun()
 
 # --- Display Payment Status Message (after payment attempt) ---
 if st.session_state.payment_status:
@@ -296,12 +266,92 @@ if st.session_state.payment_status:
 
     if status_to_display == "Success":
          st.success("Payment Successful! Your booking is confirmed (Simulation). Capacity updated.")
+         for booking_id in st.session_state.pop('booking_ids', []):
+             booking = ledger.get_booking(booking_id)
+             st.write(f"Booking ID `{booking_id}`: {booking['service']}, {booking['start'].strftime('%Y-%m-%d')} to {booking['end'].strftime('%Y-%m-%d')}, {booking['num_days']} weekday(s), {CURRENCY_SYMBOL} {booking['cost']:.2f}")
          st.balloons()
     else:
          st.error(f"Payment Failed: {status_to_display}")
 
 # --- Default message in payment area if nothing else is shown ---
 elif not st.session_state.is_available and st.session_state.availability_checked:
-    pass # Error shown in sidebar by confirm_button logic
+    # Error shown in sidebar by confirm_button logic; offer the waitlist for full ranges
+    waitlist_status = st.session_state.pop('waitlist_status', None)
+    if waitlist_status or st.session_state.waitlist_offers:
+        with payment_placeholder.container():
+            if waitlist_status:
+                status_kind, status_message = waitlist_status
+                if status_kind == "success":
+                    st.success(status_message)
+                else:
+                    st.error(status_message)
+            if st.session_state.waitlist_offers:
+                st.info("Some days are fully booked. Join the waitlist to be booked automatically, in order of request, as soon as seats free up.")
+            for service_name, date_range in list(st.session_state.waitlist_offers.items()):
+                if st.button(f"Join the Waitlist for {service_name}", key=f"btn_waitlist_{service_name}"):
+                    entry_id, error = booking_core.join_waitlist(ledger, waitlist, service_name, date_range)
+                    if error:
+                        st.session_state.waitlist_status = ("error", error)
+                    else:
+                        st.session_state.waitlist_status = ("success", f"You're on the {service_name} waitlist. Waitlist ID `{entry_id}`: look it up under 'Manage an Existing Booking'.")
+                    del st.session_state.waitlist_offers[service_name]
+                    st.rerun()
 elif not st.session_state.availability_checked:
      payment_placeholder.info("Select service(s)/date(s) and click 'Check Availability' to proceed.")
+
+# --- Manage an Existing Booking (cancel / reschedule / waitlist) ---
+st.markdown("---")
+manage_expander = st.expander("Manage an Existing Booking", key="exp_manage", on_change="rerun")
+with manage_expander:
+    if manage_expander.open:
+        # Result of the last cancel/reschedule, shown once after the rerun it triggered
+        manage_status = st.session_state.pop('manage_status', None)
+        if manage_status:
+            status_kind, status_message = manage_status
+            if status_kind == "success":
+                st.success(status_message)
+            else:
+                st.error(status_message)
+
+        manage_id = st.text_input("Booking or Waitlist ID:", key="manage_id").strip()
+        booking = ledger.get_booking(manage_id) if manage_id else None
+        entry = waitlist.get(manage_id) if manage_id and booking is None and waitlist is not None else None
+        if manage_id and booking is None and entry is None:
+            st.error(f"No booking or waitlist entry with ID {manage_id}.")
+        elif entry:
+            st.markdown(
+                f"**{entry['service']} (waitlist):** `{entry['start'].strftime('%Y-%m-%d (%a)')}` to "
+                f"`{entry['end'].strftime('%Y-%m-%d (%a)')}`, {entry['num_days']} weekday(s), "
+                f"{CURRENCY_SYMBOL} {entry['cost']:.2f} ({entry['status']})"
+            )
+            if entry['status'] == WAITLIST_PROMOTED:
+                st.write(f"A seat freed up: this request is now booking `{entry['booking_id']}`.")
+            elif entry['status'] == WAITLIST_WAITING:
+                if st.button("Leave Waitlist", key="btn_withdraw"):
+                    withdrawn = waitlist.withdraw(manage_id)
+                    st.session_state.manage_status = ("success", "You left the waitlist.") if withdrawn else ("error", "This request is no longer waiting.")
+                    st.rerun()
+        elif booking:
+            st.markdown(
+                f"**{booking['service']}:** `{booking['start'].strftime('%Y-%m-%d (%a)')}` to "
+                f"`{booking['end'].strftime('%Y-%m-%d (%a)')}`, {booking['num_days']} weekday(s), "
+                f"{CURRENCY_SYMBOL} {booking['cost']:.2f} ({booking['status']})"
+            )
+            if booking['status'] == booking_core.BOOKING_CONFIRMED:
+                new_range = st.date_input(
+                    "Move to Date Range:",
+                    value=[],
+                    min_value=booking_core.earliest_start_date(),
+                    max_value=booking_core.latest_end_date(),
+                    format="YYYY-MM-DD",
+                    key="dr_reschedule"
+                )
+                reschedule_col, cancel_col = st.columns(2)
+                if reschedule_col.button("Reschedule Booking", key="btn_reschedule"):
+                    error = booking_core.reschedule_booking(ledger, manage_id, new_range)
+                    st.session_state.manage_status = ("error", error) if error else ("success", "Booking rescheduled. Capacity updated.")
+                    st.rerun()
+                if cancel_col.button("Cancel Booking", key="btn_cancel"):
+                    error = booking_core.cancel_booking(ledger, manage_id)
+                    st.session_state.manage_status = ("error", error) if error else ("success", "Booking cancelled. Its seats are free again.")
+                    st.rerun()
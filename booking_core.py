@@ -0,0 +1,431 @@
+"""
+UI-free booking logic: validation, weekday expansion, capacity check, cost and commit.
+
+booking_app.py (Streamlit) calls into this module, and anything else — load tests,
+profilers, other services — can import it without running the Streamlit script.
+"""
+import datetime
+import json
+import os
+import time
+
+import numpy as np
+
+from booking_store import BOOKING_CONFIRMED, open_store
+from capacity import CapacityCalendar
+from closures import load_closures
+from weekdays import (
+    cached_count_weekdays,
+    cached_weekday_ordinals,
+    closures_between,
+    range_cache_stats,
+    set_closures,
+    weekday_index_range,
+    weekdays_before,
+)
+
+# --- Configuration ---
+PRICES = {
+    "Elder Day Care": 800,
+    "Child Day Care": 600
+}
+SERVICE_NAMES = list(PRICES.keys())
+# Short names used as prefixes in error messages
+SERVICE_LABELS = {
+    "Elder Day Care": "Elder Care",
+    "Child Day Care": "Child Care"
+}
+CURRENCY_SYMBOL = "Rs."
+# Seats per service and day unless the capacity calendar says otherwise (see capacity_calendar)
+DEFAULT_CAPACITY = {
+    "Elder Day Care": 25,
+    "Child Day Care": 25
+}
+# Bookings end at most this many days from today, and span at most MAX_RANGE_DAYS days
+# (imported history included), so no single request writes an unbounded number of days
+BOOKING_HORIZON_DAYS = 730
+MAX_RANGE_DAYS = 366
+# Shown where the store can't keep a waitlist (see open_waitlist)
+WAITLIST_UNAVAILABLE = "The waitlist needs the SQLite or in-memory booking store."
+# Sidebar hints: days looked ahead before a range is picked, and full days listed at most
+HINT_LOOKAHEAD_DAYS = 28
+HINT_MAX_DAYS = 5
+
+
+def capacity_calendar():
+    """
+    The CapacityCalendar for the configured services: DEFAULT_CAPACITY, plus the weekday, date
+    and staff rules of the JSON file named by BOOKING_CAPACITY if set (format in capacity.py).
+    """
+    config_path = os.environ.get("BOOKING_CAPACITY")
+    config = None
+    if config_path:
+        with open(config_path, encoding="utf-8") as config_file:
+            config = json.load(config_file)
+    return CapacityCalendar.from_config(SERVICE_NAMES, DEFAULT_CAPACITY, config)
+
+
+def load_default_closures():
+    """
+    Applies the holiday/closure days of the CSV or ICS file named by BOOKING_HOLIDAYS, if set
+    (format in closures.py). Closed days are left out of every quote and weekday count.
+    """
+    closures_path = os.environ.get("BOOKING_HOLIDAYS")
+    if closures_path:
+        set_closures(load_closures(closures_path))
+
+
+# Applied once on import, before anything is quoted: quotes never need the store to be open
+load_default_closures()
+
+
+def open_default_store():
+    """
+    Opens the BookingStore configured by the environment: BOOKING_STORE picks the backend
+    ("memory", "sqlite" or "file", see booking_store.py) and BOOKING_DB its file. Setting only
+    BOOKING_DB selects SQLite (survives restarts, shared between processes). Seats per day
+    come from capacity_calendar(); closure days were applied when this module was imported.
+    """
+    db_path = os.environ.get("BOOKING_DB")
+    backend = os.environ.get("BOOKING_STORE", "sqlite" if db_path else "memory")
+    return open_store(backend, capacity_calendar(), SERVICE_NAMES, path=db_path)
+
+
+# --- Validation ---
+def earliest_start_date():
+    """Bookings can be made from tomorrow on."""
+    return datetime.date.today() + datetime.timedelta(days=1)
+
+
+def latest_end_date():
+    """Bookings can run up to BOOKING_HORIZON_DAYS from today."""
+    return datetime.date.today() + datetime.timedelta(days=BOOKING_HORIZON_DAYS)
+
+
+def validate_range(service_name, date_range):
+    """
+    Checks one date range as returned by st.date_input (a (start, end) pair once both ends are picked).
+    Returns an error message, or None if the range is usable.
+    """
+    # st.date_input returns a list/tuple for range, check length
+    if not isinstance(date_range, (list, tuple)) or len(date_range) != 2:
+        return f"Please select a start and end date for {service_name}."
+    start_dt, end_dt = date_range
+    if start_dt is None or end_dt is None:
+        return f"Please select BOTH a start and end date for {service_name}."
+    if start_dt > end_dt:
+        return f"{SERVICE_LABELS[service_name]}: Start date cannot be after end date."
+    if end_dt > latest_end_date():
+        return f"{SERVICE_LABELS[service_name]}: End date cannot be after {latest_end_date().strftime('%Y-%m-%d')}."
+    if (end_dt - start_dt).days >= MAX_RANGE_DAYS:
+        return f"{SERVICE_LABELS[service_name]}: A booking can span at most {MAX_RANGE_DAYS} days."
+    return None
+
+
+def validate_selection(selections):
+    """
+    Validates {service_name: date_range} for every selected service.
+    Returns the list of error messages (empty if everything is usable).
+    """
+    if not selections:
+        return ["Please select at least one service type."]
+    errors = []
+    for service_name, date_range in selections.items():
+        error = validate_range(service_name, date_range)
+        if error:
+            errors.append(error)
+    return errors
+
+
+def full_days_hint(store, service_name, date_range):
+    """
+    Warns about fully booked days while the user is still picking dates: the full weekdays of the
+    picked range, or of the HINT_LOOKAHEAD_DAYS from the picked (or earliest) start date.
+    Returns a message, or None if none of those days is full. Only that window is read from the store.
+    """
+    picked = [day for day in (date_range or ()) if day is not None]
+    if len(picked) == 2 and picked[0] <= picked[1]:
+        start_date, end_date = picked
+        prefix = "Already fully booked in this range"
+    else:
+        start_date = picked[0] if picked else earliest_start_date()
+        end_date = start_date + datetime.timedelta(days=HINT_LOOKAHEAD_DAYS - 1)
+        prefix = f"Fully booked in the {HINT_LOOKAHEAD_DAYS} days from {start_date.strftime('%Y-%m-%d')}"
+    full_days = store.check_range(service_name, start_date, end_date)
+    if not full_days:
+        return None
+    listed = ", ".join(day.strftime("%Y-%m-%d (%a)") for day in full_days[:HINT_MAX_DAYS])
+    more = len(full_days) - HINT_MAX_DAYS
+    return f"{prefix}: {listed}" + (f" and {more} more." if more > 0 else ".")
+
+
+def closures_hint(date_range):
+    """Names the closure days of a picked range, which are neither booked nor charged; None if it has none."""
+    picked = [day for day in (date_range or ()) if day is not None]
+    if len(picked) != 2 or picked[0] > picked[1]:
+        return None
+    closed = closures_between(*picked).tolist()
+    if not closed:
+        return None
+    listed = ", ".join(datetime.date.fromordinal(day).strftime("%Y-%m-%d (%a)") for day in closed[:HINT_MAX_DAYS])
+    more = len(closed) - HINT_MAX_DAYS
+    return f"Closed, not booked or charged: {listed}" + (f" and {more} more." if more > 0 else ".")
+
+
+# --- Weekday expansion & cost ---
+def quote_service(service_name, start_date, end_date):
+    """
+    Returns (number of open weekdays, total cost) for booking the service over the range.
+    Works from the weekday count alone (closures are subtracted with a binary search), so a
+    year-long quote costs about the same as a one-day one, and repeated ranges come straight
+    from the shared range cache.
+    """
+    num_days = cached_count_weekdays(start_date, end_date)
+    return num_days, num_days * PRICES[service_name]
+
+
+def total_cost(details):
+    return sum(service_details["cost"] for service_details in details.values())
+
+
+# --- Capacity check & commit ---
+def check_and_reserve(store, selections, held_details=None, held_ids=None):
+    """
+    Quotes every validated {service_name: (start, end)} selection and reserves its seats in the store,
+    so the capacity check and the later payment are one atomic step.
+
+    Returns (details, hold_ids, errors). `details` maps service_name to
+    {"start", "end", "num_days", "cost", "held_until"} and `hold_ids` maps service_name to its hold.
+    Services are processed in order and processing stops at the first one that fails;
+    when `errors` is non-empty nothing stays held.
+
+    `held_details`/`held_ids` are the results of this session's previous check, if any: a service
+    whose range hasn't changed keeps its hold and quote instead of being re-quoted and re-checked,
+    and the hold is renewed so it runs as long as a fresh one; every previous hold that isn't
+    reused is released. A hold that lapsed meanwhile is quoted and reserved afresh.
+    """
+    held_details = held_details or {}
+    reused = {}
+    for service_name, hold_id in (held_ids or {}).items():
+        previous = held_details.get(service_name)
+        if (
+            previous is not None
+            and service_name in selections
+            and (previous["start"], previous["end"]) == tuple(selections[service_name])
+        ):
+            reused[service_name] = hold_id
+        else:
+            store.release(hold_id)
+
+    details = {}
+    hold_ids = {}
+    errors = []
+    for service_name, (start_date, end_date) in selections.items():
+        if service_name in reused:
+            hold_id = reused.pop(service_name)
+            renewed_at = time.time()  # taken before renewing, as for a new hold below
+            if store.renew(hold_id):
+                hold_ids[service_name] = hold_id
+                details[service_name] = dict(held_details[service_name], held_until=renewed_at + store.hold_ttl)
+                continue
+        label = SERVICE_LABELS[service_name]
+        num_days, cost = quote_service(service_name, start_date, end_date)
+        if not num_days:
+            errors.append(f"{label}: Selected range contains no open weekdays (Mon-Fri, closures excluded).")
+            break
+        reserved_at = time.time()  # taken before reserving, so held_until never overstates the hold
+        hold_id = store.reserve_range(service_name, start_date, end_date, cost=cost)
+        if hold_id is None:
+            errors.append(capacity_error(store, service_name, store.check_range(service_name, start_date, end_date)))
+            break
+        hold_ids[service_name] = hold_id
+        details[service_name] = {
+            "start": start_date,
+            "end": end_date,
+            "num_days": num_days,
+            "cost": cost,
+            "held_until": reserved_at + store.hold_ttl,
+        }
+
+    if not errors and total_cost(details) <= 0:
+        errors.append("Selected range(s) resulted in zero valid booking days (Mon-Fri, closures excluded).")
+    if errors:
+        # Includes reused holds of services after the one that failed
+        release_holds(store, hold_ids)
+        release_holds(store, reused)
+        return {}, {}, errors
+    return details, hold_ids, errors
+
+
+def capacity_error(store, service_name, full_days):
+    """The error message for a range that hit the given full days, with each day's seats."""
+    listed = ", ".join(
+        f"{day.strftime('%Y-%m-%d (%a')}, {store.capacity.capacity_on(service_name, day.toordinal())} seats)"
+        for day in full_days
+    )
+    return f"{SERVICE_LABELS[service_name]}: Capacity limit reached on: {listed}"
+
+
+def check_availability_batch(store, queries):
+    """
+    Checks many validated (service_name, start_date, end_date) queries in one pass over the store.
+    Returns one {"available", "full_day_count"} dict per query, in order.
+    """
+    return [
+        {"available": not full_count, "full_day_count": full_count}
+        for full_count in store.count_full_days(queries)
+    ]
+
+
+def release_holds(store, hold_ids):
+    """Gives back every seat held for {service_name: hold_id}."""
+    for hold_id in hold_ids.values():
+        store.release(hold_id)
+
+
+def confirm_booking(store, hold_ids):
+    """
+    Turns the held seats into bookings (the simulated payment step); each booking's
+    booking_id is the hold_id it came from, see store.get_booking.
+    Returns False if the holds expired in the meantime; nothing is booked then.
+    """
+    return store.commit_all(list(hold_ids.values()))
+
+
+# --- Changes to confirmed bookings ---
+def _changeable_booking(store, booking_id):
+    """Returns (booking, error): the booking if it exists and is still confirmed, else an error message."""
+    booking = store.get_booking(booking_id)
+    if booking is None:
+        return None, f"No booking with ID {booking_id}."
+    if booking["status"] != BOOKING_CONFIRMED:
+        return None, f"Booking {booking_id} is {booking['status']}."
+    return booking, None
+
+
+def cancel_booking(store, booking_id):
+    """
+    Cancels a confirmed booking and frees its seats (a waitlist on the store promotes whoever
+    waits for them). Returns an error message, or None on success.
+    """
+    _, error = _changeable_booking(store, booking_id)
+    if error:
+        return error
+    if not store.cancel(booking_id):
+        return f"Booking {booking_id} was changed meanwhile. Please try again."
+    return None
+
+
+def reschedule_booking(store, booking_id, date_range):
+    """
+    Moves a confirmed booking to a new (start, end) range of the same service, re-quoted at the
+    current price. The old seats are only given up if the new range fits. Returns an error
+    message, or None on success.
+    """
+    booking, error = _changeable_booking(store, booking_id)
+    if error:
+        return error
+    service_name = booking["service"]
+    label = SERVICE_LABELS[service_name]
+    error = validate_range(service_name, date_range)
+    if error:
+        return error
+    start_date, end_date = date_range
+    num_days, cost = quote_service(service_name, start_date, end_date)
+    if not num_days:
+        return f"{label}: Selected range contains no open weekdays (Mon-Fri, closures excluded)."
+    if store.reschedule(booking_id, start_date, end_date, cost=cost):
+        return None
+    # Days of the current booking never block: its own seat there is reused
+    full_days = [
+        day for day in store.check_range(service_name, start_date, end_date)
+        if not booking["start"] <= day <= booking["end"]
+    ]
+    if not full_days:
+        return f"Booking {booking_id} was changed meanwhile. Please try again."
+    return capacity_error(store, service_name, full_days)
+
+
+# --- Waitlist ---
+def open_waitlist(store):
+    """
+    The store's waitlist, promoted from whenever the store frees seats: kept in the database by
+    the SQLite store (shared by every process, promoted in the transaction that frees the seats),
+    in memory by the in-memory one. None for the journal-file store, which keeps none.
+    """
+    return store.open_waitlist()
+
+
+def join_waitlist(store, waitlist, service_name, date_range):
+    """
+    Puts a validated range that can't be booked right now on the waitlist (from open_waitlist),
+    quoted at the current price. Returns (entry_id, error); only one of them is set.
+    """
+    if waitlist is None:
+        return None, WAITLIST_UNAVAILABLE
+    label = SERVICE_LABELS[service_name]
+    error = validate_range(service_name, date_range)
+    if error:
+        return None, error
+    start_date, end_date = date_range
+    num_days, cost = quote_service(service_name, start_date, end_date)
+    if not num_days:
+        return None, f"{label}: Selected range contains no open weekdays (Mon-Fri, closures excluded)."
+    if store.is_range_available(service_name, start_date, end_date):
+        return None, f"{label}: Every day of this range has free seats, it can be booked right away."
+    return waitlist.add(service_name, start_date, end_date, num_days, cost), None
+
+
+# --- Occupancy view ---
+def occupancy_page_count(start_date, end_date, page_size):
+    """Number of pages of page_size open weekdays that [start_date, end_date] fills."""
+    return -(-cached_count_weekdays(start_date, end_date) // page_size)
+
+
+def occupancy_page(store, start_date, end_date, page, page_size):
+    """
+    One page of the per-weekday occupancy table for [start_date, end_date]: page `page`
+    (0-based) holds up to page_size open weekdays, and only that window is read from the store.
+    Returns a list of {"Date": date, service_name: "count / seats", ...} rows (empty past the last page).
+    """
+    ordinals = cached_weekday_ordinals(start_date, end_date)[page * page_size:(page + 1) * page_size].tolist()
+    if not ordinals:
+        return []
+    first, last = weekdays_before(ordinals[0]), weekdays_before(ordinals[-1])
+    counts = {}
+    for chunk in store.iter_occupancy(datetime.date.fromordinal(ordinals[0]), datetime.date.fromordinal(ordinals[-1])):
+        for day, service_name, count in chunk:
+            counts[(day, service_name)] = count
+    seats = {service_name: store.capacity.column(service_name, first, last).tolist() for service_name in SERVICE_NAMES}
+    rows = []
+    for ordinal in ordinals:
+        row = {"Date": datetime.date.fromordinal(ordinal)}
+        offset = weekdays_before(ordinal) - first
+        for service_name in SERVICE_NAMES:
+            row[service_name] = f"{counts.get((ordinal, service_name), 0)} / {seats[service_name][offset]}"
+        rows.append(row)
+    return rows
+
+
+def period_range(period, day):
+    """(first, last) date of the calendar "Month" or "Quarter" that contains `day`."""
+    months = 3 if period == "Quarter" else 1
+    first_month = (day.month - 1) // months * months + 1
+    first = datetime.date(day.year, first_month, 1)
+    next_year, next_month = divmod(first_month - 1 + months, 12)
+    return first, datetime.date(day.year + next_year, next_month + 1, 1) - datetime.timedelta(days=1)
+
+
+def utilisation(store, start_date, end_date):
+    """
+    Returns (ordinals, shares) for the open weekdays of the range: shares[i, j] is the part of
+    that day's seats booked or held on ordinals[i] for the store's service_names[j] (1 on a day
+    without seats). The store hands back one slice of its occupancy array and the calendar
+    one of seats, so a year costs one division; closure days are dropped from both.
+    """
+    lo, hi = weekday_index_range(start_date, end_date)
+    ordinals = cached_weekday_ordinals(start_date, end_date)
+    rows = (ordinals - 1) // 7 * 5 + (ordinals - 1) % 7 - lo  # weekdays_before, vectorized
+    counts = store.count_window(start_date, end_date)[rows]
+    seats = store.capacity.window(lo, hi)[rows]
+    return ordinals, np.divide(counts, seats, out=np.ones(counts.shape), where=seats > 0)
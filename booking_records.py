@@ -0,0 +1,128 @@
+import bisect
+import heapq
+import itertools
+import threading
+
+from booking_store import BOOKING_CANCELLED, BOOKING_CONFIRMED, booking_record
+
+
+class BookingRecords:
+    """
+    Booking records of the in-memory ledgers, by ID and by day.
+
+    Each record is one tuple (service, first_day, last_day, num_days, cost, status), with
+    first_day/last_day the ordinals of its first and last weekday. The day index groups the
+    bookings by span length class (last_day - first_day in [2**(c - 1), 2**c - 1] for class c),
+    each class a list of (first_day, booking_id) searched with bisect. The bookings of class c
+    covering a day all start at most 2**c - 1 days before it, so finding them is two binary
+    searches per class and a walk over a slice of bookings that are at least half as long as
+    the window, whatever the longest booking is: one very long booking doesn't widen the
+    search for the others. Out-of-order additions (e.g. a journal replay) are appended and
+    sorted on the next lookup.
+    """
+
+    def __init__(self):
+        self._records = {}
+        self._by_span = {}
+        self._unsorted = set()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._records)
+
+    @staticmethod
+    def _span_class(first_day, last_day):
+        return (last_day - first_day).bit_length()
+
+    def _index(self, booking_id, first_day, last_day):
+        """Adds a booking to the day index (the caller holds the lock)."""
+        span_class = self._span_class(first_day, last_day)
+        bookings = self._by_span.setdefault(span_class, [])
+        key = (first_day, booking_id)
+        if bookings and key < bookings[-1]:
+            self._unsorted.add(span_class)
+        bookings.append(key)
+
+    def add(self, booking_id, service_name, first_day, last_day, num_days, cost, status=BOOKING_CONFIRMED):
+        with self._lock:
+            self._records[booking_id] = (service_name, first_day, last_day, num_days, cost, status)
+            self._index(booking_id, first_day, last_day)
+
+    def _sort(self):
+        """Restores the day index order after out-of-order additions (the caller holds the lock)."""
+        for span_class in self._unsorted:
+            self._by_span[span_class].sort()
+        self._unsorted.clear()
+
+    def cancel(self, booking_id):
+        """Marks a confirmed booking cancelled. Returns its record tuple, or None if it wasn't confirmed."""
+        with self._lock:
+            record = self._records.get(booking_id)
+            if record is None or record[5] != BOOKING_CONFIRMED:
+                return None
+            self._records[booking_id] = record[:5] + (BOOKING_CANCELLED,)
+            return record
+
+    def move(self, booking_id, first_day, last_day, num_days, cost):
+        """Gives a booking a new range and cost, keeping its id and status."""
+        with self._lock:
+            service_name, old_first_day, old_last_day, _, _, status = self._records[booking_id]
+            self._records[booking_id] = (service_name, first_day, last_day, num_days, cost, status)
+            self._sort()
+            bookings = self._by_span[self._span_class(old_first_day, old_last_day)]
+            del bookings[bisect.bisect_left(bookings, (old_first_day, booking_id))]
+            bisect.insort(self._by_span.setdefault(self._span_class(first_day, last_day), []), (first_day, booking_id))
+
+    def get_tuple(self, booking_id):
+        """The raw (service, first_day, last_day, num_days, cost, status) record, or None."""
+        return self._records.get(booking_id)
+
+    def get(self, booking_id):
+        """The booking as a booking_store.booking_record dict, or None if the ID is unknown."""
+        record = self._records.get(booking_id)
+        return booking_record(booking_id, *record) if record is not None else None
+
+    def _covering(self, ordinal):
+        """(first_day, booking_id) of every booking covering the day, unordered (the caller holds the lock)."""
+        found = []
+        for span_class, bookings in self._by_span.items():
+            start = bisect.bisect_left(bookings, (ordinal - (1 << span_class) + 1,))
+            stop = bisect.bisect_left(bookings, (ordinal + 1,))
+            found += [key for key in bookings[start:stop] if self._records[key[1]][2] >= ordinal]
+        return found
+
+    def _overlapping(self, first, last):
+        """
+        (booking_id, record) of every booking overlapping [first, last], by first day: those
+        covering `first` that start before it, then the ones starting in the range.
+        """
+        with self._lock:
+            self._sort()
+            before = sorted(key for key in self._covering(first) if key[0] < first)
+            slices = []
+            for bookings in self._by_span.values():
+                start = bisect.bisect_left(bookings, (first,))
+                slices.append(bookings[start:bisect.bisect_left(bookings, (last + 1,), start)])
+        for _, booking_id in itertools.chain(before, heapq.merge(*slices)):
+            yield booking_id, self._records[booking_id]
+
+    def ids_on(self, ordinal, service_name=None):
+        """IDs of the bookings (of any status) covering the day, by first day, optionally of one service only."""
+        with self._lock:
+            self._sort()
+            covering = sorted(self._covering(ordinal))
+        return [
+            booking_id for _, booking_id in covering
+            if service_name is None or self._records[booking_id][0] == service_name
+        ]
+
+    def iter_range(self, first, last, chunk_rows):
+        """Yields lists of up to chunk_rows record dicts overlapping [first, last], by first day."""
+        chunk = []
+        for booking_id, record in self._overlapping(first, last):
+            chunk.append(booking_record(booking_id, *record))
+            if len(chunk) >= chunk_rows:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
@@ -0,0 +1,194 @@
+import abc
+import datetime
+
+import numpy as np
+
+from weekdays import weekday_index_range, weekdays_before
+
+STORE_BACKENDS = ("memory", "sqlite", "file")
+# Rows per chunk handed out by BookingStore.iter_occupancy / iter_bookings
+EXPORT_CHUNK_ROWS = 10000
+# Booking record statuses
+BOOKING_CONFIRMED = "confirmed"
+BOOKING_CANCELLED = "cancelled"
+
+
+def booking_record(booking_id, service_name, first_day, last_day, num_days, cost, status):
+    """
+    The dict every backend returns for a booking. first_day/last_day are the ordinals
+    of its first and last weekday; they come back as dates in "start"/"end".
+    """
+    return {
+        "booking_id": booking_id,
+        "service": service_name,
+        "start": datetime.date.fromordinal(first_day),
+        "end": datetime.date.fromordinal(last_day),
+        "num_days": num_days,
+        "cost": cost,
+        "status": status,
+    }
+
+
+class BookingStore(abc.ABC):
+    """
+    Interface shared by every capacity backend (ledger.CapacityLedger,
+    sqlite_ledger.SQLiteLedger, file_ledger.FileLedger), so the booking
+    logic and the benchmarks can run unchanged against any of them.
+
+    Counts are per (weekday, service) and include seats held by uncommitted
+    reservations. Dates are datetime.date; snapshot keys are day ordinals.
+    `service_names` gives the service order used for array columns, `capacity` the
+    capacity.CapacityCalendar a day is full by, and `hold_ttl` how many seconds a
+    reservation is held before it lapses. `durable` is True for backends whose
+    bookings outlive the process (and may be shared with other processes).
+    """
+
+    durable = False
+
+    @abc.abstractmethod
+    def check_range(self, service_name, start_date, end_date):
+        """Returns the weekdays in [start_date, end_date] that are at capacity for the service."""
+
+    @abc.abstractmethod
+    def is_range_available(self, service_name, start_date, end_date):
+        """True if no weekday in [start_date, end_date] is at capacity for the service."""
+
+    def count_full_days(self, queries):
+        """
+        Answers many (service_name, start_date, end_date) queries at once: returns, per query,
+        how many weekdays of the range are at capacity (0 means the range is available).
+        Backends override this to answer the whole batch in one pass.
+        """
+        return [len(self.check_range(service_name, start_date, end_date)) for service_name, start_date, end_date in queries]
+
+    @abc.abstractmethod
+    def get_count(self, ordinal, service_name):
+        """Returns the number of bookings (including held seats) on the day with this ordinal."""
+
+    @abc.abstractmethod
+    def reserve_range(self, service_name, start_date, end_date, cost=0):
+        """
+        Atomically holds one seat for the service on every weekday in [start_date, end_date].
+        Returns a hold_id, or None if any of those days is already at capacity.
+        `cost` is recorded on the booking the hold turns into.
+        Raises ValueError if the range has no weekdays.
+        """
+
+    @abc.abstractmethod
+    def renew(self, hold_id):
+        """
+        Extends a live hold to `hold_ttl` seconds from now, keeping its seats.
+        Returns False if the hold is unknown or has expired (nothing is held then).
+        """
+
+    @abc.abstractmethod
+    def commit_all(self, hold_ids):
+        """
+        Commits several holds as one unit: either all of them become bookings, or
+        (if any is unknown or expired) none do and the remaining ones are released.
+        A committed hold's id becomes the booking_id of its booking record.
+        """
+
+    def commit(self, hold_id):
+        """Turns a hold into a confirmed booking. Returns False if the hold is unknown or expired."""
+        return self.commit_all([hold_id])
+
+    @abc.abstractmethod
+    def cancel(self, booking_id):
+        """Cancels a confirmed booking and gives its seats back. Returns False if it isn't a confirmed booking."""
+
+    @abc.abstractmethod
+    def reschedule(self, booking_id, start_date, end_date, cost=0):
+        """
+        Atomically moves a confirmed booking to [start_date, end_date] (same service and id, new cost):
+        the old range is decremented and the new one incremented in one step, and days in both keep
+        the booking's seat. Returns False, changing nothing, if it isn't a confirmed booking or a day
+        of the new range is full. Raises ValueError if the range has no weekdays.
+        """
+
+    @abc.abstractmethod
+    def release(self, hold_id):
+        """Gives the seats of an uncommitted hold back. Unknown/expired ids are ignored."""
+
+    @abc.abstractmethod
+    def get_booking(self, booking_id):
+        """Returns the booking_record dict of a booking, or None if the ID is unknown."""
+
+    @abc.abstractmethod
+    def booking_ids_on(self, ordinal, service_name=None):
+        """IDs of the bookings (of any status) covering the day with this ordinal, optionally for one service."""
+
+    @abc.abstractmethod
+    def iter_bookings(self, start_date=None, end_date=None, chunk_rows=EXPORT_CHUNK_ROWS):
+        """
+        Yields the booking_record dicts overlapping [start_date, end_date] (open-ended when None)
+        in lists of up to chunk_rows, ordered by first day.
+        """
+
+    @abc.abstractmethod
+    def snapshot(self):
+        """Returns a plain {day_ordinal: {service_name: count}} copy of the non-zero days."""
+
+    def iter_occupancy(self, start_date=None, end_date=None, chunk_rows=EXPORT_CHUNK_ROWS):
+        """
+        Yields the non-zero counts of [start_date, end_date] (open-ended when None) as lists of
+        about chunk_rows (day_ordinal, service_name, count) tuples, in day order. A day's
+        services always share a chunk.
+        Backends override this to read one chunk at a time; this default goes through snapshot().
+        """
+        first = start_date.toordinal() if start_date else None
+        last = end_date.toordinal() if end_date else None
+        chunk = []
+        for day, counts in sorted(self.snapshot().items()):
+            if (first is not None and day < first) or (last is not None and day > last):
+                continue
+            for service_name, count in counts.items():
+                chunk.append((day, service_name, count))
+            if len(chunk) >= chunk_rows:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def count_window(self, start_date, end_date):
+        """
+        Counts for every weekday of [start_date, end_date] as an integer array with one row per
+        weekday (in order) and one column per service (in `service_names` order).
+        """
+        lo, hi = weekday_index_range(start_date, end_date)
+        counts = np.zeros((max(hi - lo + 1, 0), len(self.service_names)), dtype=np.int32)
+        columns = {name: col for col, name in enumerate(self.service_names)}
+        for chunk in self.iter_occupancy(start_date, end_date):
+            for day, service_name, count in chunk:
+                counts[weekdays_before(day) - lo, columns[service_name]] = count
+        return counts
+
+    def open_waitlist(self):
+        """
+        The waitlist that the seats this store gives back are promoted to (the interface of
+        waitlist.Waitlist), or None if the backend can't keep one.
+        """
+        return None
+
+    def compact(self):
+        """Drops storage left behind by released or expired holds (no-op unless the backend needs it)."""
+
+
+def open_store(backend, capacity, service_names, path=None):
+    """
+    Creates a BookingStore by name (one of STORE_BACKENDS). `capacity` is a
+    capacity.CapacityCalendar, or an int for the same seats on every day. `path` is
+    the database file for "sqlite" and the journal file for "file".
+    """
+    if backend == "memory":
+        from ledger import CapacityLedger
+        return CapacityLedger(capacity, service_names)
+    if backend not in STORE_BACKENDS:
+        raise ValueError(f"Unknown booking store {backend!r}, expected one of {', '.join(STORE_BACKENDS)}.")
+    if not path:
+        raise ValueError(f"The {backend!r} booking store needs a file path.")
+    if backend == "sqlite":
+        from sqlite_ledger import SQLiteLedger
+        return SQLiteLedger(path, capacity, service_names)
+    from file_ledger import FileLedger
+    return FileLedger(path, capacity, service_names)
@@ -0,0 +1,221 @@
+"""
+Seat capacity per service and weekday, replacing one global limit for every day.
+
+A CapacityCalendar layers three kinds of rules, later ones winning:
+
+1. a default number of seats per service,
+2. seats per day of the week (e.g. fewer on Fridays),
+3. seats for date ranges (holidays, events, a bigger room for a month).
+
+A staff rota can cap the result further: with `staff_ratios` giving the clients
+one staff member may look after, a day with N staff on duty has at most
+N * ratio seats. Date ranges and rota entries are kept as interval maps over
+the weekday index (see weekdays.py), so a lookup over a range costs a binary
+search plus one step per override it crosses, never a probe per day, and
+`column`/`window` hand back whole ranges as arrays to compare with occupancy
+in one vectorized step.
+
+The calendar can be built from a JSON config (see CapacityCalendar.from_config):
+
+    {
+        "default": {"Child Day Care": 20},
+        "weekdays": {"Child Day Care": {"Fri": 15}},
+        "dates": [{"service": "Elder Day Care", "start": "2026-12-21", "end": "2026-12-24", "capacity": 10}],
+        "staff_ratios": {"Child Day Care": 4},
+        "staff": [{"service": "Child Day Care", "start": "2026-11-02", "end": "2026-11-06", "staff": 3}]
+    }
+"""
+import bisect
+import datetime
+import threading
+
+import numpy as np
+
+from weekdays import weekday_index_range, weekdays_before
+
+WEEKDAY_NAMES = ["Mon", "Tue", "Wed", "Thu", "Fri"]
+
+
+class IntervalMap:
+    """
+    Piecewise-constant values over integer positions, stored as sorted interval starts.
+
+    Interval i runs from starts[i] up to starts[i + 1] - 1 (the last one is open-ended) and
+    has values[i], where None means "no value". Positions before the first start have none.
+    """
+
+    def __init__(self):
+        self._starts = []
+        self._values = []
+
+    def _split(self, position):
+        """Makes `position` the start of an interval, keeping the value it had."""
+        i = bisect.bisect_right(self._starts, position) - 1
+        if i >= 0 and self._starts[i] == position:
+            return
+        if i < 0 and self._values and self._values[0] is None:
+            self._starts[0] = position  # the first interval has no value either, extend it back
+            return
+        self._starts.insert(i + 1, position)
+        self._values.insert(i + 1, self._values[i] if i >= 0 else None)
+
+    def assign(self, lo, hi, value):
+        """Sets every position in [lo, hi] to `value` (None clears them)."""
+        if lo > hi:
+            return
+        self._split(lo)
+        self._split(hi + 1)
+        i = bisect.bisect_left(self._starts, lo)
+        j = bisect.bisect_left(self._starts, hi + 1)
+        self._starts[i:j] = [lo]
+        self._values[i:j] = [value]
+        # Merge with equal neighbours, so repeated assignments don't fragment the map
+        if i + 1 < len(self._starts) and self._values[i + 1] == value:
+            del self._starts[i + 1], self._values[i + 1]
+        if i > 0 and self._values[i - 1] == value:
+            del self._starts[i], self._values[i]
+
+    def get(self, position):
+        i = bisect.bisect_right(self._starts, position) - 1
+        return self._values[i] if i >= 0 else None
+
+    def overlapping(self, lo, hi):
+        """Yields (first, last, value) for the parts of [lo, hi] that have a value, in order."""
+        i = max(bisect.bisect_right(self._starts, lo) - 1, 0)
+        while i < len(self._starts) and self._starts[i] <= hi:
+            value = self._values[i]
+            if value is not None:
+                end = self._starts[i + 1] - 1 if i + 1 < len(self._starts) else hi
+                first, last = max(self._starts[i], lo), min(end, hi)
+                if first <= last:
+                    yield first, last, value
+            i += 1
+
+
+class CapacityCalendar:
+    """
+    Effective seats per (service, weekday) for a BookingStore.
+
+    Positions are weekday indices, as in the stores' occupancy indexes. Rules can be
+    changed while the stores are running; bookings already made are never undone,
+    a day whose capacity drops below its count simply takes no new bookings.
+    """
+
+    def __init__(self, service_names, default, staff_ratios=None):
+        self.service_names = list(service_names)
+        defaults = default if isinstance(default, dict) else dict.fromkeys(self.service_names, default)
+        # Seats per day of the week (Mon-Fri), the first two layers folded together
+        self._weekly = {name: np.full(5, int(defaults[name]), dtype=np.int32) for name in self.service_names}
+        self._dates = {name: IntervalMap() for name in self.service_names}
+        self._staff = {name: IntervalMap() for name in self.service_names}
+        self.staff_ratios = dict(staff_ratios or {})
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, service_names, default, config=None):
+        """
+        Builds a calendar from `default` seats (an int or {service_name: int}) and a parsed
+        JSON config as in the module docstring; every key of the config is optional.
+        """
+        config = config or {}
+        defaults = default if isinstance(default, dict) else dict.fromkeys(service_names, default)
+        calendar = cls(service_names, {**defaults, **config.get("default", {})}, config.get("staff_ratios"))
+        for service_name, days in config.get("weekdays", {}).items():
+            for day_name, capacity in days.items():
+                calendar.set_weekday(service_name, WEEKDAY_NAMES.index(day_name), capacity)
+        for rule in config.get("dates", []):
+            calendar.set_range(
+                rule["service"],
+                datetime.date.fromisoformat(rule["start"]),
+                datetime.date.fromisoformat(rule["end"]),
+                rule["capacity"],
+            )
+        for rule in config.get("staff", []):
+            calendar.set_staff(
+                rule["service"],
+                datetime.date.fromisoformat(rule["start"]),
+                datetime.date.fromisoformat(rule["end"]),
+                rule["staff"],
+            )
+        return calendar
+
+    # --- Rules ---
+    def set_weekday(self, service_name, weekday, capacity):
+        """Seats on every `weekday` (Monday=0 ... Friday=4) without a date-range rule."""
+        with self._lock:
+            self._weekly[service_name][weekday] = capacity
+
+    def set_range(self, service_name, start_date, end_date, capacity):
+        """Seats on the weekdays of [start_date, end_date]; None goes back to the weekly seats."""
+        lo, hi = weekday_index_range(start_date, end_date)
+        with self._lock:
+            self._dates[service_name].assign(lo, hi, capacity)
+
+    def set_staff(self, service_name, start_date, end_date, staff):
+        """
+        Staff on duty for the service on the weekdays of [start_date, end_date], capping their seats
+        at staff * staff_ratios[service_name]; None removes the rota entry.
+        """
+        if staff is not None and service_name not in self.staff_ratios:
+            raise ValueError(f"No staff ratio is configured for {service_name}.")
+        lo, hi = weekday_index_range(start_date, end_date)
+        with self._lock:
+            self._staff[service_name].assign(lo, hi, staff)
+
+    # --- Lookups ---
+    def column(self, service_name, lo, hi):
+        """Seats of the service on the weekday indices lo..hi, as an int32 array."""
+        if lo > hi:
+            return np.empty(0, dtype=np.int32)
+        with self._lock:
+            seats = self._weekly[service_name][np.arange(lo, hi + 1) % 5]
+            for first, last, capacity in self._dates[service_name].overlapping(lo, hi):
+                seats[first - lo:last - lo + 1] = capacity
+            ratio = self.staff_ratios.get(service_name)
+            for first, last, staff in self._staff[service_name].overlapping(lo, hi):
+                np.minimum(seats[first - lo:last - lo + 1], staff * ratio, out=seats[first - lo:last - lo + 1])
+        return seats
+
+    def fewest_seats(self, service_name, lo, hi):
+        """
+        A lower bound for the seats of the service on the weekday indices lo..hi, found without
+        building the range: O(log n + overrides). It is exact unless a date rule gives some days
+        more seats than their weekly ones; a range whose counts are all below it has no full day.
+        """
+        with self._lock:
+            weekly = self._weekly[service_name]
+            fewest = int(weekly.min()) if hi - lo >= 4 else min(int(weekly[index % 5]) for index in range(lo, hi + 1))
+            for _, _, capacity in self._dates[service_name].overlapping(lo, hi):
+                fewest = min(fewest, capacity)
+            ratio = self.staff_ratios.get(service_name)
+            for _, _, staff in self._staff[service_name].overlapping(lo, hi):
+                fewest = min(fewest, staff * ratio)
+        return fewest
+
+    def most_seats(self, service_name, lo, hi):
+        """
+        An upper bound for the seats of the service on the weekday indices lo..hi, the counterpart of
+        fewest_seats (staff caps are left out). When the two are equal, every day has that many seats.
+        """
+        with self._lock:
+            weekly = self._weekly[service_name]
+            most = int(weekly.max()) if hi - lo >= 4 else max(int(weekly[index % 5]) for index in range(lo, hi + 1))
+            for _, _, capacity in self._dates[service_name].overlapping(lo, hi):
+                most = max(most, capacity)
+        return most
+
+    def window(self, lo, hi):
+        """Seats on the weekday indices lo..hi, one row per weekday and one column per service."""
+        return np.stack([self.column(name, lo, hi) for name in self.service_names], axis=1)
+
+    def capacity_on(self, service_name, ordinal):
+        """Seats of the service on the weekday with this ordinal."""
+        index = weekdays_before(ordinal)
+        return int(self.column(service_name, index, index)[0])
+
+
+def as_calendar(capacity, service_names):
+    """Returns `capacity` if it already is a CapacityCalendar, else one with that many seats everywhere."""
+    if isinstance(capacity, CapacityCalendar):
+        return capacity
+    return CapacityCalendar(service_names, capacity)
@@ -0,0 +1,94 @@
+"""
+Holiday and closure days, loaded from a local CSV or ICS file.
+
+Closed weekdays are left out of weekday enumeration and counting (see
+weekdays.set_closures), so they are never quoted, charged or reported full.
+
+CSV files have one date (YYYY-MM-DD) per row, in a "date" column if there is a
+header, otherwise in the first column; an optional second column is ignored
+(e.g. the holiday's name):
+
+    date,name
+    2026-12-25,Christmas Day
+
+ICS files are read for all-day events (DTSTART;VALUE=DATE:20261225 or DTSTART:20261225);
+events with a start time are ignored, as they don't close the whole day. An event
+with a DTEND closes every day up to, but not including, that date, as in the
+iCalendar format. Recurrence rules are not expanded: list each year's dates.
+"""
+import csv
+import datetime
+import os
+
+import numpy as np
+
+
+def _parse_ics_date(value):
+    # "20261225", or a date-time such as "20261225T000000Z": the date part is what counts
+    return datetime.date(int(value[0:4]), int(value[4:6]), int(value[6:8]))
+
+
+def _is_ics_date(value, params):
+    # All-day values are DATE-typed (VALUE=DATE) or, without a VALUE parameter, a bare YYYYMMDD
+    if "VALUE=DATE" in params:
+        return True
+    return not any(param.startswith("VALUE=") for param in params) and "T" not in value.upper()
+
+
+def read_csv_closures(lines):
+    """Ordinals of the dates in CSV `lines` (any iterable of strings)."""
+    rows = [row for row in csv.reader(lines) if row and row[0].strip() and not row[0].startswith("#")]
+    if not rows:
+        return []
+    header = [cell.strip().lower() for cell in rows[0]]
+    column = 0
+    if "date" in header:
+        column = header.index("date")
+        rows = rows[1:]
+    return [datetime.date.fromisoformat(row[column].strip()).toordinal() for row in rows]
+
+
+def read_ics_closures(lines):
+    """Ordinals of the days covered by the all-day events in iCalendar `lines` (any iterable of strings)."""
+    # Long iCalendar lines are folded: a continuation starts with a space or a tab
+    unfolded = []
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and unfolded:
+            unfolded[-1] += line[1:]
+        elif line:
+            unfolded.append(line)
+
+    ordinals = []
+    start = end = None
+    for line in unfolded:
+        name, _, value = line.partition(":")
+        name, *params = name.upper().split(";")
+        value = value.strip()
+        if name == "BEGIN" and value.upper() == "VEVENT":
+            start = end = None
+        elif name == "DTSTART":
+            # Timed events (a meeting, a half day) leave the day open
+            start = _parse_ics_date(value) if _is_ics_date(value, params) else None
+        elif name == "DTEND":
+            end = _parse_ics_date(value)
+        elif name == "END" and value.upper() == "VEVENT" and start is not None:
+            last = end.toordinal() - 1 if end is not None and end > start else start.toordinal()
+            ordinals.extend(range(start.toordinal(), last + 1))
+    return ordinals
+
+
+def load_closures(path):
+    """
+    Reads the closure days of a .csv or .ics file. Returns them as a sorted int32 array
+    of unique ordinals, ready for weekdays.set_closures.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in (".csv", ".ics"):
+        raise ValueError(f"Closure files must be .csv or .ics, not {path}.")
+    with open(path, encoding="utf-8-sig", newline="") as closures_file:
+        if extension == ".ics":
+            ordinals = read_ics_closures(closures_file)
+        else:
+            ordinals = read_csv_closures(closures_file)
+    return np.unique(np.asarray(ordinals, dtype=np.int32))
@@ -0,0 +1,135 @@
+"""
+Streaming export of the occupancy ledger or the booking records to CSV, NDJSON or Parquet.
+
+Records are pulled from the store one chunk at a time (BookingStore.iter_occupancy /
+iter_bookings) and written out before the next chunk is read, so a year or more of
+data never has to sit in memory at once.
+
+    BOOKING_DB=bookings.db python export.py occupancy-2026.parquet --start 2026-01-01 --end 2026-12-31
+    BOOKING_DB=bookings.db python export.py bookings-2026.csv --bookings --start 2026-01-01 --end 2026-12-31
+
+The format follows the file extension (.csv, .ndjson/.jsonl, .parquet/.pq); "-" writes CSV to stdout.
+Parquet files need pyarrow (installed alongside Streamlit).
+"""
+import argparse
+import csv
+import datetime
+import json
+import os
+import sys
+
+import booking_core
+from booking_store import EXPORT_CHUNK_ROWS
+
+OCCUPANCY_COLUMNS = ["date", "service", "count", "capacity"]
+BOOKING_COLUMNS = ["booking_id", "service", "start", "end", "num_days", "cost", "status"]
+FORMATS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson", ".parquet": "parquet", ".pq": "parquet"}
+
+
+# --- Records ---
+def iter_occupancy_records(store, start_date=None, end_date=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Yields lists of OCCUPANCY_COLUMNS dicts, one per (day, service) with bookings, in day order; capacity is that day's seats."""
+    for chunk in store.iter_occupancy(start_date, end_date, chunk_rows):
+        yield [
+            {
+                "date": datetime.date.fromordinal(day).isoformat(),
+                "service": service_name,
+                "count": count,
+                "capacity": store.capacity.capacity_on(service_name, day),
+            }
+            for day, service_name, count in chunk
+        ]
+
+
+def iter_booking_records(store, start_date=None, end_date=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Yields lists of BOOKING_COLUMNS dicts for the bookings overlapping the range, by first day."""
+    for chunk in store.iter_bookings(start_date, end_date, chunk_rows):
+        yield [dict(booking, start=booking["start"].isoformat(), end=booking["end"].isoformat()) for booking in chunk]
+
+
+# --- Writers ---
+def write_csv(chunks, out, columns=OCCUPANCY_COLUMNS):
+    """Writes record chunks to an open text file as CSV with a header line. Returns the row count."""
+    writer = csv.DictWriter(out, fieldnames=columns)
+    writer.writeheader()
+    rows = 0
+    for chunk in chunks:
+        writer.writerows(chunk)
+        rows += len(chunk)
+    return rows
+
+
+def write_ndjson(chunks, out):
+    """Writes record chunks to an open text file, one JSON object per line. Returns the row count."""
+    rows = 0
+    for chunk in chunks:
+        out.write("".join(json.dumps(record) + "\n" for record in chunk))
+        rows += len(chunk)
+    return rows
+
+
+def write_parquet(chunks, path, columns=OCCUPANCY_COLUMNS):
+    """Writes record chunks to a Parquet file, one row group per chunk. Returns the row count."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Writing Parquet files needs pyarrow: pip install pyarrow")
+    writer = None
+    rows = 0
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pylist(chunk).select(columns)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        # Nothing to export: still leave a valid, empty file behind
+        pq.write_table(pa.table({column: [] for column in columns}), path)
+    return rows
+
+
+def export(chunks, path, file_format=None, columns=OCCUPANCY_COLUMNS):
+    """Writes record chunks to `path` ("-" for stdout) in the given or extension-derived format."""
+    if file_format is None:
+        file_format = "csv" if path == "-" else FORMATS.get(os.path.splitext(path)[1].lower())
+    if file_format == "parquet":
+        return write_parquet(chunks, path, columns)
+    if file_format == "ndjson":
+        write = write_ndjson
+    elif file_format == "csv":
+        def write(chunks, out):
+            return write_csv(chunks, out, columns)
+    else:
+        raise ValueError(f"Can't tell the export format of {path!r}, expected one of {', '.join(FORMATS)}.")
+    if path == "-":
+        return write(chunks, sys.stdout)
+    with open(path, "w", newline="", encoding="utf-8") as out:
+        return write(chunks, out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export occupancy or bookings from the configured booking store.")
+    parser.add_argument("path", help="output file (.csv, .ndjson/.jsonl, .parquet) or - for CSV on stdout")
+    parser.add_argument("--bookings", action="store_true", help="export booking records instead of daily occupancy")
+    parser.add_argument("--start", type=datetime.date.fromisoformat, help="first day to export (YYYY-MM-DD)")
+    parser.add_argument("--end", type=datetime.date.fromisoformat, help="last day to export (YYYY-MM-DD)")
+    parser.add_argument("--format", choices=sorted(set(FORMATS.values())), help="override the format taken from the extension")
+    parser.add_argument("--chunk-rows", type=int, default=EXPORT_CHUNK_ROWS, help="rows read from the store per chunk")
+    args = parser.parse_args(argv)
+
+    store = booking_core.open_default_store()
+    if args.bookings:
+        chunks, columns = iter_booking_records(store, args.start, args.end, args.chunk_rows), BOOKING_COLUMNS
+    else:
+        chunks, columns = iter_occupancy_records(store, args.start, args.end, args.chunk_rows), OCCUPANCY_COLUMNS
+    rows = export(chunks, args.path, args.format, columns)
+    print(f"Exported {rows} row(s).", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
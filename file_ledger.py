@@ -0,0 +1,105 @@
+import json
+import os
+import threading
+
+from ledger import HOLD_TTL_SECONDS, CapacityLedger
+from weekdays import weekday_index_to_ordinal, weekdays_before
+
+
+class FileLedger(CapacityLedger):
+    """
+    In-memory ledger whose confirmed bookings are appended to a JSON-lines journal.
+
+    Checks and reservations run at in-memory speed; only commits, cancellations and
+    reschedules touch the disk (one appended line each, flushed and fsync'd, written in
+    the same order as the changes). On start-up the journal is replayed into the occupancy
+    index and the booking records, so bookings survive restarts. Holds are not journaled:
+    they are short-lived and simply lapse with the process. The file belongs to one
+    server process; use the SQLite store to share bookings between processes.
+    """
+
+    durable = True
+
+    def __init__(self, path, capacity, service_names, hold_ttl=HOLD_TTL_SECONDS):
+        super().__init__(capacity, service_names, hold_ttl=hold_ttl)
+        self.path = path
+        self._journal_lock = threading.Lock()
+        if os.path.exists(path):
+            self._replay()
+        self._journal = open(path, "a", encoding="utf-8")
+
+    def _replay(self):
+        with open(self.path, encoding="utf-8") as journal:
+            for line in journal:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                op = entry.get("op", "book")
+                if op == "cancel":
+                    CapacityLedger.cancel(self, entry["booking_id"])
+                    continue
+                if op == "reschedule":
+                    # Replayed without a capacity check: the move was accepted under the seats of
+                    # its time, and a calendar change since then must not drop it
+                    service_name, first_day, last_day = self._bookings.get_tuple(entry["booking_id"])[:3]
+                    self._add(service_name, weekdays_before(first_day), weekdays_before(last_day), -1)
+                    lo, hi = weekdays_before(entry["first_day"]), weekdays_before(entry["last_day"])
+                    self._add(service_name, lo, hi, 1)
+                    self._bookings.move(entry["booking_id"], entry["first_day"], entry["last_day"], self._open_days(lo, hi), entry["cost"])
+                    continue
+                lo = weekdays_before(entry["first_day"])
+                hi = weekdays_before(entry["last_day"] + 1) - 1
+                self._add(entry["service"], lo, hi, 1)
+                self._record_booking(entry["booking_id"], entry["service"], lo, hi, entry["cost"])
+
+    def open_waitlist(self):
+        # Waiting entries aren't journaled, so they would be lost on a restart that keeps the bookings
+        return None
+
+    def commit_all(self, hold_ids):
+        with self._changes_lock:
+            return self._commit_and_journal(hold_ids)
+
+    def _commit_and_journal(self, hold_ids):
+        holds = self._take_holds(hold_ids)
+        if holds is None:
+            return False
+        lines = "".join(
+            json.dumps({
+                "booking_id": hold_id,
+                "service": service_name,
+                "first_day": weekday_index_to_ordinal(lo),
+                "last_day": weekday_index_to_ordinal(hi),
+                "cost": cost,
+            }) + "\n"
+            for hold_id, (service_name, lo, hi, _, cost) in holds
+        )
+        self._append(lines)
+        return True
+
+    def cancel(self, booking_id):
+        with self._changes_lock:
+            if not super().cancel(booking_id):
+                return False
+            self._append(json.dumps({"op": "cancel", "booking_id": booking_id}) + "\n")
+        return True
+
+    def reschedule(self, booking_id, start_date, end_date, cost=0):
+        with self._changes_lock:
+            if not super().reschedule(booking_id, start_date, end_date, cost):
+                return False
+            booking = self.get_booking(booking_id)
+            self._append(json.dumps({
+                "op": "reschedule",
+                "booking_id": booking_id,
+                "first_day": booking["start"].toordinal(),
+                "last_day": booking["end"].toordinal(),
+                "cost": cost,
+            }) + "\n")
+        return True
+
+    def _append(self, lines):
+        with self._journal_lock:
+            self._journal.write(lines)
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
@@ -0,0 +1,162 @@
+"""
+Streaming bulk import of existing reservations from CSV or Parquet.
+
+Each row is one booking with the columns service, start and end (YYYY-MM-DD).
+Rows are read in chunks and applied one by one with the same validation,
+weekday and capacity rules as the Streamlit form (booking_core), so memory
+stays bounded however large the file is. A row that breaks a rule or would
+exceed capacity is rejected on its own, with its reason, and the import
+continues. Past dates are accepted, so historical bookings can be migrated too.
+The target must be a durable store (SQLite or the journal file); the in-memory one is refused.
+
+    BOOKING_DB=bookings.db python importer.py reservations.csv --rejects rejects.csv
+
+Parquet files need pyarrow (installed alongside Streamlit).
+"""
+import argparse
+import csv
+import datetime
+import os
+import sys
+
+import booking_core
+
+CHUNK_ROWS = 10000
+REQUIRED_COLUMNS = ["service", "start", "end"]
+REJECT_COLUMNS = ["row", "service", "start", "end", "reason"]
+
+
+# --- Readers ---
+def iter_csv_chunks(path, chunk_rows=CHUNK_ROWS):
+    """Yields lists of up to chunk_rows row dicts from a CSV file with a header line."""
+    # utf-8-sig: Excel's "CSV UTF-8" starts with a byte order mark, which would end up in the first column name
+    with open(path, newline="", encoding="utf-8-sig") as csv_file:
+        chunk = []
+        for row in csv.DictReader(csv_file):
+            chunk.append(row)
+            if len(chunk) >= chunk_rows:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def iter_parquet_chunks(path, chunk_rows=CHUNK_ROWS):
+    """Yields lists of up to chunk_rows row dicts from a Parquet file, one record batch at a time."""
+    for batch in _parquet_file(path).iter_batches(batch_size=chunk_rows, columns=REQUIRED_COLUMNS):
+        yield batch.to_pylist()
+
+
+def _parquet_file(path):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Reading Parquet files needs pyarrow: pip install pyarrow")
+    return pq.ParquetFile(path)
+
+
+def _is_parquet(path):
+    # .parquet/.pq, anything else is read as CSV
+    return os.path.splitext(path)[1].lower() in (".parquet", ".pq")
+
+
+def iter_chunks(path, chunk_rows=CHUNK_ROWS):
+    """Picks the reader from the file extension (.parquet/.pq, anything else is read as CSV)."""
+    if _is_parquet(path):
+        return iter_parquet_chunks(path, chunk_rows)
+    return iter_csv_chunks(path, chunk_rows)
+
+
+def read_columns(path):
+    """The column names of a file: the CSV header line, or the Parquet schema."""
+    if _is_parquet(path):
+        return _parquet_file(path).schema_arrow.names
+    with open(path, newline="", encoding="utf-8-sig") as csv_file:
+        return next(csv.reader(csv_file), [])
+
+
+# --- Import ---
+def _as_date(value):
+    # Parquet date columns arrive as datetime.date, CSV cells as strings
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    try:
+        return datetime.date.fromisoformat(str(value).strip())
+    except ValueError:
+        return None
+
+
+def import_row(store, row):
+    """Validates and books one row. Returns None on success or the rejection reason."""
+    service_name = row.get("service")
+    # Parquet cells keep their column type: anything but a known name is rejected, never raised on
+    if not isinstance(service_name, str) or service_name.strip() not in booking_core.PRICES:
+        return f"Unknown service {service_name!r}."
+    service_name = service_name.strip()
+    start_date, end_date = _as_date(row.get("start")), _as_date(row.get("end"))
+    if start_date is None or end_date is None:
+        return "start and end must be dates in YYYY-MM-DD format."
+    selections = {service_name: (start_date, end_date)}
+    errors = booking_core.validate_selection(selections)
+    if errors:
+        return errors[0]
+    _, hold_ids, errors = booking_core.check_and_reserve(store, selections)
+    if errors:
+        return errors[0]
+    if not booking_core.confirm_booking(store, hold_ids):
+        return "Reservation expired before it could be committed."
+    return None
+
+
+def import_bookings(store, chunks):
+    """
+    Applies every row of `chunks` to the store. Yields one rejection dict
+    (REJECT_COLUMNS) per row that could not be booked. Row numbers are 1-based data rows.
+    """
+    row_number = 0
+    for chunk in chunks:
+        for row in chunk:
+            row_number += 1
+            reason = import_row(store, row)
+            if reason is not None:
+                yield {
+                    "row": row_number,
+                    "service": row.get("service"),
+                    "start": row.get("start"),
+                    "end": row.get("end"),
+                    "reason": reason,
+                }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import bookings from CSV or Parquet into the configured booking store.")
+    parser.add_argument("path", help="CSV or Parquet file with service, start and end columns")
+    parser.add_argument("--rejects", help="write rejected rows to this CSV file (default: stderr)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="rows read per chunk")
+    args = parser.parse_args(argv)
+
+    # Checked once up front: a wrong header would otherwise reject every row on its own
+    missing = [column for column in REQUIRED_COLUMNS if column not in read_columns(args.path)]
+    if missing:
+        parser.error(f"{args.path} has no {', '.join(missing)} column(s); expected {', '.join(REQUIRED_COLUMNS)}.")
+    store = booking_core.open_default_store()
+    if not store.durable:
+        parser.error("the in-memory store would drop the import on exit: set BOOKING_DB (or BOOKING_STORE=file and BOOKING_DB).")
+    rejects_file = open(args.rejects, "w", newline="", encoding="utf-8") if args.rejects else sys.stderr
+    try:
+        writer = csv.DictWriter(rejects_file, fieldnames=REJECT_COLUMNS)
+        writer.writeheader()
+        rejected = 0
+        for rejection in import_bookings(store, iter_chunks(args.path, args.chunk_rows)):
+            writer.writerow(rejection)
+            rejected += 1
+    finally:
+        if args.rejects:
+            rejects_file.close()
+    print(f"Import finished, {rejected} row(s) rejected.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,416 @@
+import contextlib
+import datetime
+import heapq
+import threading
+import time
+import uuid
+
+import numpy as np
+
+from booking_records import BookingRecords
+from booking_store import BOOKING_CONFIRMED, EXPORT_CHUNK_ROWS, BookingStore
+from capacity import as_calendar
+from occupancy import OccupancyMatrix
+from waitlist import Waitlist
+from weekdays import closed_indices, weekday_index_range, weekday_index_to_date, weekday_index_to_ordinal, weekdays_before
+
+# How long a reservation keeps its seats before it must be committed.
+HOLD_TTL_SECONDS = 600
+# Weekday slots allocated up front per service (about two years); the index grows past this on demand.
+INITIAL_HORIZON_WEEKDAYS = 520
+# Seats given back between two compactions: each one scans the whole index, so releases share its cost.
+COMPACT_EVERY_RELEASES = 256
+
+
+class CapacityLedger(BookingStore):
+    """
+    Process-wide booking counts per (weekday, service).
+
+    A single instance is shared by every Streamlit session (see get_ledger in
+    booking_app.py). Counts live in an occupancy index with one row per weekday
+    number and one column per service: by default a dense OccupancyMatrix, where
+    checking or reserving a whole range is one vectorized slice operation;
+    segment_tree.SegmentTreeIndex can be passed instead for O(log n) range
+    operations over very long horizons. Each service has its own lock, so
+    sessions booking different services never contend; growing the index
+    takes all of them. A day is full once its count reaches its seats in the
+    capacity calendar; a range is compared with the calendar in one vectorized step.
+    Closure days (weekdays.set_closures) keep the seats of the bookings spanning
+    them, so counts stay consistent when closures change, but are never full.
+    """
+
+    def __init__(self, capacity, service_names, hold_ttl=HOLD_TTL_SECONDS, index_class=OccupancyMatrix):
+        self.capacity = as_calendar(capacity, service_names)
+        self.service_names = list(service_names)
+        self.hold_ttl = hold_ttl
+        origin = weekdays_before(datetime.date.today().toordinal())
+        # Counts include held seats.
+        self._occupancy = index_class(origin, INITIAL_HORIZON_WEEKDAYS, len(service_names))
+        self._columns = {name: col for col, name in enumerate(service_names)}
+        self._locks = {name: threading.Lock() for name in service_names}
+        # hold_id -> (service_name, lo, hi, expires_at, cost); the heap orders holds by expiry for cheap sweeping.
+        self._holds = {}
+        self._expiry_heap = []
+        self._holds_lock = threading.Lock()
+        # Releases, expiries and cancellations since the last compaction (counted under _holds_lock)
+        self._releases = 0
+        # Committed holds become records here, under the same id
+        self._bookings = BookingRecords()
+        # Serialises cancellations and reschedules, so one booking's seats can't be moved twice at once
+        # (re-entrant so subclasses can hold it around a change and their own bookkeeping)
+        self._changes_lock = threading.RLock()
+        # Called with the (service_name, start_date, end_date) ranges whose seats were given back
+        self._freed_listeners = []
+
+    def add_freed_listener(self, listener):
+        """
+        Calls `listener(freed_ranges)` whenever seats are given back: a release, an expired hold,
+        a cancellation or the old range of a reschedule. It runs after the store has let go of its
+        locks, on the thread that freed the seats, and may book into the store.
+        """
+        self._freed_listeners.append(listener)
+
+    def _seats_freed(self, spans):
+        """Tells the listeners about freed (service_name, lo, hi) index spans."""
+        if spans and self._freed_listeners:
+            freed_ranges = [
+                (service_name, weekday_index_to_date(lo), weekday_index_to_date(hi)) for service_name, lo, hi in spans
+            ]
+            for listener in self._freed_listeners:
+                listener(freed_ranges)
+
+    def open_waitlist(self):
+        """A waitlist.Waitlist kept in memory next to the counts, promoted through the freed-seat listeners."""
+        return Waitlist(self)
+
+    def get_count(self, ordinal, service_name):
+        """Returns the number of bookings (including held seats) on the day with this ordinal."""
+        if (ordinal - 1) % 7 >= 5:  # weekends are never booked
+            return 0
+        return self._occupancy.get(self._columns[service_name], weekdays_before(ordinal))
+
+    def _full_days(self, service_name, lo, hi):
+        """
+        Weekday indices in [lo, hi] whose count has reached the service's seats (the caller
+        holds the service lock). If even the busiest day is below the fewest seats of the
+        range, that is the answer without building either range (O(log n) on a segment tree).
+        If every day of the range has the same seats, the index lists the days at that count
+        itself (O(log n + k) on a segment tree); otherwise the counts are compared with the
+        calendar's seats in one step.
+        """
+        col = self._columns[service_name]
+        if lo > hi:
+            return []
+        fewest = self.capacity.fewest_seats(service_name, lo, hi)
+        if self._occupancy.max(col, lo, hi) < fewest:
+            return []
+        if fewest > 0 and fewest == self.capacity.most_seats(service_name, lo, hi):
+            full = self._occupancy.at_least(col, lo, hi, fewest)
+            closed = closed_indices(lo, hi)
+            if closed.size:
+                closed = set(closed.tolist())
+                full = [index for index in full if index not in closed]
+            return full
+        full = self._occupancy.window(lo, hi)[:, col] >= self.capacity.column(service_name, lo, hi)
+        full[closed_indices(lo, hi) - lo] = False
+        return (np.flatnonzero(full) + lo).tolist()
+
+    def is_range_available(self, service_name, start_date, end_date):
+        """True if no weekday in [start_date, end_date] is at capacity for the service."""
+        self._expire_holds()
+        lo, hi = weekday_index_range(start_date, end_date)
+        with self._locks[service_name]:
+            return not self._full_days(service_name, lo, hi)
+
+    def check_range(self, service_name, start_date, end_date):
+        """Returns the weekdays in [start_date, end_date] that are at capacity for the service."""
+        self._expire_holds()
+        lo, hi = weekday_index_range(start_date, end_date)
+        with self._locks[service_name]:
+            full = self._full_days(service_name, lo, hi)
+        return [weekday_index_to_date(index) for index in full]
+
+    def count_full_days(self, queries):
+        """
+        One window of the index over the span of all queries is compared with the calendar
+        in one step; prefix counts of the full slots then answer every query with two lookups.
+        """
+        self._expire_holds()
+        if not queries:
+            return []
+        cols, los, his = [], [], []
+        for service_name, start_date, end_date in queries:
+            lo, hi = weekday_index_range(start_date, end_date)
+            cols.append(self._columns[service_name])
+            los.append(lo)
+            his.append(max(hi, lo - 1))  # a range without weekdays counts nothing
+        first, last = min(los), max(his)
+        seats = self.capacity.window(first, last)
+        with self._all_locks():
+            full = self._occupancy.window(first, last) >= seats
+        full[closed_indices(first, last) - first] = False
+        prefix = np.zeros((last - first + 2, len(self.service_names)), dtype=np.int32)
+        np.cumsum(full, axis=0, out=prefix[1:])
+        cols = np.asarray(cols, dtype=np.intp)
+        starts = np.asarray(los, dtype=np.int64) - first
+        stops = np.asarray(his, dtype=np.int64) + 1 - first
+        return (prefix[stops, cols] - prefix[starts, cols]).tolist()
+
+    @contextlib.contextmanager
+    def _all_locks(self):
+        """Holds every service lock (always taken in column order, so it can't deadlock)."""
+        locks = [self._locks[name] for name in self._columns]
+        for lock in locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+    def _ensure_covered(self, lo, hi):
+        """Grows the index to cover [lo, hi]; the reallocation happens with every service locked."""
+        if self._occupancy.covers(lo, hi):
+            return
+        with self._all_locks():
+            if not self._occupancy.covers(lo, hi):
+                self._occupancy.grow(lo, hi)
+
+    def _add(self, service_name, lo, hi, delta):
+        self._ensure_covered(lo, hi)
+        with self._locks[service_name]:
+            self._occupancy.add(self._columns[service_name], lo, hi, delta)
+
+    def _expire_holds(self):
+        """Releases every hold whose time limit has passed."""
+        now = time.monotonic()
+        expired = []
+        with self._holds_lock:
+            while self._expiry_heap and self._expiry_heap[0][0] <= now:
+                _, hold_id = heapq.heappop(self._expiry_heap)
+                hold = self._holds.get(hold_id)
+                # A renewed hold has a later entry of its own further down the heap
+                if hold is not None and hold[3] <= now:
+                    expired.append(self._holds.pop(hold_id))
+        for hold in expired:
+            self._add(hold[0], hold[1], hold[2], -1)
+        if expired:
+            self._released(len(expired))
+            self._seats_freed([hold[:3] for hold in expired])
+
+    def reserve_range(self, service_name, start_date, end_date, cost=0):
+        """
+        Atomically holds one seat for the service on every weekday in [start_date, end_date].
+        Returns a hold_id, or None if any of those days is already at capacity
+        (in which case nothing is held and the ledger is left untouched). The hold
+        lapses after `hold_ttl` seconds unless committed; `cost` goes on the booking
+        record it turns into. Raises ValueError if the range has no weekdays.
+        """
+        lo, hi = weekday_index_range(start_date, end_date)
+        if lo > hi or not self._open_days(lo, hi):
+            raise ValueError("Range contains no weekdays.")
+        self._expire_holds()
+        col = self._columns[service_name]
+        while True:
+            with self._locks[service_name]:
+                # Unallocated days read as zero, so a refused request never grows the index
+                if self._full_days(service_name, lo, hi):
+                    return None
+                if self._occupancy.covers(lo, hi):
+                    self._occupancy.add(col, lo, hi, 1)
+                    break
+            self._ensure_covered(lo, hi)
+
+        hold_id = uuid.uuid4().hex
+        expires_at = time.monotonic() + self.hold_ttl
+        with self._holds_lock:
+            self._holds[hold_id] = (service_name, lo, hi, expires_at, cost)
+            heapq.heappush(self._expiry_heap, (expires_at, hold_id))
+        return hold_id
+
+    def renew(self, hold_id):
+        """Extends a live hold to `hold_ttl` seconds from now. Returns False if it is unknown or expired."""
+        now = time.monotonic()
+        with self._holds_lock:
+            hold = self._holds.get(hold_id)
+            if hold is None or hold[3] <= now:
+                return False
+            expires_at = now + self.hold_ttl
+            self._holds[hold_id] = hold[:3] + (expires_at,) + hold[4:]
+            heapq.heappush(self._expiry_heap, (expires_at, hold_id))
+        return True
+
+    def commit_all(self, hold_ids):
+        """
+        Commits several holds as one unit: either all of them become bookings, or
+        (if any is unknown or expired) none do and the remaining ones are released.
+        """
+        return self._take_holds(hold_ids) is not None
+
+    def _take_holds(self, hold_ids):
+        """
+        Commit step shared with subclasses: records the holds as bookings and returns them as
+        (hold_id, (service_name, lo, hi, expires_at, cost)) pairs, or returns None after
+        releasing whatever was left if any hold was unknown or expired.
+        """
+        now = time.monotonic()
+        with self._holds_lock:
+            holds = [self._holds.pop(hold_id, None) for hold_id in hold_ids]
+        if all(hold is not None and hold[3] > now for hold in holds):
+            committed = list(zip(hold_ids, holds))
+            for hold_id, (service_name, lo, hi, _, cost) in committed:
+                self._record_booking(hold_id, service_name, lo, hi, cost)
+            return committed
+        released = [hold for hold in holds if hold is not None]
+        for hold in released:
+            self._add(hold[0], hold[1], hold[2], -1)
+        self._seats_freed([hold[:3] for hold in released])
+        return None
+
+    @staticmethod
+    def _open_days(lo, hi):
+        """Number of weekdays in [lo, hi] that aren't closures, the days a booking is charged for."""
+        return hi - lo + 1 - closed_indices(lo, hi).size
+
+    def _record_booking(self, booking_id, service_name, lo, hi, cost):
+        self._bookings.add(
+            booking_id, service_name, weekday_index_to_ordinal(lo), weekday_index_to_ordinal(hi), self._open_days(lo, hi), cost
+        )
+
+    def get_booking(self, booking_id):
+        """Returns the booking_record dict of a booking, or None if the ID is unknown."""
+        return self._bookings.get(booking_id)
+
+    def booking_ids_on(self, ordinal, service_name=None):
+        """IDs of the bookings (of any status) covering the day, in O(log n) plus the bookings near it."""
+        return self._bookings.ids_on(ordinal, service_name)
+
+    def iter_bookings(self, start_date=None, end_date=None, chunk_rows=EXPORT_CHUNK_ROWS):
+        first = start_date.toordinal() if start_date is not None else 1
+        last = end_date.toordinal() if end_date is not None else datetime.date.max.toordinal()
+        return self._bookings.iter_range(first, last, chunk_rows)
+
+    def cancel(self, booking_id):
+        """Cancels a confirmed booking and gives its seats back. Returns False if it isn't a confirmed booking."""
+        with self._changes_lock:
+            record = self._bookings.cancel(booking_id)
+            if record is None:
+                return False
+            self._add(record[0], weekdays_before(record[1]), weekdays_before(record[2]), -1)
+        self._released()
+        self._seats_freed([(record[0], weekdays_before(record[1]), weekdays_before(record[2]))])
+        return True
+
+    def reschedule(self, booking_id, start_date, end_date, cost=0):
+        """
+        Moves a confirmed booking to [start_date, end_date]: under the service lock its seats leave
+        the old range and take the new one, so nobody can grab them in between and days in both
+        ranges keep the booking's seat. Returns False, changing nothing, if it isn't a confirmed
+        booking or a day of the new range is full. Raises ValueError if the range has no weekdays.
+        """
+        lo, hi = weekday_index_range(start_date, end_date)
+        if lo > hi or not self._open_days(lo, hi):
+            raise ValueError("Range contains no weekdays.")
+        self._expire_holds()
+        with self._changes_lock:
+            record = self._bookings.get_tuple(booking_id)
+            if record is None or record[5] != BOOKING_CONFIRMED:
+                return False
+            service_name = record[0]
+            col = self._columns[service_name]
+            old_lo, old_hi = weekdays_before(record[1]), weekdays_before(record[2])
+            while True:
+                with self._locks[service_name]:
+                    if self._occupancy.covers(lo, hi):
+                        self._occupancy.add(col, old_lo, old_hi, -1)
+                        if self._full_days(service_name, lo, hi):
+                            self._occupancy.add(col, old_lo, old_hi, 1)
+                            return False
+                        self._occupancy.add(col, lo, hi, 1)
+                        break
+                self._ensure_covered(lo, hi)
+            self._bookings.move(
+                booking_id, weekday_index_to_ordinal(lo), weekday_index_to_ordinal(hi), self._open_days(lo, hi), cost
+            )
+        # Days of the old range that the new one keeps are still taken; listeners find them full
+        self._seats_freed([(service_name, old_lo, old_hi)])
+        return True
+
+    def release(self, hold_id):
+        """Gives the seats of an uncommitted hold back. Unknown/expired ids are ignored."""
+        with self._holds_lock:
+            hold = self._holds.pop(hold_id, None)
+        if hold is not None:
+            self._add(hold[0], hold[1], hold[2], -1)
+            self._released()
+            self._seats_freed([hold[:3]])
+
+    def _released(self, count=1):
+        """
+        Counts seats given back and compacts once every COMPACT_EVERY_RELEASES of them, so a
+        release stays O(log n) on a segment tree. An index within twice the default horizon is
+        never compacted, so it isn't scanned either.
+        """
+        with self._holds_lock:
+            self._releases += count
+            if self._releases < COMPACT_EVERY_RELEASES:
+                return
+            self._releases = 0
+        if self._occupancy.size > 2 * INITIAL_HORIZON_WEEKDAYS:
+            self.compact()
+
+    def compact(self):
+        """
+        Drops the empty rows that released or expired holds leave behind, so memory
+        follows the days that actually hold bookings. The default horizon from today
+        is always kept, and nothing is reallocated unless at least half the rows would go.
+        """
+        keep_lo = weekdays_before(datetime.date.today().toordinal())
+        keep_hi = keep_lo + INITIAL_HORIZON_WEEKDAYS - 1
+        with self._all_locks():
+            span = self._occupancy.nonzero_span()
+            if span is not None:
+                keep_lo, keep_hi = min(keep_lo, span[0]), max(keep_hi, span[1])
+            if self._occupancy.size > 2 * (keep_hi - keep_lo + 1):
+                self._occupancy.resize(keep_lo, keep_hi)
+
+    def iter_occupancy(self, start_date=None, end_date=None, chunk_rows=EXPORT_CHUNK_ROWS):
+        """
+        Walks the index one window of weekdays at a time, each window copied under the locks,
+        so an export never copies the whole ledger or blocks bookings for long.
+        """
+        with self._all_locks():
+            span = self._occupancy.nonzero_span()
+        if span is None:
+            return
+        lo, hi = span
+        if start_date is not None:
+            lo = max(lo, weekdays_before(start_date.toordinal()))
+        if end_date is not None:
+            hi = min(hi, weekdays_before(end_date.toordinal() + 1) - 1)
+        service_names = list(self._columns)
+        window = max(1, chunk_rows // len(service_names))
+        for window_lo in range(lo, hi + 1, window):
+            with self._all_locks():
+                slots = list(self._occupancy.nonzero(window_lo, min(window_lo + window - 1, hi)))
+            if slots:
+                yield [(weekday_index_to_ordinal(index), service_names[col], count) for index, col, count in slots]
+
+    def count_window(self, start_date, end_date):
+        """One slice of the occupancy index, copied under the locks."""
+        lo, hi = weekday_index_range(start_date, end_date)
+        with self._all_locks():
+            return self._occupancy.window(lo, hi)
+
+    def snapshot(self):
+        """
+        Returns a plain {day_ordinal: {service_name: count}} copy of the non-zero days.
+        Keys are ints (date.toordinal()); formatting them is left to the display layer.
+        """
+        service_names = list(self._columns)
+        result = {}
+        with self._all_locks():
+            slots = list(self._occupancy.nonzero())
+        for index, col, count in slots:
+            result.setdefault(weekday_index_to_ordinal(index), {})[service_names[col]] = count
+        return result
@@ -0,0 +1,91 @@
+import numpy as np
+
+# Counts never exceed a day's capacity, so 16 bits leave plenty of headroom at 2 bytes per slot.
+OCCUPANCY_DTYPE = np.int16
+
+
+class OccupancyMatrix:
+    """
+    Dense occupancy store: one row per weekday index in [origin, origin + rows),
+    one column per service.
+
+    Range checks and range increments are single vectorized slice operations
+    (e.g. (occ[a:b, s] >= cap).any()), and two years of two services fit in about 2 KB.
+    Reads outside the allocated rows see zeros; call grow() before writing there.
+    """
+
+    def __init__(self, origin, size, n_columns):
+        self.origin = origin
+        self._occ = np.zeros((max(1, size), n_columns), dtype=OCCUPANCY_DTYPE)
+
+    @property
+    def size(self):
+        return self._occ.shape[0]
+
+    @property
+    def nbytes(self):
+        return self._occ.nbytes
+
+    def covers(self, lo, hi):
+        return self.origin <= lo and hi < self.origin + self.size
+
+    def grow(self, lo, hi):
+        """Reallocates so that [lo, hi] is covered (at least doubling), keeping current counts."""
+        new_origin = min(lo, self.origin)
+        new_end = max(hi + 1, self.origin + self.size, new_origin + 2 * self.size)
+        self.resize(new_origin, new_end - 1)
+
+    def resize(self, lo, hi):
+        """Reallocates to exactly the rows [lo, hi]; counts outside that span are dropped."""
+        self._occ = self.window(lo, hi)
+        self.origin = lo
+
+    def window(self, lo, hi):
+        """Copy of the rows [lo, hi], one column per service (zeros where nothing is allocated)."""
+        occ = np.zeros((max(hi - lo + 1, 0), self._occ.shape[1]), dtype=OCCUPANCY_DTYPE)
+        rows = self._slice(lo, hi)
+        start = rows.start + self.origin - lo
+        occ[start:start + rows.stop - rows.start] = self._occ[rows]
+        return occ
+
+    def nonzero_span(self):
+        """(first, last) positions holding any non-zero count, or None if everything is zero."""
+        rows = np.flatnonzero(self._occ.any(axis=1))
+        if not rows.size:
+            return None
+        return self.origin + int(rows[0]), self.origin + int(rows[-1])
+
+    def _slice(self, lo, hi):
+        """Row slice for [lo, hi] clipped to the allocated rows."""
+        return slice(max(lo - self.origin, 0), max(min(hi + 1 - self.origin, self.size), 0))
+
+    def add(self, col, lo, hi, delta):
+        """Adds `delta` to every row in [lo, hi] of the column. The range must be covered."""
+        self._occ[lo - self.origin:hi + 1 - self.origin, col] += delta
+
+    def max(self, col, lo, hi):
+        """Largest count in [lo, hi] of the column (0 for an empty or unallocated range)."""
+        window = self._occ[self._slice(lo, hi), col]
+        return int(window.max()) if window.size else 0
+
+    def at_least(self, col, lo, hi, threshold):
+        """Row positions in [lo, hi] whose count is >= threshold."""
+        rows = self._slice(lo, hi)
+        hits = np.flatnonzero(self._occ[rows, col] >= threshold)
+        return (hits + (rows.start + self.origin)).tolist()
+
+    def get(self, col, position):
+        offset = position - self.origin
+        if not 0 <= offset < self.size:
+            return 0
+        return int(self._occ[offset, col])
+
+    def nonzero(self, lo=None, hi=None):
+        """Yields (position, col, count) for every non-zero slot in [lo, hi] (default: all), in position order."""
+        rows = self._slice(self.origin if lo is None else lo, self.origin + self.size - 1 if hi is None else hi)
+        window = self._occ[rows]
+        offsets, cols = np.nonzero(window)
+        counts = window[offsets, cols]
+        first = self.origin + rows.start
+        for offset, col, count in zip(offsets.tolist(), cols.tolist(), counts.tolist()):
+            yield first + offset, col, count
@@ -0,0 +1,198 @@
+import numpy as np
+
+from occupancy import OCCUPANCY_DTYPE
+
+
+class MaxSegmentTree:
+    """
+    Range-add / range-max tree over integer positions [origin, origin + size).
+
+    Each node stores the max of its subtree plus a pending add that applies to the
+    whole subtree, so range updates never need to push values down. Reads outside
+    the covered span see zeros; adds outside it grow the tree.
+    """
+
+    def __init__(self, origin=0, size=1):
+        self.origin = origin
+        self._init(max(1, size))
+
+    def _init(self, size):
+        n = 1
+        while n < size:
+            n *= 2
+        self.size = n
+        self._max = [0] * (2 * n)
+        self._add = [0] * (2 * n)
+
+    def grow(self, lo, hi):
+        """Rebuilds the tree so that [lo, hi] is covered, keeping current values."""
+        values = self.values()
+        new_origin = min(lo, self.origin)
+        new_end = max(hi + 1, self.origin + self.size)
+        old_origin = self.origin
+        self.origin = new_origin
+        self._init(2 * (new_end - new_origin))
+        for offset, value in enumerate(values):
+            if value:
+                self.add(old_origin + offset, old_origin + offset, value)
+
+    def _clip(self, lo, hi):
+        return max(lo, self.origin) - self.origin, min(hi, self.origin + self.size - 1) - self.origin
+
+    def add(self, lo, hi, delta):
+        """Adds `delta` to every position in [lo, hi]."""
+        if lo > hi:
+            return
+        if lo < self.origin or hi >= self.origin + self.size:
+            self.grow(lo, hi)
+        self._update(1, 0, self.size - 1, lo - self.origin, hi - self.origin, delta)
+
+    def _update(self, node, node_lo, node_hi, lo, hi, delta):
+        if hi < node_lo or node_hi < lo:
+            return
+        if lo <= node_lo and node_hi <= hi:
+            self._max[node] += delta
+            self._add[node] += delta
+            return
+        mid = (node_lo + node_hi) // 2
+        self._update(2 * node, node_lo, mid, lo, hi, delta)
+        self._update(2 * node + 1, mid + 1, node_hi, lo, hi, delta)
+        self._max[node] = max(self._max[2 * node], self._max[2 * node + 1]) + self._add[node]
+
+    def max(self, lo, hi):
+        """Largest value in [lo, hi] in O(log n). 0 for positions the tree doesn't cover."""
+        clipped_lo, clipped_hi = self._clip(lo, hi)
+        if clipped_lo > clipped_hi:
+            return 0
+        result = self._query(1, 0, self.size - 1, clipped_lo, clipped_hi)
+        if clipped_lo > lo - self.origin or clipped_hi < hi - self.origin:
+            result = max(result, 0)
+        return result
+
+    def _query(self, node, node_lo, node_hi, lo, hi):
+        if lo <= node_lo and node_hi <= hi:
+            return self._max[node]
+        mid = (node_lo + node_hi) // 2
+        if hi <= mid:
+            best = self._query(2 * node, node_lo, mid, lo, hi)
+        elif lo > mid:
+            best = self._query(2 * node + 1, mid + 1, node_hi, lo, hi)
+        else:
+            best = max(self._query(2 * node, node_lo, mid, lo, hi),
+                       self._query(2 * node + 1, mid + 1, node_hi, lo, hi))
+        return best + self._add[node]
+
+    def at_least(self, lo, hi, threshold):
+        """Positions in [lo, hi] whose value is >= threshold, in O(log n + k)."""
+        clipped_lo, clipped_hi = self._clip(lo, hi)
+        found = []
+        if clipped_lo <= clipped_hi:
+            self._collect(1, 0, self.size - 1, clipped_lo, clipped_hi, threshold, 0, found)
+        return found
+
+    def _collect(self, node, node_lo, node_hi, lo, hi, threshold, inherited, found):
+        # `inherited` is the sum of pending adds of all ancestors
+        if hi < node_lo or node_hi < lo or self._max[node] + inherited < threshold:
+            return
+        if node_lo == node_hi:
+            found.append(self.origin + node_lo)
+            return
+        inherited += self._add[node]
+        mid = (node_lo + node_hi) // 2
+        self._collect(2 * node, node_lo, mid, lo, hi, threshold, inherited, found)
+        self._collect(2 * node + 1, mid + 1, node_hi, lo, hi, threshold, inherited, found)
+
+    def get(self, position):
+        """Value at a single position (0 outside the covered span)."""
+        offset = position - self.origin
+        if not 0 <= offset < self.size:
+            return 0
+        node = offset + self.size
+        value = self._max[node]
+        node //= 2
+        while node:
+            value += self._add[node]
+            node //= 2
+        return value
+
+    def values(self):
+        """All covered values, position `origin` first."""
+        totals = [0] * (2 * self.size)
+        totals[1] = self._add[1]
+        for node in range(2, 2 * self.size):
+            totals[node] = totals[node // 2] + self._add[node]
+        # Leaves have no children, so their stored max already includes their own pending add
+        return [totals[node // 2] + self._max[node] for node in range(self.size, 2 * self.size)]
+
+
+class SegmentTreeIndex:
+    """
+    One MaxSegmentTree per column, behind the same interface as occupancy.OccupancyMatrix.
+    Checks and updates are O(log n) rather than O(range), which pays off for very long horizons.
+    """
+
+    def __init__(self, origin, size, n_columns):
+        self._trees = [MaxSegmentTree(origin, size) for _ in range(n_columns)]
+
+    @property
+    def origin(self):
+        return self._trees[0].origin
+
+    @property
+    def size(self):
+        return self._trees[0].size
+
+    def covers(self, lo, hi):
+        return self.origin <= lo and hi < self.origin + self.size
+
+    def grow(self, lo, hi):
+        for tree in self._trees:
+            tree.grow(lo, hi)
+
+    def resize(self, lo, hi):
+        """Rebuilds every tree over exactly [lo, hi]; values outside that span are dropped."""
+        for col, tree in enumerate(self._trees):
+            values = tree.values()
+            rebuilt = MaxSegmentTree(lo, hi - lo + 1)
+            for offset, value in enumerate(values):
+                position = tree.origin + offset
+                if value and lo <= position <= hi:
+                    rebuilt.add(position, position, value)
+            self._trees[col] = rebuilt
+
+    def nonzero_span(self):
+        """(first, last) positions holding any non-zero value, or None if everything is zero."""
+        positions = [position for position, _, _ in self.nonzero()]
+        if not positions:
+            return None
+        return positions[0], positions[-1]
+
+    def add(self, col, lo, hi, delta):
+        self._trees[col].add(lo, hi, delta)
+
+    def max(self, col, lo, hi):
+        return self._trees[col].max(lo, hi)
+
+    def at_least(self, col, lo, hi, threshold):
+        return self._trees[col].at_least(lo, hi, threshold)
+
+    def get(self, col, position):
+        return self._trees[col].get(position)
+
+    def window(self, lo, hi):
+        """Rows [lo, hi] as an array with one column per tree, like OccupancyMatrix.window."""
+        occ = np.zeros((max(hi - lo + 1, 0), len(self._trees)), dtype=OCCUPANCY_DTYPE)
+        for position, col, count in self.nonzero(lo, hi):
+            occ[position - lo, col] = count
+        return occ
+
+    def nonzero(self, lo=None, hi=None):
+        """Yields (position, col, count) for every non-zero slot in [lo, hi] (default: all), in position order."""
+        lo = self.origin if lo is None else lo
+        hi = self.origin + self.size - 1 if hi is None else hi
+        # Counts are never negative, so the non-zero slots are exactly those >= 1
+        slots = sorted(
+            (position, col) for col, tree in enumerate(self._trees) for position in tree.at_least(lo, hi, 1)
+        )
+        for position, col in slots:
+            yield position, col, self._trees[col].get(position)
@@ -0,0 +1,637 @@
+import datetime
+import sqlite3
+import threading
+import time
+import uuid
+
+import numpy as np
+
+from booking_store import BOOKING_CANCELLED, BOOKING_CONFIRMED, EXPORT_CHUNK_ROWS, BookingStore, booking_record
+from capacity import as_calendar
+from ledger import HOLD_TTL_SECONDS
+from waitlist import ENTRY_FIELDS, WAITLIST_EXPIRED, WAITLIST_PROMOTED, WAITLIST_WAITING, WAITLIST_WITHDRAWN
+from weekdays import (
+    cached_count_weekdays,
+    cached_weekday_ordinals,
+    closed_indices,
+    weekday_index_range,
+    weekday_index_to_ordinal,
+    weekdays_before,
+)
+
+# Seats per day come from the capacity calendar, not the file, so the CHECK constraint
+# only rules out negative counts; the capacity check runs inside each write transaction.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS occupancy (
+    service TEXT NOT NULL,
+    day INTEGER NOT NULL,  -- date.toordinal(), weekdays only
+    count INTEGER NOT NULL DEFAULT 0 CHECK (count >= 0),
+    PRIMARY KEY (service, day)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS holds (
+    hold_id TEXT PRIMARY KEY,
+    service TEXT NOT NULL,
+    first_day INTEGER NOT NULL,
+    last_day INTEGER NOT NULL,
+    expires_at REAL NOT NULL,  -- time.time(), shared by every process using the file
+    cost NUMERIC NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS holds_by_expiry ON holds (expires_at);
+CREATE TABLE IF NOT EXISTS bookings (
+    booking_id TEXT PRIMARY KEY,  -- the id of the hold it was committed from
+    service TEXT NOT NULL,
+    first_day INTEGER NOT NULL,  -- ordinals of the first and last booked weekday
+    last_day INTEGER NOT NULL,
+    num_days INTEGER NOT NULL,
+    cost NUMERIC NOT NULL,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    day_key INTEGER NOT NULL  -- id of its booking_days entry
+);
+CREATE INDEX IF NOT EXISTS bookings_by_first_day ON bookings (first_day, booking_id);
+-- R*Tree over the booking ranges, so the bookings covering a day are one index lookup however
+-- long the longest booking is. Ordinals are stored exactly: they stay far below 2**24.
+CREATE VIRTUAL TABLE IF NOT EXISTS booking_days USING rtree(id, first_day, last_day, +booking_id, +service);
+CREATE TABLE IF NOT EXISTS waitlist (
+    seq INTEGER PRIMARY KEY,  -- request order
+    entry_id TEXT NOT NULL UNIQUE,
+    service TEXT NOT NULL,
+    first_day INTEGER NOT NULL,  -- ordinals of the requested start and end
+    last_day INTEGER NOT NULL,
+    num_days INTEGER NOT NULL,
+    cost NUMERIC NOT NULL,
+    requested_at REAL NOT NULL,
+    status TEXT NOT NULL,
+    booking_id TEXT  -- set once promoted
+);
+-- Waiting entries in request order for promotion, and by start day for expiry
+CREATE INDEX IF NOT EXISTS waitlist_queue ON waitlist (service, seq, first_day, last_day) WHERE status = 'waiting';
+CREATE INDEX IF NOT EXISTS waitlist_by_start ON waitlist (service, first_day) WHERE status = 'waiting';
+"""
+
+# Runs of free days a promotion query filters on one by one (two bound parameters each)
+MAX_BOUND_RUNS = 200
+
+
+class _Full(Exception):
+    """Raised inside a reservation transaction to roll it back when a day is at capacity."""
+
+
+class SQLiteLedger(BookingStore):
+    """
+    Durable BookingStore kept in a SQLite file.
+
+    The database runs in WAL mode so readers never block the writer, and every write
+    is a short BEGIN IMMEDIATE transaction, so several server processes on the same
+    host can share one file. A reservation reads the rows of its range that could be
+    full (count at or above the fewest seats of the range, through the primary key),
+    compares them with the capacity calendar in one vectorized step, and then adds
+    its seat with one batched UPDATE ... SET count = count + 1 WHERE day BETWEEN ? AND ?,
+    all in the same write transaction, so no other writer can get in between.
+    Every process sharing a file should be given the same calendar.
+    Each thread gets its own connection (sqlite3 connections can't be shared).
+    """
+
+    durable = True
+
+    def __init__(self, path, capacity, service_names, hold_ttl=HOLD_TTL_SECONDS):
+        self.path = path
+        self.capacity = as_calendar(capacity, service_names)
+        self.service_names = list(service_names)
+        self.hold_ttl = hold_ttl
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None: transactions are opened explicitly with BEGIN IMMEDIATE
+            conn = sqlite3.connect(self.path, isolation_level=None, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _write(self, work):
+        """Runs work(conn) inside one BEGIN IMMEDIATE transaction and returns its result."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = work(conn)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return result
+
+    def _release_holds(self, conn, holds):
+        """Gives the seats of (hold_id, service, first_day, last_day) holds back, to the waitlist first."""
+        conn.executemany(
+            "UPDATE occupancy SET count = count - 1 WHERE service = ? AND day BETWEEN ? AND ?",
+            [(service, first_day, last_day) for _, service, first_day, last_day in holds],
+        )
+        conn.executemany(
+            "DELETE FROM occupancy WHERE service = ? AND day BETWEEN ? AND ? AND count = 0",
+            [(service, first_day, last_day) for _, service, first_day, last_day in holds],
+        )
+        conn.executemany("DELETE FROM holds WHERE hold_id = ?", [(hold[0],) for hold in holds])
+        self._promote_waiting(conn, [hold[1:] for hold in holds])
+
+    def _sweep_expired(self, conn):
+        expired = conn.execute(
+            "SELECT hold_id, service, first_day, last_day FROM holds WHERE expires_at <= ?", (time.time(),)
+        ).fetchall()
+        self._release_holds(conn, expired)
+
+    def _expire_holds(self):
+        """Releases every hold whose time limit has passed (no write transaction if there are none)."""
+        due = self._conn().execute("SELECT 1 FROM holds WHERE expires_at <= ? LIMIT 1", (time.time(),)).fetchone()
+        if due:
+            self._write(self._sweep_expired)
+
+    def get_count(self, ordinal, service_name):
+        """Returns the number of bookings (including held seats) on the day with this ordinal."""
+        row = self._conn().execute(
+            "SELECT count FROM occupancy WHERE service = ? AND day = ?", (service_name, ordinal)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def _full_days(self, conn, service_name, start_date, end_date):
+        """
+        Ordinals of the weekdays in [start_date, end_date] at the service's capacity. Only rows at or
+        above the fewest seats of the range are read; they are compared with the calendar in one step.
+        A day without seats is full even if nothing was ever booked on it; a closure day never is.
+        """
+        lo, hi = weekday_index_range(start_date, end_date)
+        if lo > hi:
+            return []
+        fewest = self.capacity.fewest_seats(service_name, lo, hi)
+        rows = conn.execute(
+            "SELECT day, count FROM occupancy WHERE service = ? AND day BETWEEN ? AND ? AND count >= ?",
+            (service_name, start_date.toordinal(), end_date.toordinal(), max(fewest, 1)),
+        ).fetchall()
+        if not rows and fewest > 0:
+            return []
+        seats = self.capacity.column(service_name, lo, hi)
+        full = seats <= 0
+        if rows:
+            days, counts = np.array(rows, dtype=np.int64).T
+            offsets = (days - 1) // 7 * 5 + np.minimum((days - 1) % 7, 5) - lo  # weekdays_before, vectorized
+            full[offsets] |= counts >= seats[offsets]
+        full[closed_indices(lo, hi) - lo] = False
+        return [weekday_index_to_ordinal(lo + offset) for offset in np.flatnonzero(full).tolist()]
+
+    def is_range_available(self, service_name, start_date, end_date):
+        """True if no weekday in [start_date, end_date] is at capacity for the service."""
+        self._expire_holds()
+        return not self._full_days(self._conn(), service_name, start_date, end_date)
+
+    def check_range(self, service_name, start_date, end_date):
+        """Returns the weekdays in [start_date, end_date] that are at capacity for the service."""
+        self._expire_holds()
+        return [datetime.date.fromordinal(day) for day in self._full_days(self._conn(), service_name, start_date, end_date)]
+
+    def count_full_days(self, queries):
+        self._expire_holds()
+        conn = self._conn()
+        # One read transaction so every answer comes from the same snapshot; the statement is compiled once
+        conn.execute("BEGIN")
+        try:
+            return [
+                len(self._full_days(conn, service_name, start_date, end_date))
+                for service_name, start_date, end_date in queries
+            ]
+        finally:
+            conn.execute("COMMIT")
+
+    @staticmethod
+    def _add_seat(conn, service_name, start_date, end_date):
+        """
+        Adds one seat on every weekday of the range (the caller has checked they aren't full),
+        closures included, so releasing the range later always finds its rows.
+        """
+        conn.executemany(
+            "INSERT OR IGNORE INTO occupancy (service, day) VALUES (?, ?)",
+            [(service_name, day) for day in cached_weekday_ordinals(start_date, end_date, include_closed=True).tolist()],
+        )
+        conn.execute(
+            "UPDATE occupancy SET count = count + 1 WHERE service = ? AND day BETWEEN ? AND ?",
+            (service_name, start_date.toordinal(), end_date.toordinal()),
+        )
+
+    def reserve_range(self, service_name, start_date, end_date, cost=0):
+        """
+        Atomically holds one seat for the service on every weekday in [start_date, end_date].
+        Returns a hold_id, or None if any of those days is already at capacity
+        (in which case nothing is held). Raises ValueError if the range has no weekdays.
+        """
+        num_days = cached_count_weekdays(start_date, end_date)
+        if not num_days:
+            raise ValueError("Range contains no weekdays.")
+        first_day, last_day = start_date.toordinal(), end_date.toordinal()
+        hold_id = uuid.uuid4().hex
+
+        def work(conn):
+            self._sweep_expired(conn)
+            if self._full_days(conn, service_name, start_date, end_date):
+                raise _Full()
+            self._add_seat(conn, service_name, start_date, end_date)
+            conn.execute(
+                "INSERT INTO holds (hold_id, service, first_day, last_day, expires_at, cost) VALUES (?, ?, ?, ?, ?, ?)",
+                (hold_id, service_name, first_day, last_day, time.time() + self.hold_ttl, cost),
+            )
+            return hold_id
+
+        try:
+            return self._write(work)
+        except _Full:
+            return None
+
+    def renew(self, hold_id):
+        """Extends a live hold to `hold_ttl` seconds from now. Returns False if it is unknown or expired."""
+        def work(conn):
+            now = time.time()
+            return conn.execute(
+                "UPDATE holds SET expires_at = ? WHERE hold_id = ? AND expires_at > ?", (now + self.hold_ttl, hold_id, now)
+            ).rowcount == 1
+
+        return self._write(work)
+
+    def commit_all(self, hold_ids):
+        """
+        Commits several holds as one unit: either all of them become bookings, or
+        (if any is unknown or expired) none do and the remaining ones are released.
+        """
+        now = time.time()
+
+        def work(conn):
+            holds = []
+            costs = []
+            live = True
+            for hold_id in hold_ids:
+                row = conn.execute(
+                    "SELECT hold_id, service, first_day, last_day, expires_at, cost FROM holds WHERE hold_id = ?", (hold_id,)
+                ).fetchone()
+                if row is None or row[4] <= now:
+                    live = False
+                if row is not None:
+                    holds.append(row[:4])
+                    costs.append(row[5])
+            if live:
+                self._record_bookings(conn, holds, costs, now)
+                conn.executemany("DELETE FROM holds WHERE hold_id = ?", [(hold[0],) for hold in holds])
+            else:
+                self._release_holds(conn, holds)
+            return live
+
+        return self._write(work)
+
+    @staticmethod
+    def _record_bookings(conn, holds, costs, now):
+        """Inserts a booking per committed hold, its range narrowed to the first and last booked weekday."""
+        rows = []
+        for (hold_id, service_name, first_day, last_day), cost in zip(holds, costs):
+            lo, hi = weekdays_before(first_day), weekdays_before(last_day + 1) - 1
+            first_day, last_day = weekday_index_to_ordinal(lo), weekday_index_to_ordinal(hi)
+            day_key = conn.execute(
+                "INSERT INTO booking_days (first_day, last_day, booking_id, service) VALUES (?, ?, ?, ?)",
+                (first_day, last_day, hold_id, service_name),
+            ).lastrowid
+            rows.append((
+                hold_id, service_name, first_day, last_day,
+                hi - lo + 1 - closed_indices(lo, hi).size, cost, BOOKING_CONFIRMED, now, day_key,
+            ))
+        conn.executemany(
+            "INSERT INTO bookings (booking_id, service, first_day, last_day, num_days, cost, status, created_at, day_key) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+
+    def get_booking(self, booking_id):
+        """Returns the booking_record dict of a booking, or None if the ID is unknown."""
+        row = self._conn().execute(
+            "SELECT booking_id, service, first_day, last_day, num_days, cost, status FROM bookings WHERE booking_id = ?",
+            (booking_id,),
+        ).fetchone()
+        return booking_record(*row) if row else None
+
+    @staticmethod
+    def _covering(conn, ordinal):
+        """(first_day, booking_id, service) of the bookings covering the day, by first day, from the R*Tree."""
+        rows = conn.execute(
+            "SELECT first_day, booking_id, service FROM booking_days WHERE first_day <= ? AND last_day >= ?",
+            (ordinal, ordinal),
+        ).fetchall()
+        return sorted((int(first_day), booking_id, service) for first_day, booking_id, service in rows)
+
+    def booking_ids_on(self, ordinal, service_name=None):
+        """IDs of the bookings (of any status) covering the day: one R*Tree lookup, O(log n + k)."""
+        return [
+            booking_id for _, booking_id, service in self._covering(self._conn(), ordinal)
+            if service_name is None or service == service_name
+        ]
+
+    def iter_bookings(self, start_date=None, end_date=None, chunk_rows=EXPORT_CHUNK_ROWS):
+        """
+        The bookings still running on the first day come from the R*Tree, then the ones starting in the
+        range are paged through the first-day index (keyset pagination, no cursor kept open between chunks).
+        """
+        conn = self._conn()
+        first = start_date.toordinal() if start_date is not None else 1
+        last = end_date.toordinal() if end_date is not None else datetime.date.max.toordinal()
+        earlier = [booking_id for first_day, booking_id, _ in self._covering(conn, first) if first_day < first]
+        # Kept well below SQLite's limit on bound parameters
+        step = min(chunk_rows, 500)
+        for start in range(0, len(earlier), step):
+            ids = earlier[start:start + step]
+            rows = conn.execute(
+                "SELECT booking_id, service, first_day, last_day, num_days, cost, status FROM bookings "
+                f"WHERE booking_id IN ({', '.join('?' * len(ids))}) ORDER BY first_day, booking_id",
+                ids,
+            )
+            yield [booking_record(*row) for row in rows]
+        after = (first, "")
+        while True:
+            rows = conn.execute(
+                "SELECT booking_id, service, first_day, last_day, num_days, cost, status FROM bookings "
+                "WHERE (first_day, booking_id) > (?, ?) AND first_day <= ? ORDER BY first_day, booking_id LIMIT ?",
+                (after[0], after[1], last, chunk_rows),
+            ).fetchall()
+            if not rows:
+                return
+            after = (rows[-1][2], rows[-1][0])
+            yield [booking_record(*row) for row in rows]
+
+    def cancel(self, booking_id):
+        """Cancels a confirmed booking and gives its seats back. Returns False if it isn't a confirmed booking."""
+        def work(conn):
+            row = conn.execute(
+                "SELECT service, first_day, last_day FROM bookings WHERE booking_id = ? AND status = ?",
+                (booking_id, BOOKING_CONFIRMED),
+            ).fetchone()
+            if row is None:
+                return False
+            conn.execute("UPDATE bookings SET status = ? WHERE booking_id = ?", (BOOKING_CANCELLED, booking_id))
+            conn.execute("UPDATE occupancy SET count = count - 1 WHERE service = ? AND day BETWEEN ? AND ?", row)
+            conn.execute("DELETE FROM occupancy WHERE service = ? AND day BETWEEN ? AND ? AND count = 0", row)
+            self._promote_waiting(conn, [row])
+            return True
+
+        return self._write(work)
+
+    def reschedule(self, booking_id, start_date, end_date, cost=0):
+        """
+        Moves a confirmed booking to [start_date, end_date] in one transaction: the old range is
+        decremented, then the new one checked and incremented as in reserve_range, and any full
+        day rolls both back. Returns False, changing nothing, if it
+        isn't a confirmed booking or a day of the new range is full. Raises ValueError if the
+        range has no weekdays.
+        """
+        num_days = cached_count_weekdays(start_date, end_date)
+        if not num_days:
+            raise ValueError("Range contains no weekdays.")
+        lo, hi = weekdays_before(start_date.toordinal()), weekdays_before(end_date.toordinal() + 1) - 1
+        first_day, last_day = weekday_index_to_ordinal(lo), weekday_index_to_ordinal(hi)
+
+        def work(conn):
+            self._sweep_expired(conn)
+            row = conn.execute(
+                "SELECT service, first_day, last_day FROM bookings WHERE booking_id = ? AND status = ?",
+                (booking_id, BOOKING_CONFIRMED),
+            ).fetchone()
+            if row is None:
+                return False
+            service_name = row[0]
+            conn.execute(
+                "UPDATE occupancy SET count = count - 1 WHERE service = ? AND day BETWEEN ? AND ?", row
+            )
+            if self._full_days(conn, service_name, start_date, end_date):
+                raise _Full()
+            self._add_seat(conn, service_name, start_date, end_date)
+            conn.execute("DELETE FROM occupancy WHERE service = ? AND day BETWEEN ? AND ? AND count = 0", row)
+            conn.execute(
+                "UPDATE bookings SET first_day = ?, last_day = ?, num_days = ?, cost = ? WHERE booking_id = ?",
+                (first_day, last_day, num_days, cost, booking_id),
+            )
+            conn.execute(
+                "UPDATE booking_days SET first_day = ?, last_day = ? WHERE id = (SELECT day_key FROM bookings WHERE booking_id = ?)",
+                (first_day, last_day, booking_id),
+            )
+            # Days of the old range that the new one keeps are still taken; the pass finds them full
+            self._promote_waiting(conn, [row])
+            return True
+
+        try:
+            return self._write(work)
+        except _Full:
+            return False
+
+    def _promote_waiting(self, conn, freed):
+        """
+        Books waiting entries into the seats freed on the (service_name, first_day, last_day) ordinal
+        ranges, earliest request first, inside the caller's write transaction; entries whose start
+        day has passed are expired instead. The free seats of the freed span are read once; the queue
+        is then only read for entries that fit a run of days with a free seat, and the pass stops as
+        soon as every day of the span is full again. Returns the entry_ids promoted.
+        """
+        spans = {}
+        for service_name, first_day, last_day in freed:
+            span = spans.get(service_name)
+            spans[service_name] = (min(span[0], first_day), max(span[1], last_day)) if span else (first_day, last_day)
+        first_bookable = datetime.date.today().toordinal() + 1
+        promoted = []
+        for service_name, (first_day, last_day) in spans.items():
+            conn.execute(
+                "UPDATE waitlist SET status = ? WHERE status = 'waiting' AND service = ? AND first_day < ?",
+                (WAITLIST_EXPIRED, service_name, first_bookable),
+            )
+            lo, hi = weekday_index_range(datetime.date.fromordinal(first_day), datetime.date.fromordinal(last_day))
+            if lo > hi:
+                continue
+            # Free seats per weekday of the span; closure days never fill up, so they never block an entry
+            free = self.capacity.column(service_name, lo, hi).astype(np.int64)
+            rows = conn.execute(
+                "SELECT day, count FROM occupancy WHERE service = ? AND day BETWEEN ? AND ?",
+                (service_name, first_day, last_day),
+            ).fetchall()
+            if rows:
+                days, counts = np.array(rows, dtype=np.int64).T
+                free[(days - 1) // 7 * 5 + np.minimum((days - 1) % 7, 5) - lo] -= counts  # weekdays_before, vectorized
+            open_days = np.ones(hi - lo + 1, dtype=bool)
+            open_days[closed_indices(lo, hi) - lo] = False
+            free[~open_days] = np.iinfo(free.dtype).max
+            after = -1
+            while (free[open_days] > 0).any():
+                batch = self._waiting_within(conn, service_name, after, first_day, last_day, self._free_bounds(free, lo))
+                if not batch:
+                    break
+                for seq, entry_id, entry_first, entry_last, cost in batch:
+                    after = seq
+                    start_date, end_date = datetime.date.fromordinal(entry_first), datetime.date.fromordinal(entry_last)
+                    entry_lo, entry_hi = weekday_index_range(start_date, end_date)
+                    overlap_lo, overlap_hi = max(entry_lo, lo), min(entry_hi, hi)
+                    if overlap_lo > overlap_hi or free[overlap_lo - lo:overlap_hi - lo + 1].min() <= 0:
+                        continue
+                    if self._full_days(conn, service_name, start_date, end_date):
+                        continue  # a day outside the freed span is still full
+                    self._add_seat(conn, service_name, start_date, end_date)
+                    booking_id = uuid.uuid4().hex
+                    self._record_bookings(conn, [(booking_id, service_name, entry_first, entry_last)], [cost], time.time())
+                    conn.execute(
+                        "UPDATE waitlist SET status = ?, booking_id = ? WHERE entry_id = ?",
+                        (WAITLIST_PROMOTED, booking_id, entry_id),
+                    )
+                    promoted.append(entry_id)
+                    free[overlap_lo - lo:overlap_hi - lo + 1] -= 1
+                    break  # fewer days are free now: read on with narrower bounds
+        return promoted
+
+    @staticmethod
+    def _free_bounds(free, lo):
+        """
+        (earliest first_day, latest last_day) ordinal bounds of the entries whose weekdays within the
+        span fit one run of its free weekdays, one pair per run; `free` starts at weekday index lo.
+        """
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], (free > 0).astype(np.int8), [0]))))
+        bounds = []
+        for start, stop in zip(edges[::2].tolist(), (edges[1::2] - 1).tolist()):
+            # From the day after the busy weekday before the run to the day before the one after it
+            earliest = weekday_index_to_ordinal(lo + start - 1) + 1 if start > 0 else 0
+            latest = weekday_index_to_ordinal(lo + stop + 1) - 1 if stop < free.size - 1 else datetime.date.max.toordinal()
+            bounds.append((earliest, latest))
+        return bounds
+
+    @staticmethod
+    def _waiting_within(conn, service_name, after, first_day, last_day, bounds, batch_rows=256):
+        """
+        The next (seq, entry_id, first_day, last_day, cost) of the service's queue after `after`, in
+        request order, that overlap [first_day, last_day] and lie within one of the bounds: the queue
+        index is walked inside SQLite, so entries blocked by a full day are never read.
+        """
+        if len(bounds) > MAX_BOUND_RUNS:
+            # Kept below SQLite's limit on bound parameters: only the span is checked here then
+            bounds = [(bounds[0][0], bounds[-1][1])]
+        within = " OR ".join(["(first_day >= ? AND last_day <= ?)"] * len(bounds))
+        return conn.execute(
+            "SELECT seq, entry_id, first_day, last_day, cost FROM waitlist WHERE status = 'waiting' "
+            f"AND service = ? AND seq > ? AND first_day <= ? AND last_day >= ? AND ({within}) ORDER BY seq LIMIT ?",
+            [service_name, after, last_day, first_day] + [day for bound in bounds for day in bound] + [batch_rows],
+        ).fetchall()
+
+    def open_waitlist(self):
+        """A SQLiteWaitlist over this file's waitlist table, promoted inside every transaction that frees seats."""
+        return SQLiteWaitlist(self)
+
+    def release(self, hold_id):
+        """Gives the seats of an uncommitted hold back. Unknown/expired ids are ignored."""
+        def work(conn):
+            holds = conn.execute(
+                "SELECT hold_id, service, first_day, last_day FROM holds WHERE hold_id = ?", (hold_id,)
+            ).fetchall()
+            self._release_holds(conn, holds)
+
+        self._write(work)
+
+    def compact(self):
+        """Deletes any zero-count rows (releases already clean up after themselves)."""
+        self._write(lambda conn: conn.execute("DELETE FROM occupancy WHERE count = 0"))
+
+    def iter_occupancy(self, start_date=None, end_date=None, chunk_rows=EXPORT_CHUNK_ROWS):
+        """
+        Reads one window of days per chunk through the (service, day) primary key, so no
+        statement stays open between chunks and the table is never sorted as a whole.
+        """
+        conn = self._conn()
+        bounds = [
+            conn.execute(
+                "SELECT (SELECT MIN(day) FROM occupancy WHERE service = ?), (SELECT MAX(day) FROM occupancy WHERE service = ?)",
+                (service_name, service_name),
+            ).fetchone()
+            for service_name in self.service_names
+        ]
+        bounds = [bound for bound in bounds if bound[0] is not None]
+        if not bounds:
+            return
+        first = min(bound[0] for bound in bounds)
+        last = max(bound[1] for bound in bounds)
+        if start_date is not None:
+            first = max(first, start_date.toordinal())
+        if end_date is not None:
+            last = min(last, end_date.toordinal())
+        window = max(1, chunk_rows // len(self.service_names))
+        for window_first in range(first, last + 1, window):
+            window_last = min(window_first + window - 1, last)
+            chunk = []
+            for service_name in self.service_names:
+                chunk.extend(conn.execute(
+                    "SELECT day, service, count FROM occupancy WHERE service = ? AND day BETWEEN ? AND ? AND count > 0",
+                    (service_name, window_first, window_last),
+                ))
+            if chunk:
+                # Stable sort: services stay in column order within a day
+                chunk.sort(key=lambda row: row[0])
+                yield chunk
+
+    def snapshot(self):
+        """Returns a plain {day_ordinal: {service_name: count}} copy of the non-zero days."""
+        result = {}
+        rows = self._conn().execute("SELECT day, service, count FROM occupancy WHERE count > 0 ORDER BY day")
+        for day, service_name, count in rows:
+            result.setdefault(day, {})[service_name] = count
+        return result
+
+
+class SQLiteWaitlist:
+    """
+    The waitlist of a SQLiteLedger, kept in its `waitlist` table: entries survive restarts and
+    are shared by every process using the file. Same interface as waitlist.Waitlist; the store
+    promotes entries inside each transaction that gives seats back (see _promote_waiting).
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def __len__(self):
+        """Number of entries still waiting."""
+        return self.store._conn().execute("SELECT COUNT(*) FROM waitlist WHERE status = 'waiting'").fetchone()[0]
+
+    def add(self, service_name, start_date, end_date, num_days, cost):
+        """Queues a request for [start_date, end_date] behind everyone already waiting. Returns its entry_id."""
+        lo, hi = weekday_index_range(start_date, end_date)
+        if lo > hi:
+            raise ValueError("Range contains no weekdays.")
+        entry_id = uuid.uuid4().hex
+        first_day, last_day = start_date.toordinal(), end_date.toordinal()
+
+        def work(conn):
+            self.store._sweep_expired(conn)
+            conn.execute(
+                "INSERT INTO waitlist (entry_id, service, first_day, last_day, num_days, cost, requested_at, status) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (entry_id, service_name, first_day, last_day, num_days, cost, time.time(), WAITLIST_WAITING),
+            )
+            # Seats may have freed up since the caller found the range full
+            self.store._promote_waiting(conn, [(service_name, first_day, last_day)])
+
+        self.store._write(work)
+        return entry_id
+
+    def get(self, entry_id):
+        """The entry as a dict of ENTRY_FIELDS, or None if the ID is unknown."""
+        row = self.store._conn().execute(
+            "SELECT entry_id, service, first_day, last_day, num_days, cost, requested_at, status, booking_id "
+            "FROM waitlist WHERE entry_id = ?",
+            (entry_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        entry = dict(zip(ENTRY_FIELDS, row))
+        entry["start"], entry["end"] = datetime.date.fromordinal(entry["start"]), datetime.date.fromordinal(entry["end"])
+        return entry
+
+    def withdraw(self, entry_id):
+        """Takes a waiting entry off the list. Returns False if it isn't waiting."""
+        return self.store._write(lambda conn: conn.execute(
+            "UPDATE waitlist SET status = ? WHERE entry_id = ? AND status = 'waiting'", (WAITLIST_WITHDRAWN, entry_id)
+        ).rowcount == 1)
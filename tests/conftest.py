@@ -0,0 +1,25 @@
+import datetime
+import os
+import sys
+
+import pytest
+
+# The modules live at the repo root, next to the Streamlit script
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from weekdays import set_closures  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def no_closures():
+    """Closures are process-wide: every test starts and ends without any."""
+    set_closures([])
+    yield
+    set_closures([])
+
+
+@pytest.fixture
+def next_monday():
+    """The first Monday after today: a bookable weekday however the test run is dated."""
+    today = datetime.date.today()
+    return today + datetime.timedelta(days=7 - today.weekday())
@@ -0,0 +1,90 @@
+import asyncio
+import datetime
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import api
+import booking_core
+
+REPO_ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+
+@pytest.fixture(autouse=True)
+def memory_store(monkeypatch):
+    monkeypatch.delenv("BOOKING_DB", raising=False)
+    monkeypatch.delenv("BOOKING_STORE", raising=False)
+    monkeypatch.delenv("BOOKING_HOLIDAYS", raising=False)
+    monkeypatch.setattr(api, "_store", None)
+    monkeypatch.setattr(api, "_waitlist", None)
+
+
+def call(method, path, payload=None):
+    """Sends one request through the ASGI app; returns (status, decoded JSON body)."""
+    messages = [{"type": "http.request", "body": json.dumps(payload).encode() if payload is not None else b""}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": method, "path": path, "query_string": b""}
+    asyncio.run(api.app(scope, receive, send))
+    return sent[0]["status"], json.loads(sent[1]["body"])
+
+
+def test_batch_reports_malformed_queries_one_by_one(next_monday):
+    start = next_monday.isoformat()
+    status, payload = call("POST", "/availability/batch", {"queries": [
+        {"service": {"a": 1}, "start": start, "end": start},
+        {"service": ["Child Day Care"], "start": start, "end": start},
+        {"service": "Child Day Care", "start": 20261102, "end": start},
+        "not an object",
+        {"service": "Child Day Care", "start": start, "end": start},
+    ]})
+    assert status == 200
+    results = payload["results"]
+    assert [("error" in result) for result in results] == [True, True, True, True, False]
+    assert results[-1] == {"available": True, "full_day_count": 0}
+
+
+def test_non_string_service_is_a_bad_request(next_monday):
+    start = next_monday.isoformat()
+    status, payload = call("POST", "/book", {"bookings": [{"service": ["Child Day Care"], "start": start, "end": start}]})
+    assert status == 400 and "service" in payload["error"]
+
+
+def test_quotes_leave_closures_out_before_the_store_is_opened(tmp_path, next_monday):
+    # A fresh process, as under an ASGI server started without a lifespan: the first request is a quote
+    holidays = tmp_path / "holidays.csv"
+    holidays.write_text(f"date\n{(next_monday + datetime.timedelta(days=2)).isoformat()}\n", encoding="utf-8")
+    script = (
+        "import asyncio, json, sys, api\n"
+        "sent = []\n"
+        "async def receive(): return {'type': 'http.request', 'body': b''}\n"
+        "async def send(message): sent.append(message)\n"
+        f"query = b'service=Child+Day+Care&start={next_monday.isoformat()}&end={(next_monday + datetime.timedelta(days=4)).isoformat()}'\n"
+        "asyncio.run(api.app({'type': 'http', 'method': 'GET', 'path': '/quote', 'query_string': query}, receive, send))\n"
+        "print(json.dumps([api._store is None, json.loads(sent[1]['body'])['num_days']]))\n"
+    )
+    env = {key: value for key, value in os.environ.items() if not key.startswith("BOOKING_")}
+    env["BOOKING_HOLIDAYS"] = str(holidays)
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    assert json.loads(result.stdout) == [True, 4]
+
+
+def test_ranges_past_the_horizon_or_too_long_are_bad_requests(next_monday):
+    start = next_monday.isoformat()
+    status, payload = call("POST", "/book", {"bookings": [{"service": "Child Day Care", "start": start, "end": "9999-12-31"}]})
+    assert status == 400 and booking_core.latest_end_date().isoformat() in payload["error"]
+    end = (next_monday + datetime.timedelta(days=booking_core.MAX_RANGE_DAYS)).isoformat()
+    status, payload = call("POST", "/book", {"bookings": [{"service": "Child Day Care", "start": start, "end": end}]})
+    assert status == 400 and str(booking_core.MAX_RANGE_DAYS) in payload["error"]
+    assert api.get_store().snapshot() == {}
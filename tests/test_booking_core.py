@@ -0,0 +1,148 @@
+import datetime
+import time
+
+import pytest
+
+import booking_core
+from booking_store import open_store
+from capacity import CapacityCalendar
+from weekdays import set_closures
+
+ELDER, CHILD = "Elder Day Care", "Child Day Care"
+
+
+@pytest.fixture
+def store():
+    return open_store("memory", 1, booking_core.SERVICE_NAMES)
+
+
+def week(monday, weeks=0):
+    start = monday + datetime.timedelta(weeks=weeks)
+    return start, start + datetime.timedelta(days=4)
+
+
+def count(store, service_name, day):
+    return store.get_count(day.toordinal(), service_name)
+
+
+def test_unchanged_ranges_keep_and_renew_their_holds(store, next_monday):
+    store.hold_ttl = 0.5
+    selections = {ELDER: week(next_monday), CHILD: week(next_monday)}
+    details, hold_ids, errors = booking_core.check_and_reserve(store, selections)
+    assert not errors
+    time.sleep(0.3)
+
+    # Only the child care dates change: the elder care hold is reused, and runs a full TTL again
+    selections[CHILD] = week(next_monday, 1)
+    new_details, new_hold_ids, errors = booking_core.check_and_reserve(store, selections, details, hold_ids)
+    assert not errors
+    assert new_hold_ids[ELDER] == hold_ids[ELDER] and new_hold_ids[CHILD] != hold_ids[CHILD]
+    assert new_details[ELDER]["held_until"] > details[ELDER]["held_until"] + 0.2
+    assert count(store, ELDER, next_monday) == 1
+    assert count(store, CHILD, next_monday) == 0 and count(store, CHILD, week(next_monday, 1)[0]) == 1
+
+    # Past the first hold's original expiry, payment still goes through
+    time.sleep(0.3)
+    assert booking_core.confirm_booking(store, new_hold_ids)
+
+
+def test_lapsed_holds_are_reserved_afresh(store, next_monday):
+    store.hold_ttl = 0.05
+    selections = {ELDER: week(next_monday)}
+    details, hold_ids, _ = booking_core.check_and_reserve(store, selections)
+    time.sleep(0.1)
+    new_details, new_hold_ids, errors = booking_core.check_and_reserve(store, selections, details, hold_ids)
+    assert not errors and new_hold_ids[ELDER] != hold_ids[ELDER]
+    assert count(store, ELDER, next_monday) == 1
+
+
+def test_dropped_services_give_their_seats_back(store, next_monday):
+    details, hold_ids, _ = booking_core.check_and_reserve(store, {ELDER: week(next_monday), CHILD: week(next_monday)})
+    _, new_hold_ids, errors = booking_core.check_and_reserve(store, {CHILD: week(next_monday)}, details, hold_ids)
+    assert not errors and list(new_hold_ids) == [CHILD]
+    assert count(store, ELDER, next_monday) == 0 and count(store, CHILD, next_monday) == 1
+
+
+def test_a_failing_service_releases_every_hold(store, next_monday):
+    details, hold_ids, _ = booking_core.check_and_reserve(store, {ELDER: week(next_monday), CHILD: week(next_monday)})
+    # Someone else takes the only seat of the week the child care dates move to
+    other = store.reserve_range(CHILD, *week(next_monday, 1))
+    selections = {CHILD: week(next_monday, 1), ELDER: week(next_monday)}
+    new_details, new_hold_ids, errors = booking_core.check_and_reserve(store, selections, details, hold_ids)
+    assert (new_details, new_hold_ids) == ({}, {}) and errors[0].startswith("Child Care: Capacity limit reached")
+    # The elder care hold would have been reused, but comes after the failure and is released too
+    assert count(store, ELDER, next_monday) == 0 and count(store, CHILD, next_monday) == 0
+    assert not store.renew(hold_ids[ELDER])
+    store.release(other)
+
+
+def test_occupancy_pages_cover_the_range_once(store, next_monday):
+    start, end = next_monday, next_monday + datetime.timedelta(weeks=2, days=4)
+    assert store.commit(store.reserve_range(ELDER, *week(next_monday, 1)))
+    assert booking_core.occupancy_page_count(start, end, 4) == 4
+    pages = [booking_core.occupancy_page(store, start, end, page, 4) for page in range(4)]
+    assert [len(rows) for rows in pages] == [4, 4, 4, 3]
+    rows = [row for page in pages for row in page]
+    assert [row["Date"] for row in rows] == [day for day in (start + datetime.timedelta(days=n) for n in range(19)) if day.weekday() < 5]
+    assert rows[5] == {"Date": next_monday + datetime.timedelta(weeks=1), ELDER: "1 / 1", CHILD: "0 / 1"}
+    assert booking_core.occupancy_page(store, start, end, 4, 4) == []
+
+
+def test_utilisation_divides_counts_by_seats(next_monday):
+    calendar = CapacityCalendar(booking_core.SERVICE_NAMES, 2)
+    calendar.set_weekday(CHILD, 4, 0)
+    store = open_store("memory", calendar, booking_core.SERVICE_NAMES)
+    assert store.commit(store.reserve_range(ELDER, *week(next_monday)))
+    assert store.commit(store.reserve_range(ELDER, next_monday, next_monday))
+    wednesday = next_monday + datetime.timedelta(days=2)
+    set_closures([wednesday.toordinal()])
+    ordinals, shares = booking_core.utilisation(store, *week(next_monday))
+    assert [datetime.date.fromordinal(day).weekday() for day in ordinals] == [0, 1, 3, 4]
+    elder, child = booking_core.SERVICE_NAMES.index(ELDER), booking_core.SERVICE_NAMES.index(CHILD)
+    assert shares[:, elder].tolist() == [1.0, 0.5, 0.5, 0.5]
+    assert shares[:, child].tolist() == [0.0, 0.0, 0.0, 1.0]  # no seats on Fridays
+
+
+def test_full_days_hint_lists_the_picked_range_or_the_weeks_ahead(store, next_monday):
+    assert booking_core.full_days_hint(store, ELDER, None) is None
+    assert store.commit(store.reserve_range(ELDER, *week(next_monday, 1)))
+    monday = next_monday + datetime.timedelta(weeks=1)
+    assert booking_core.full_days_hint(store, ELDER, (monday, monday + datetime.timedelta(days=1))) == (
+        f"Already fully booked in this range: {monday:%Y-%m-%d (%a)}, {monday + datetime.timedelta(days=1):%Y-%m-%d (%a)}."
+    )
+    assert booking_core.full_days_hint(store, ELDER, week(next_monday)) is None
+    assert booking_core.full_days_hint(store, CHILD, week(next_monday, 1)) is None
+    # Only a start picked so far: look HINT_LOOKAHEAD_DAYS ahead, naming at most HINT_MAX_DAYS days
+    assert store.commit(store.reserve_range(ELDER, next_monday, next_monday))
+    assert booking_core.full_days_hint(store, ELDER, (next_monday,)) == (
+        f"Fully booked in the {booking_core.HINT_LOOKAHEAD_DAYS} days from {next_monday:%Y-%m-%d}: "
+        + ", ".join(f"{day:%Y-%m-%d (%a)}" for day in [next_monday, monday, *(monday + datetime.timedelta(days=n) for n in range(1, 4))])
+        + " and 1 more."
+    )
+
+
+def book(store, service_name, date_range):
+    hold_id = store.reserve_range(service_name, *date_range)
+    assert store.commit(hold_id)
+    return hold_id
+
+
+def test_cancel_and_reschedule_messages(store, next_monday):
+    booking_id = book(store, ELDER, week(next_monday))
+    blocker = book(store, ELDER, week(next_monday, 2))
+    assert booking_core.cancel_booking(store, 999999) == "No booking with ID 999999."
+    saturday = next_monday + datetime.timedelta(days=5)
+    assert booking_core.reschedule_booking(store, booking_id, (saturday, saturday + datetime.timedelta(days=1))) == (
+        "Elder Care: Selected range contains no open weekdays (Mon-Fri, closures excluded)."
+    )
+    # Its own days never block a move, another booking's do
+    wednesday = next_monday + datetime.timedelta(days=2)
+    assert booking_core.reschedule_booking(store, booking_id, (wednesday, wednesday + datetime.timedelta(days=7))) is None
+    assert store.get_booking(booking_id)["start"] == wednesday
+    third_monday = next_monday + datetime.timedelta(weeks=2)
+    assert booking_core.reschedule_booking(store, booking_id, (wednesday, third_monday)) == (
+        f"Elder Care: Capacity limit reached on: {third_monday:%Y-%m-%d (%a}, 1 seats)"
+    )
+    assert booking_core.cancel_booking(store, blocker) is None
+    assert booking_core.cancel_booking(store, blocker) == f"Booking {blocker} is cancelled."
+    assert booking_core.reschedule_booking(store, blocker, week(next_monday, 3)) == f"Booking {blocker} is cancelled."
@@ -0,0 +1,92 @@
+import datetime
+import random
+
+import pytest
+
+from capacity import CapacityCalendar, IntervalMap
+from weekdays import weekday_index_to_date, weekdays_before
+
+
+def test_interval_map_matches_a_list():
+    rng = random.Random(0)
+    for _ in range(200):
+        interval_map = IntervalMap()
+        expected = [None] * 60
+        for _ in range(rng.randrange(1, 15)):
+            lo = rng.randrange(60)
+            hi = min(lo + rng.randrange(20), 59)
+            value = rng.choice([None, 1, 2, 3])
+            interval_map.assign(lo, hi, value)
+            expected[lo:hi + 1] = [value] * (hi - lo + 1)
+        assert [interval_map.get(position) for position in range(60)] == expected
+
+        lo = rng.randrange(60)
+        hi = min(lo + rng.randrange(30), 59)
+        covered = [None] * 60
+        for first, last, value in interval_map.overlapping(lo, hi):
+            assert lo <= first <= last <= hi and value is not None
+            covered[first:last + 1] = [value] * (last - first + 1)
+        assert covered[lo:hi + 1] == expected[lo:hi + 1]
+
+        # Equal neighbours are merged, so no two adjacent intervals hold the same value
+        values = interval_map._values
+        assert all(a != b for a, b in zip(values, values[1:]))
+
+
+def test_calendar_columns_and_bounds_match_the_rules():
+    rng = random.Random(1)
+    origin = weekdays_before(datetime.date(2026, 11, 2).toordinal())
+    for _ in range(200):
+        calendar = CapacityCalendar(["Care"], 5, staff_ratios={"Care": 2})
+        weekly, dated, staff = [5] * 5, [None] * 60, [None] * 60
+        for _ in range(rng.randrange(8)):
+            kind = rng.choice(["weekday", "range", "staff"])
+            if kind == "weekday":
+                weekday, seats = rng.randrange(5), rng.randrange(9)
+                calendar.set_weekday("Care", weekday, seats)
+                weekly[weekday] = seats
+                continue
+            lo = rng.randrange(45)
+            hi = lo + rng.randrange(10)
+            value = rng.choice([None, 0, 1, 3, 5, 8])
+            setter, expected = (calendar.set_range, dated) if kind == "range" else (calendar.set_staff, staff)
+            setter("Care", weekday_index_to_date(origin + lo), weekday_index_to_date(origin + hi), value)
+            expected[lo:hi + 1] = [value] * (hi - lo + 1)
+
+        lo = rng.randrange(45)
+        hi = lo + rng.randrange(15)
+        expected = []
+        for position in range(lo, hi + 1):
+            seats = weekly[position % 5] if dated[position] is None else dated[position]
+            expected.append(seats if staff[position] is None else min(seats, staff[position] * 2))
+        assert calendar.column("Care", origin + lo, origin + hi).tolist() == expected
+        fewest = calendar.fewest_seats("Care", origin + lo, origin + hi)
+        most = calendar.most_seats("Care", origin + lo, origin + hi)
+        assert fewest <= min(expected) and most >= max(expected)
+        if fewest == most:
+            assert set(expected) == {fewest}
+
+
+def test_calendar_from_config():
+    config = {
+        "default": {"Child Day Care": 20},
+        "weekdays": {"Child Day Care": {"Fri": 15}},
+        "dates": [{"service": "Elder Day Care", "start": "2026-12-21", "end": "2026-12-24", "capacity": 10}],
+        "staff_ratios": {"Child Day Care": 4},
+        "staff": [{"service": "Child Day Care", "start": "2026-11-02", "end": "2026-11-03", "staff": 3}],
+    }
+    calendar = CapacityCalendar.from_config(["Elder Day Care", "Child Day Care"], 25, config)
+    seats = {
+        day: (calendar.capacity_on("Elder Day Care", datetime.date.fromisoformat(day).toordinal()),
+              calendar.capacity_on("Child Day Care", datetime.date.fromisoformat(day).toordinal()))
+        for day in ["2026-11-02", "2026-11-04", "2026-11-06", "2026-12-24", "2026-12-25"]
+    }
+    assert seats == {
+        "2026-11-02": (25, 12),
+        "2026-11-04": (25, 20),
+        "2026-11-06": (25, 15),
+        "2026-12-24": (10, 20),
+        "2026-12-25": (25, 15),
+    }
+    with pytest.raises(ValueError):
+        calendar.set_staff("Elder Day Care", datetime.date(2026, 11, 2), datetime.date(2026, 11, 2), 1)
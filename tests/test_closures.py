@@ -0,0 +1,60 @@
+import datetime
+
+import pytest
+
+from closures import load_closures, read_csv_closures, read_ics_closures
+
+
+def ordinals(*dates):
+    return [datetime.date.fromisoformat(day).toordinal() for day in dates]
+
+
+def test_csv_with_and_without_header():
+    assert read_csv_closures(["name,date", "Christmas Day,2026-12-25", "", "# comment", "Boxing Day, 2026-12-26"]) == ordinals(
+        "2026-12-25", "2026-12-26"
+    )
+    assert read_csv_closures(["2026-12-25,Christmas Day", "2026-12-31"]) == ordinals("2026-12-25", "2026-12-31")
+    assert read_csv_closures([]) == []
+
+
+ICS = """BEGIN:VCALENDAR
+BEGIN:VEVENT
+SUMMARY:Christmas
+DTSTART;VALUE=DATE:20261225
+DTEND;VALUE=DATE:20261227
+END:VEVENT
+BEGIN:VEVENT
+SUMMARY:Staff meeting
+DTSTART;TZID=Europe/London:20261103T140000
+DTEND;TZID=Europe/London:20261103T160000
+END:VEVENT
+BEGIN:VEVENT
+SUMMARY:Founders' day, with a description long enough
+  to be folded
+DTSTART:20261106
+END:VEVENT
+BEGIN:VEVENT
+SUMMARY:Offsite
+DTSTART:20261110T090000Z
+END:VEVENT
+END:VCALENDAR
+"""
+
+
+def test_ics_reads_all_day_events_only():
+    # DTEND is exclusive; timed events, with or without a TZID, leave their day open
+    assert read_ics_closures(ICS.splitlines(keepends=True)) == ordinals("2026-12-25", "2026-12-26", "2026-11-06")
+
+
+def test_load_closures_sorts_and_deduplicates(tmp_path):
+    path = tmp_path / "holidays.ics"
+    path.write_text(ICS.replace("\n", "\r\n") + ICS, encoding="utf-8")
+    assert load_closures(str(path)).tolist() == ordinals("2026-11-06", "2026-12-25", "2026-12-26")
+
+    # Excel's "CSV UTF-8" starts with a byte order mark
+    path = tmp_path / "holidays.csv"
+    path.write_text("\ufeffdate,name\n2026-12-25,Christmas Day\n", encoding="utf-8")
+    assert load_closures(str(path)).tolist() == ordinals("2026-12-25")
+
+    with pytest.raises(ValueError):
+        load_closures(str(tmp_path / "holidays.txt"))
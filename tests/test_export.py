@@ -0,0 +1,61 @@
+import csv
+import datetime
+import json
+
+import pytest
+
+import booking_core
+import export
+from booking_store import open_store
+
+
+@pytest.fixture
+def store(next_monday):
+    store = open_store("memory", 5, booking_core.SERVICE_NAMES)
+    friday = next_monday + datetime.timedelta(days=4)
+    assert store.commit(store.reserve_range("Child Day Care", next_monday, friday))
+    assert store.commit(store.reserve_range("Elder Day Care", friday, friday))
+    return store
+
+
+def test_occupancy_records_come_in_chunks_in_day_order(store, next_monday):
+    chunks = list(export.iter_occupancy_records(store, chunk_rows=2))
+    assert len(chunks) > 1 and all(1 <= len(chunk) <= 2 for chunk in chunks)
+    records = [record for chunk in chunks for record in chunk]
+    assert len(records) == 6
+    assert records[0] == {"date": next_monday.isoformat(), "service": "Child Day Care", "count": 1, "capacity": 5}
+    assert [record["date"] for record in records] == sorted(record["date"] for record in records)
+    friday = (next_monday + datetime.timedelta(days=4)).isoformat()
+    assert sorted(record["service"] for record in chunks[-1] if record["date"] == friday) == ["Child Day Care", "Elder Day Care"]
+
+
+def test_csv_and_ndjson_hold_the_same_records(store, tmp_path):
+    records = [record for chunk in export.iter_occupancy_records(store) for record in chunk]
+    assert export.export(export.iter_occupancy_records(store), str(tmp_path / "out.csv")) == len(records)
+    with open(tmp_path / "out.csv", newline="", encoding="utf-8") as f:
+        assert [dict(row, count=int(row["count"]), capacity=int(row["capacity"])) for row in csv.DictReader(f)] == records
+    assert export.export(export.iter_occupancy_records(store), str(tmp_path / "out.jsonl")) == len(records)
+    assert [json.loads(line) for line in (tmp_path / "out.jsonl").read_text(encoding="utf-8").splitlines()] == records
+
+
+def test_booking_records_round_trip_through_parquet(store, tmp_path, next_monday):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = str(tmp_path / "bookings.parquet")
+    assert export.export(export.iter_booking_records(store, chunk_rows=1), path, columns=export.BOOKING_COLUMNS) == 2
+    table = pq.read_table(path)
+    assert table.column_names == export.BOOKING_COLUMNS
+    assert table.num_rows == 2
+    first = table.to_pylist()[0]
+    assert (first["service"], first["start"], first["num_days"]) == ("Child Day Care", next_monday.isoformat(), 5)
+
+
+def test_an_empty_export_is_still_a_valid_file(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    store = open_store("memory", 5, booking_core.SERVICE_NAMES)
+    assert export.export(export.iter_occupancy_records(store), str(tmp_path / "empty.parquet")) == 0
+    assert pq.read_table(str(tmp_path / "empty.parquet")).column_names == export.OCCUPANCY_COLUMNS
+
+
+def test_unknown_extensions_are_refused(store, tmp_path):
+    with pytest.raises(ValueError):
+        export.export(export.iter_occupancy_records(store), str(tmp_path / "out.xlsx"))
@@ -0,0 +1,63 @@
+import pytest
+
+import booking_core
+import importer
+from booking_store import open_store
+
+
+def test_rows_with_non_string_services_are_rejected_on_their_own(next_monday):
+    store = open_store("memory", 5, booking_core.SERVICE_NAMES)
+    day = next_monday.isoformat()
+    rows = [
+        {"service": 5, "start": day, "end": day},
+        {"service": None, "start": day, "end": day},
+        {"service": " Child Day Care ", "start": day, "end": day},
+    ]
+    rejections = list(importer.import_bookings(store, [rows]))
+    assert [rejection["row"] for rejection in rejections] == [1, 2]
+    assert store.get_count(next_monday.toordinal(), "Child Day Care") == 1
+
+
+def test_import_refuses_the_in_memory_store(monkeypatch, tmp_path):
+    monkeypatch.delenv("BOOKING_DB", raising=False)
+    monkeypatch.delenv("BOOKING_STORE", raising=False)
+    path = tmp_path / "bookings.csv"
+    path.write_text("service,start,end\n", encoding="utf-8")
+    with pytest.raises(SystemExit):
+        importer.main([str(path)])
+
+
+def test_imports_are_held_to_the_longest_range():
+    store = open_store("memory", 5, booking_core.SERVICE_NAMES)
+    rows = [{"service": "Elder Day Care", "start": "1990-01-01", "end": "2020-12-31"}]
+    assert [rejection["reason"] for rejection in importer.import_bookings(store, [rows])] == [
+        f"Elder Care: A booking can span at most {booking_core.MAX_RANGE_DAYS} days."
+    ]
+
+
+def test_excel_csv_with_a_byte_order_mark_imports(monkeypatch, tmp_path, capsys, next_monday):
+    monkeypatch.setenv("BOOKING_DB", str(tmp_path / "bookings.db"))
+    monkeypatch.delenv("BOOKING_STORE", raising=False)
+    path = tmp_path / "bookings.csv"
+    path.write_text(f"\ufeffservice,start,end\nChild Day Care,{next_monday},{next_monday}\n", encoding="utf-8")
+    importer.main([str(path)])
+    assert "0 row(s) rejected" in capsys.readouterr().err
+    store = open_store("sqlite", 5, booking_core.SERVICE_NAMES, path=str(tmp_path / "bookings.db"))
+    assert store.get_count(next_monday.toordinal(), "Child Day Care") == 1
+
+
+def test_missing_columns_are_a_usage_error(monkeypatch, tmp_path, capsys):
+    monkeypatch.setenv("BOOKING_DB", str(tmp_path / "bookings.db"))
+    path = tmp_path / "bookings.csv"
+    path.write_text("service,from,to\nChild Day Care,2026-11-02,2026-11-06\n", encoding="utf-8")
+    with pytest.raises(SystemExit):
+        importer.main([str(path)])
+    assert "has no start, end column(s)" in capsys.readouterr().err
+
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "bookings.parquet"
+    pq.write_table(pa.table({"service": ["Child Day Care"], "start": ["2026-11-02"]}), str(path))
+    with pytest.raises(SystemExit):
+        importer.main([str(path)])
+    assert "has no end column(s)" in capsys.readouterr().err
@@ -0,0 +1,37 @@
+import datetime
+
+import ledger
+from ledger import COMPACT_EVERY_RELEASES, INITIAL_HORIZON_WEEKDAYS, CapacityLedger
+from segment_tree import SegmentTreeIndex
+
+SERVICE_NAMES = ["Elder Day Care", "Child Day Care"]
+
+
+def test_releases_compact_once_every_few_hundred(monkeypatch, next_monday):
+    store = CapacityLedger(3, SERVICE_NAMES, index_class=SegmentTreeIndex)
+    far = next_monday + datetime.timedelta(weeks=5 * 52)
+    store.release(store.reserve_range("Child Day Care", far, far))
+    grown = store._occupancy.size
+    assert grown > 2 * INITIAL_HORIZON_WEEKDAYS
+
+    scans = []
+    nonzero_span = SegmentTreeIndex.nonzero_span
+    monkeypatch.setattr(SegmentTreeIndex, "nonzero_span", lambda index: scans.append(1) or nonzero_span(index))
+    for _ in range(COMPACT_EVERY_RELEASES - 2):
+        store.release(store.reserve_range("Child Day Care", next_monday, next_monday))
+    assert not scans and store._occupancy.size == grown
+    store.release(store.reserve_range("Child Day Care", next_monday, next_monday))
+    assert len(scans) == 1 and store._occupancy.size < grown
+    assert store.get_count(next_monday.toordinal(), "Child Day Care") == 0
+
+
+def test_small_indexes_are_never_scanned(monkeypatch, next_monday):
+    monkeypatch.setattr(ledger, "COMPACT_EVERY_RELEASES", 1)
+    store = CapacityLedger(3, SERVICE_NAMES)
+
+    def compact():
+        raise AssertionError("an index within twice the default horizon was scanned")
+
+    monkeypatch.setattr(store, "compact", compact)
+    booking_id = store.reserve_range("Elder Day Care", next_monday, next_monday)
+    assert store.commit(booking_id) and store.cancel(booking_id)
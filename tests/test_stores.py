@@ -0,0 +1,181 @@
+"""Every backend must agree with the others under the same randomized workload."""
+import datetime
+import random
+import time
+
+import pytest
+
+import booking_core
+from booking_store import open_store
+from capacity import CapacityCalendar
+from ledger import CapacityLedger
+from segment_tree import SegmentTreeIndex
+from weekdays import set_closures
+
+SERVICE_NAMES = ["Elder Day Care", "Child Day Care"]
+BACKENDS = ["memory", "tree", "file", "sqlite"]
+STEPS = 1500
+
+
+def make_calendar(start):
+    calendar = CapacityCalendar(SERVICE_NAMES, 3, staff_ratios={"Child Day Care": 1})
+    calendar.set_weekday("Elder Day Care", 4, 2)
+    calendar.set_range("Elder Day Care", start + datetime.timedelta(days=20), start + datetime.timedelta(days=30), 4)
+    calendar.set_range("Child Day Care", start + datetime.timedelta(days=40), start + datetime.timedelta(days=44), 0)
+    calendar.set_staff("Child Day Care", start + datetime.timedelta(days=10), start + datetime.timedelta(days=16), 2)
+    return calendar
+
+
+def open_backend(backend, calendar, tmp_path):
+    if backend == "tree":
+        return CapacityLedger(calendar, SERVICE_NAMES, index_class=SegmentTreeIndex)
+    return open_store(backend, calendar, SERVICE_NAMES, path=str(tmp_path / f"bookings.{backend}"))
+
+
+def random_range(rng, start):
+    first = start + datetime.timedelta(days=rng.randrange(70))
+    return first, first + datetime.timedelta(days=rng.randrange(15))
+
+
+def records(store, handles):
+    """Booking records keyed by position in `handles`, so stores with different ids compare."""
+    result = {}
+    for position, booking_id in enumerate(handles):
+        record = store.get_booking(booking_id)
+        if record is not None:
+            result[position] = {key: value for key, value in record.items() if key != "booking_id"}
+    return result
+
+
+def run_workload(stores, start, seed):
+    """Applies the same random operations to every store, checking they answer alike at each step."""
+    rng = random.Random(seed)
+    handles = {name: [] for name in stores}  # committed booking ids, by position
+    holds = []  # positions of open holds: {name: hold_id}
+    for _ in range(STEPS):
+        service_name = rng.choice(SERVICE_NAMES)
+        first, last = random_range(rng, start)
+        answers = {name: store.check_range(service_name, first, last) for name, store in stores.items()}
+        assert len({tuple(answer) for answer in answers.values()}) == 1, answers
+        counts = {name: tuple(store.count_full_days([(service_name, first, last)])) for name, store in stores.items()}
+        assert len(set(counts.values())) == 1, counts
+
+        op = rng.random()
+        if op < 0.45:
+            try:
+                results = {name: store.reserve_range(service_name, first, last) for name, store in stores.items()}
+            except ValueError:
+                continue  # the range has no weekdays: every store raises before touching anything
+            assert len({hold_id is None for hold_id in results.values()}) == 1, results
+            if next(iter(results.values())) is not None:
+                holds.append(results)
+        elif op < 0.65 and holds:
+            hold = holds.pop(rng.randrange(len(holds)))
+            for name, store in stores.items():
+                assert store.commit(hold[name])
+                handles[name].append(hold[name])
+        elif op < 0.75 and holds:
+            hold = holds.pop(rng.randrange(len(holds)))
+            for name, store in stores.items():
+                store.release(hold[name])
+        elif op < 0.85 and handles[next(iter(stores))]:
+            position = rng.randrange(len(handles[next(iter(stores))]))
+            results = {name: store.cancel(handles[name][position]) for name, store in stores.items()}
+            assert len(set(results.values())) == 1, results
+        elif handles[next(iter(stores))]:
+            position = rng.randrange(len(handles[next(iter(stores))]))
+            try:
+                results = {
+                    name: store.reschedule(handles[name][position], first, last) for name, store in stores.items()
+                }
+            except ValueError:
+                continue
+            assert len(set(results.values())) == 1, results
+    for hold in holds:
+        for name, store in stores.items():
+            store.release(hold[name])
+    return handles
+
+
+def assert_same(stores, handles):
+    names = list(stores)
+    reference = stores[names[0]]
+    for name in names[1:]:
+        assert stores[name].snapshot() == reference.snapshot(), name
+        assert records(stores[name], handles[name]) == records(reference, handles[names[0]]), name
+
+
+@pytest.mark.parametrize("seed", [1, 2])
+def test_backends_agree(tmp_path, seed):
+    start = datetime.date.today() + datetime.timedelta(days=7)
+    calendar = make_calendar(start)
+    stores = {backend: open_backend(backend, calendar, tmp_path) for backend in BACKENDS}
+    handles = run_workload(stores, start, seed)
+    assert_same(stores, handles)
+
+    # The durable stores come back with the same bookings and counts
+    reopened = dict(stores, file=open_backend("file", calendar, tmp_path), sqlite=open_backend("sqlite", calendar, tmp_path))
+    assert_same(reopened, handles)
+
+
+def test_backends_agree_on_booking_listings(tmp_path):
+    start = datetime.date.today() + datetime.timedelta(days=7)
+    calendar = make_calendar(start)
+    stores = {backend: open_backend(backend, calendar, tmp_path) for backend in BACKENDS}
+    handles = run_workload(stores, start, 3)
+    positions = {name: {booking_id: position for position, booking_id in enumerate(ids)} for name, ids in handles.items()}
+    rng = random.Random(3)
+    for _ in range(50):
+        first, last = random_range(rng, start)
+        listings = {
+            name: [positions[name][record["booking_id"]] for chunk in store.iter_bookings(first, last, 7) for record in chunk]
+            for name, store in stores.items()
+        }
+        ids_on = {
+            name: sorted(positions[name][booking_id] for booking_id in store.booking_ids_on(first.toordinal()))
+            for name, store in stores.items()
+        }
+        assert len({tuple(sorted(listing)) for listing in listings.values()}) == 1, listings
+        assert len({tuple(ids) for ids in ids_on.values()}) == 1, ids_on
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_renew_extends_live_holds_only(tmp_path, backend, next_monday):
+    store = open_backend(backend, 1, tmp_path)
+    store.hold_ttl = 0.3
+    hold_id = store.reserve_range("Child Day Care", next_monday, next_monday)
+    expired_id = store.reserve_range("Elder Day Care", next_monday, next_monday)
+    time.sleep(0.2)
+    assert store.renew(hold_id)
+    time.sleep(0.2)
+    assert not store.renew(expired_id) and not store.renew("unknown")
+    assert store.check_range("Child Day Care", next_monday, next_monday) == [next_monday]
+    assert store.get_count(next_monday.toordinal(), "Elder Day Care") == 0
+    assert store.commit(hold_id)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_closure_days_are_never_full_or_charged(tmp_path, backend, next_monday):
+    wednesday = next_monday + datetime.timedelta(days=2)
+    friday = next_monday + datetime.timedelta(days=4)
+    set_closures([wednesday.toordinal()])
+    store = open_backend(backend, 1, tmp_path)
+    assert store.commit(store.reserve_range("Child Day Care", next_monday, friday))
+    assert store.get_booking(store.booking_ids_on(friday.toordinal())[0])["num_days"] == 4
+    assert store.check_range("Child Day Care", next_monday, friday) == [
+        day for day in (next_monday + datetime.timedelta(days=offset) for offset in range(5)) if day != wednesday
+    ]
+    assert store.is_range_available("Child Day Care", wednesday, wednesday)
+    assert store.count_full_days([("Child Day Care", next_monday, friday), ("Child Day Care", wednesday, wednesday)]) == [4, 0]
+    with pytest.raises(ValueError):
+        store.reserve_range("Child Day Care", wednesday, wednesday)  # nothing open to book
+
+
+def test_closures_hint_names_the_closed_days(next_monday):
+    wednesday = next_monday + datetime.timedelta(days=2)
+    set_closures([wednesday.toordinal()])
+    assert booking_core.closures_hint((next_monday, next_monday + datetime.timedelta(days=4))) == (
+        f"Closed, not booked or charged: {wednesday.strftime('%Y-%m-%d (%a)')}."
+    )
+    assert booking_core.closures_hint((next_monday, next_monday + datetime.timedelta(days=1))) is None
+    assert booking_core.quote_service("Child Day Care", next_monday, next_monday + datetime.timedelta(days=4)) == (4, 2400)
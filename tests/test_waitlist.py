@@ -0,0 +1,96 @@
+import datetime
+import time
+
+import pytest
+
+import booking_core
+from booking_store import open_store
+from waitlist import WAITLIST_EXPIRED, WAITLIST_PROMOTED, WAITLIST_WAITING, WAITLIST_WITHDRAWN, Waitlist
+
+SERVICE = "Child Day Care"
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    return open_store(request.param, 1, booking_core.SERVICE_NAMES, path=str(tmp_path / "bookings.db"))
+
+
+def test_released_hold_promotes_the_waitlist(store, next_monday):
+    waitlist = booking_core.open_waitlist(store)
+    day = next_monday
+    hold_id = store.reserve_range(SERVICE, day, day)
+    entry_id, error = booking_core.join_waitlist(store, waitlist, SERVICE, (day, day))
+    assert error is None and waitlist.get(entry_id)["status"] == WAITLIST_WAITING and len(waitlist) == 1
+
+    store.release(hold_id)
+    entry = waitlist.get(entry_id)
+    assert entry["status"] == WAITLIST_PROMOTED and len(waitlist) == 0
+    booking = store.get_booking(entry["booking_id"])
+    assert booking["status"] == booking_core.BOOKING_CONFIRMED and (booking["start"], booking["end"]) == (day, day)
+    assert not store.is_range_available(SERVICE, day, day)
+
+
+def test_expired_hold_promotes_the_waitlist(store, next_monday):
+    waitlist = booking_core.open_waitlist(store)
+    day = next_monday
+    store.hold_ttl = 0.3
+    store.reserve_range(SERVICE, day, day)
+    entry_id, error = booking_core.join_waitlist(store, waitlist, SERVICE, (day, day))
+    assert error is None
+    time.sleep(0.4)
+    store.check_range(SERVICE, day, day)  # any store call sweeps expired holds
+    assert waitlist.get(entry_id)["status"] == WAITLIST_PROMOTED
+
+
+def test_cancel_and_reschedule_promote_in_request_order(store, next_monday):
+    waitlist = booking_core.open_waitlist(store)
+    day = next_monday
+    booking_id = store.reserve_range(SERVICE, day, day)
+    store.commit(booking_id)
+    first, _ = booking_core.join_waitlist(store, waitlist, SERVICE, (day, day))
+    second, _ = booking_core.join_waitlist(store, waitlist, SERVICE, (day, day))
+    withdrawn, _ = booking_core.join_waitlist(store, waitlist, SERVICE, (day, day + datetime.timedelta(days=1)))
+    assert waitlist.withdraw(withdrawn) and not waitlist.withdraw(withdrawn)
+
+    assert booking_core.reschedule_booking(store, booking_id, (day + datetime.timedelta(days=7),) * 2) is None
+    assert [waitlist.get(entry_id)["status"] for entry_id in (first, second)] == [WAITLIST_PROMOTED, WAITLIST_WAITING]
+    assert booking_core.cancel_booking(store, waitlist.get(first)["booking_id"]) is None
+    assert [waitlist.get(entry_id)["status"] for entry_id in (second, withdrawn)] == [WAITLIST_PROMOTED, WAITLIST_WITHDRAWN]
+
+
+def test_entries_that_can_no_longer_start_expire(store, next_monday):
+    waitlist = booking_core.open_waitlist(store)
+    hold_id = store.reserve_range(SERVICE, next_monday, next_monday)
+    entry_id, _ = booking_core.join_waitlist(store, waitlist, SERVICE, (next_monday, next_monday))
+    # As if the entry had joined before its start day came round
+    past = datetime.date.today() - datetime.timedelta(days=7)
+    if isinstance(waitlist, Waitlist):
+        waitlist._entries[entry_id]["start"] = past
+    else:
+        store._conn().execute("UPDATE waitlist SET first_day = ? WHERE entry_id = ?", (past.toordinal(), entry_id))
+    store.release(hold_id)
+    assert waitlist.get(entry_id)["status"] == WAITLIST_EXPIRED
+    assert store.is_range_available(SERVICE, next_monday, next_monday)
+
+
+def test_sqlite_waitlist_is_shared_and_survives_a_restart(tmp_path, next_monday):
+    path = str(tmp_path / "bookings.db")
+    worker, other_worker = (open_store("sqlite", 1, booking_core.SERVICE_NAMES, path=path) for _ in range(2))
+    booking_id = worker.reserve_range(SERVICE, next_monday, next_monday)
+    worker.commit(booking_id)
+    entry_id, _ = booking_core.join_waitlist(worker, booking_core.open_waitlist(worker), SERVICE, (next_monday, next_monday))
+
+    # Another process cancels: the entry it never saw is promoted in the same transaction
+    assert booking_core.cancel_booking(other_worker, booking_id) is None
+    restarted = open_store("sqlite", 1, booking_core.SERVICE_NAMES, path=path)
+    entry = booking_core.open_waitlist(restarted).get(entry_id)
+    assert entry["status"] == WAITLIST_PROMOTED and restarted.get_booking(entry["booking_id"]) is not None
+
+
+def test_the_journal_store_keeps_no_waitlist(tmp_path, next_monday):
+    store = open_store("file", 1, booking_core.SERVICE_NAMES, path=str(tmp_path / "bookings.jsonl"))
+    assert booking_core.open_waitlist(store) is None
+    with pytest.raises(ValueError):
+        Waitlist(store)
+    day = next_monday
+    assert booking_core.join_waitlist(store, None, SERVICE, (day, day)) == (None, booking_core.WAITLIST_UNAVAILABLE)
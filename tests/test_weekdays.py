@@ -0,0 +1,53 @@
+import datetime
+import random
+
+from weekdays import (
+    RANGE_CACHE_SIZE,
+    cached_count_weekdays,
+    cached_weekday_ordinals,
+    count_weekdays,
+    iter_weekdays,
+    ordinals_to_dates,
+    range_cache_stats,
+    set_closures,
+    weekday_ordinals,
+)
+
+
+def test_weekday_expansion_leaves_closures_out():
+    rng = random.Random(0)
+    origin = datetime.date(2026, 1, 1).toordinal()
+    closed = {origin + rng.randrange(400) for _ in range(60)}
+    set_closures(closed)
+    for _ in range(1000):
+        start = datetime.date.fromordinal(origin + rng.randrange(-20, 420))
+        end = start + datetime.timedelta(days=rng.randrange(-3, 60))
+        expected = [
+            datetime.date.fromordinal(ordinal)
+            for ordinal in range(start.toordinal(), end.toordinal() + 1)
+            if (ordinal - 1) % 7 < 5 and ordinal not in closed
+        ]
+        assert count_weekdays(start, end) == cached_count_weekdays(start, end) == len(expected)
+        assert ordinals_to_dates(weekday_ordinals(start, end)) == expected
+        assert list(iter_weekdays(start, end)) == expected
+
+
+def test_set_closures_clears_the_range_cache():
+    monday = datetime.date(2026, 12, 21)
+    friday = monday + datetime.timedelta(days=4)
+    assert cached_count_weekdays(monday, friday) == 5
+    set_closures([datetime.date(2026, 12, 25).toordinal(), datetime.date(2026, 12, 26).toordinal()])
+    assert cached_count_weekdays(monday, friday) == 4
+
+
+def test_range_cache_stats_count_hits_and_misses():
+    set_closures([])
+    monday = datetime.date(2027, 3, 1)
+    friday = monday + datetime.timedelta(days=4)
+    assert range_cache_stats()["count_weekdays"] == {"hits": 0, "misses": 0, "size": 0, "max_size": RANGE_CACHE_SIZE}
+    for _ in range(3):
+        cached_count_weekdays(monday, friday)
+    cached_weekday_ordinals(monday, friday)
+    stats = range_cache_stats()
+    assert stats["count_weekdays"] == {"hits": 2, "misses": 1, "size": 1, "max_size": RANGE_CACHE_SIZE}
+    assert stats["weekday_ordinals"]["misses"] == 1 and stats["weekday_ordinals"]["size"] == 1
@@ -0,0 +1,225 @@
+"""
+Waitlist for ranges that hit full days, promoted into bookings as seats free up.
+
+A request that can't be booked because some of its days are at capacity can wait
+instead. Each waiting entry is queued on every (service, weekday) of its range in
+request order, so every day keeps its own first-come-first-served queue. Whenever the
+store gives seats back (a released or expired hold, a cancellation, a reschedule), it
+calls Waitlist.promote, which merges the queues of the freed days with a heap keyed by
+request time and books the earliest entries whose whole range now fits, in one pass
+over all the freed ranges. The pass stops reading
+a day's queue as soon as that day is full again, so it touches only the entries that
+could still get a seat, however many thousands are waiting.
+
+Promoted entries become confirmed bookings at the price quoted when they joined;
+the booking_id is on the entry. This waitlist lives in memory next to the in-memory
+store (ledger.CapacityLedger.open_waitlist). The SQLite store keeps its entries in the
+database instead (sqlite_ledger.SQLiteWaitlist), with the same interface and statuses.
+"""
+import datetime
+import heapq
+import itertools
+import threading
+import time
+import uuid
+
+import numpy as np
+
+from weekdays import closed_indices, weekday_index_range, weekday_index_to_date
+
+# Waitlist entry statuses
+WAITLIST_WAITING = "waiting"
+WAITLIST_PROMOTED = "promoted"
+WAITLIST_WITHDRAWN = "withdrawn"
+WAITLIST_EXPIRED = "expired"
+# Entry fields handed out by Waitlist.get (the rest are internal)
+ENTRY_FIELDS = ["entry_id", "service", "start", "end", "num_days", "cost", "requested_at", "status", "booking_id"]
+
+
+class Waitlist:
+    """
+    Per-(date, service) FIFO queues of waiting booking requests for one BookingStore.
+
+    Entries are dicts keyed by entry_id; `_queues` maps (service_name, weekday index) to
+    the ids waiting on that day, oldest first. Entries that stop waiting are left in the
+    queues and skipped; `_stale` counts them per queue, and a queue is rebuilt once they
+    make up half of it, so dropping them costs O(1) amortised.
+    """
+
+    def __init__(self, store):
+        if store.durable:
+            raise ValueError("This waitlist is kept in memory; durable stores keep their own, see store.open_waitlist().")
+        self.store = store
+        self._entries = {}
+        self._queues = {}
+        self._stale = {}
+        self._sequence = itertools.count()
+        # One lock for adding, withdrawing and promoting, so a seat is never promoted twice
+        self._lock = threading.Lock()
+        # Freed ranges not promoted yet. Promoting books into the store, which may free seats in turn
+        # (holds expiring meanwhile); those ranges wait here for the pass running on that thread.
+        self._pending = []
+        self._pending_lock = threading.Lock()
+        self._local = threading.local()
+        store.add_freed_listener(self.promote)
+
+    def __len__(self):
+        """Number of entries still waiting."""
+        with self._lock:
+            return sum(entry["status"] == WAITLIST_WAITING for entry in self._entries.values())
+
+    def add(self, service_name, start_date, end_date, num_days, cost):
+        """Queues a request for [start_date, end_date] behind everyone already waiting. Returns its entry_id."""
+        lo, hi = weekday_index_range(start_date, end_date)
+        if lo > hi:
+            raise ValueError("Range contains no weekdays.")
+        entry_id = uuid.uuid4().hex
+        with self._lock:
+            self._entries[entry_id] = {
+                "entry_id": entry_id,
+                "service": service_name,
+                "start": start_date,
+                "end": end_date,
+                "num_days": num_days,
+                "cost": cost,
+                "requested_at": time.time(),
+                "status": WAITLIST_WAITING,
+                "booking_id": None,
+                # Request order: the heap key of the promotion pass, never tied
+                "_order": next(self._sequence),
+                "_lo": lo,
+                "_hi": hi,
+            }
+            for day in range(lo, hi + 1):
+                self._queues.setdefault((service_name, day), []).append(entry_id)
+        # Seats may have freed up since the caller found the range full
+        self.promote([(service_name, start_date, end_date)])
+        return entry_id
+
+    def get(self, entry_id):
+        """The entry as a dict of ENTRY_FIELDS, or None if the ID is unknown."""
+        with self._lock:
+            entry = self._entries.get(entry_id)
+            return {field: entry[field] for field in ENTRY_FIELDS} if entry is not None else None
+
+    def withdraw(self, entry_id):
+        """Takes a waiting entry off the list. Returns False if it isn't waiting."""
+        with self._lock:
+            entry = self._entries.get(entry_id)
+            if entry is None or entry["status"] != WAITLIST_WAITING:
+                return False
+            self._compact(self._finish(entry, WAITLIST_WITHDRAWN))
+            return True
+
+    def _finish(self, entry, status):
+        """Takes an entry out of the waiting state; returns the queue keys it made staler."""
+        entry["status"] = status
+        keys = [(entry["service"], day) for day in range(entry["_lo"], entry["_hi"] + 1)]
+        for key in keys:
+            self._stale[key] = self._stale.get(key, 0) + 1
+        return keys
+
+    def _compact(self, keys):
+        """Rebuilds the queues among `keys` that are at least half stale."""
+        for key in keys:
+            queue = self._queues.get(key)
+            if queue is None or self._stale.get(key, 0) * 2 < len(queue):
+                continue
+            queue = [entry_id for entry_id in queue if self._entries[entry_id]["status"] == WAITLIST_WAITING]
+            self._stale.pop(key, None)
+            if queue:
+                self._queues[key] = queue
+            else:
+                del self._queues[key]
+
+    def promote(self, freed_ranges):
+        """
+        Books waiting entries into the seats freed on the (service_name, start_date, end_date)
+        ranges, earliest request first. Entries whose start day has passed are expired instead.
+        Returns the entry_ids promoted, in promotion order (none if called from within a pass,
+        which then promotes for these ranges as well).
+        """
+        with self._pending_lock:
+            self._pending.extend(freed_ranges)
+        if getattr(self._local, "promoting", False):
+            return []
+        promoted = []
+        with self._lock:
+            self._local.promoting = True
+            try:
+                while True:
+                    with self._pending_lock:
+                        freed_ranges, self._pending = self._pending, []
+                    if not freed_ranges:
+                        break
+                    spans = {}
+                    for service_name, start_date, end_date in freed_ranges:
+                        lo, hi = weekday_index_range(start_date, end_date)
+                        if lo <= hi:
+                            span = spans.get(service_name)
+                            spans[service_name] = (min(span[0], lo), max(span[1], hi)) if span else (lo, hi)
+                    for service_name, (lo, hi) in spans.items():
+                        promoted += self._promote_span(service_name, lo, hi)
+            finally:
+                self._local.promoting = False
+        return promoted
+
+    def _promote_span(self, service_name, lo, hi):
+        # One pass over the weekdays lo..hi of one service (the caller holds the lock)
+        # Closure days never fill up, so they neither block an entry nor get a queue of their own read
+        closed = closed_indices(lo, hi) - lo
+        open_days = np.ones(hi - lo + 1, dtype=bool)
+        open_days[closed] = False
+        days = [day for day in range(lo, hi + 1) if open_days[day - lo] and self._queues.get((service_name, day))]
+        if not days:
+            return []
+        col = self.store.service_names.index(service_name)
+        window = self.store.count_window(weekday_index_to_date(lo), weekday_index_to_date(hi))
+        free = self.store.capacity.column(service_name, lo, hi) - window[:, col]
+        free[closed] = np.iinfo(free.dtype).max
+        first_bookable = datetime.date.today() + datetime.timedelta(days=1)
+
+        # k-way merge of the day queues: the heap holds the next candidate of every day with a free seat
+        heap = []
+        for day in days:
+            if free[day - lo] > 0:
+                entry_id = self._queues[(service_name, day)][0]
+                heap.append((self._entries[entry_id]["_order"], day, 0))
+        heapq.heapify(heap)
+
+        promoted = []
+        seen = set()
+        stale_keys = set()
+        while heap:
+            _, day, position = heapq.heappop(heap)
+            if free[day - lo] <= 0:
+                continue  # the day filled up: the rest of its queue can't be promoted in this pass
+            queue = self._queues[(service_name, day)]
+            if position + 1 < len(queue):
+                heapq.heappush(heap, (self._entries[queue[position + 1]]["_order"], day, position + 1))
+            entry_id = queue[position]
+            entry = self._entries[entry_id]
+            if entry_id in seen or entry["status"] != WAITLIST_WAITING:
+                continue
+            seen.add(entry_id)
+            if entry["start"] < first_bookable:
+                stale_keys.update(self._finish(entry, WAITLIST_EXPIRED))
+                continue
+            overlap_lo, overlap_hi = max(entry["_lo"], lo), min(entry["_hi"], hi)
+            if free[overlap_lo - lo:overlap_hi - lo + 1].min() <= 0:
+                continue
+            hold_id = self.store.reserve_range(service_name, entry["start"], entry["end"], cost=entry["cost"])
+            if hold_id is None:
+                continue  # a day outside the freed span is still full
+            if not self.store.commit(hold_id):
+                continue
+            stale_keys.update(self._finish(entry, WAITLIST_PROMOTED))
+            entry["booking_id"] = hold_id
+            promoted.append(entry_id)
+            free[overlap_lo - lo:overlap_hi - lo + 1] -= 1
+            if not (free[open_days] > 0).any():
+                break
+
+        # Queue positions are only stable during the pass, so rebuild stale queues after it
+        self._compact(stale_keys)
+        return promoted
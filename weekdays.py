@@ -0,0 +1,137 @@
+import datetime
+import functools
+
+import numpy as np
+
+# date.toordinal() numbers days from 0001-01-01, which was a Monday, so
+# (ordinal - 1) % 7 is the weekday (Monday=0 ... Sunday=6) without building date objects.
+
+# --- Closures ---
+# Public holidays and other days the service is closed, as a sorted int32 array of weekday
+# ordinals (and the same days as weekday indices, see below). Enumeration and counting leave
+# them out: the closures of a range are found with two binary searches, O(log h) for h closures,
+# never a membership test per day. Set them with set_closures (closures.py loads them from files).
+_closures = np.empty(0, dtype=np.int32)
+_closed_indices = np.empty(0, dtype=np.int64)
+
+
+def set_closures(ordinals):
+    """Replaces the closure days (any iterable of day ordinals; weekends are dropped) and clears the range caches."""
+    global _closures, _closed_indices
+    days = np.unique(np.asarray(list(ordinals), dtype=np.int32))
+    _closures = days[(days - 1) % 7 < 5]
+    _closed_indices = ((_closures - 1) // 7 * 5 + (_closures - 1) % 7).astype(np.int64)
+    cached_weekday_ordinals.cache_clear()
+    cached_count_weekdays.cache_clear()
+
+
+def closures_between(start_date, end_date):
+    """Ordinals of the closure days in [start_date, end_date], as a view of the sorted closure array."""
+    return _closures[
+        np.searchsorted(_closures, start_date.toordinal()):np.searchsorted(_closures, end_date.toordinal(), side="right")
+    ]
+
+
+def weekday_ordinals(start_date, end_date, include_closed=False):
+    """
+    Returns a compact int32 array with the ordinals of every weekday (Mon-Fri)
+    between start_date and end_date (inclusive), closures left out unless include_closed.
+    Empty if the range is reversed.
+    """
+    if start_date > end_date:
+        return np.empty(0, dtype=np.int32)
+    days = np.arange(start_date.toordinal(), end_date.toordinal() + 1, dtype=np.int32)
+    days = days[(days - 1) % 7 < 5]
+    closed = closures_between(start_date, end_date)
+    if closed.size and not include_closed:
+        days = np.delete(days, np.searchsorted(days, closed))
+    return days
+
+
+def iter_weekdays(start_date, end_date):
+    """Lazily yields the weekday dates between start_date and end_date (inclusive), closures left out."""
+    closed = iter(closures_between(start_date, end_date).tolist())
+    next_closed = next(closed, None)
+    for ordinal in range(start_date.toordinal(), end_date.toordinal() + 1):
+        if ordinal == next_closed:
+            next_closed = next(closed, None)
+        elif (ordinal - 1) % 7 < 5:
+            yield datetime.date.fromordinal(ordinal)
+
+
+def ordinals_to_dates(ordinals):
+    """Converts an array of day ordinals back into a list of datetime.date."""
+    return [datetime.date.fromordinal(o) for o in ordinals.tolist()]
+
+
+def weekdays_before(ordinal):
+    """Number of weekdays with an ordinal strictly below `ordinal` (closed form, no iteration)."""
+    days = ordinal - 1
+    return (days // 7) * 5 + min(days % 7, 5)
+
+
+def count_weekdays(start_date, end_date):
+    """Number of weekdays between start_date and end_date (inclusive), closures left out, in O(log h). 0 if reversed."""
+    if start_date > end_date:
+        return 0
+    weekdays = weekdays_before(end_date.toordinal() + 1) - weekdays_before(start_date.toordinal())
+    return weekdays - closures_between(start_date, end_date).size
+
+
+# --- Range cache ---
+# Users re-check the same ranges over and over (every click quotes every selected service),
+# so expansion and counting are memoised per (start, end) for the whole process, i.e. shared
+# by every session. Each cache keeps at most this many distinct ranges (least recently used go first).
+RANGE_CACHE_SIZE = 4096
+
+
+@functools.lru_cache(maxsize=RANGE_CACHE_SIZE)
+def cached_weekday_ordinals(start_date, end_date, include_closed=False):
+    """weekday_ordinals, memoised. The array is shared between callers, so it is read-only."""
+    ordinals = weekday_ordinals(start_date, end_date, include_closed)
+    ordinals.flags.writeable = False
+    return ordinals
+
+
+@functools.lru_cache(maxsize=RANGE_CACHE_SIZE)
+def cached_count_weekdays(start_date, end_date):
+    """count_weekdays, memoised."""
+    return count_weekdays(start_date, end_date)
+
+
+def range_cache_stats():
+    """Hit/miss metrics of the range caches: {name: {"hits", "misses", "size", "max_size"}}."""
+    return {
+        name: {"hits": info.hits, "misses": info.misses, "size": info.currsize, "max_size": info.maxsize}
+        for name, info in (
+            ("weekday_ordinals", cached_weekday_ordinals.cache_info()),
+            ("count_weekdays", cached_count_weekdays.cache_info()),
+        )
+    }
+
+
+# --- Weekday index ---
+# Numbering weekdays consecutively (weekdays_before gives the index of a weekday ordinal)
+# turns any date range into one contiguous interval, which range structures can use directly.
+
+# Closure days keep their index, so index arithmetic stays closed-form; the stores simply
+# never report them as full (see closed_indices).
+
+def weekday_index_range(start_date, end_date):
+    """Returns the inclusive (lo, hi) weekday indexes covered by the range; lo > hi if it has no weekdays."""
+    return weekdays_before(start_date.toordinal()), weekdays_before(end_date.toordinal() + 1) - 1
+
+
+def weekday_index_to_ordinal(index):
+    """Inverse of the weekday index: the day ordinal of the index-th weekday."""
+    week, day = divmod(index, 5)
+    return week * 7 + day + 1
+
+
+def weekday_index_to_date(index):
+    return datetime.date.fromordinal(weekday_index_to_ordinal(index))
+
+
+def closed_indices(lo, hi):
+    """Weekday indices of the closure days in [lo, hi], found in O(log h)."""
+    return _closed_indices[np.searchsorted(_closed_indices, lo):np.searchsorted(_closed_indices, hi, side="right")]